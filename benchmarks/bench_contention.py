@@ -0,0 +1,112 @@
+"""
+Contention benchmark for ``ProcessSingleton``.
+
+Compares the current metaclass against the previous implementation, which held one lock shared by
+every class and scope, including while the constructor ran.
+
+Usage::
+
+    poetry run python benchmarks/bench_contention.py --threads 32 --classes 64
+"""
+import argparse
+import os
+import threading
+import time
+from typing import Any, Callable, ClassVar, List, MutableMapping, Type
+
+from singletons import ProcessSingleton
+
+
+class LegacyProcessSingleton(type):
+    """The previous ``ProcessSingleton``, with a single class-wide lock."""
+
+    __pids: ClassVar[MutableMapping[int, MutableMapping[Type, Any]]] = {}
+    __lock = threading.Lock()
+
+    def __call__(cls, *args: Any, **kwargs: Any) -> Any:
+        pids = LegacyProcessSingleton.__pids
+        pid = os.getpid()
+        if pid not in pids:
+            with LegacyProcessSingleton.__lock:
+                if pid not in pids:
+                    pids[pid] = {}
+        my_pid = pids[pid]
+        if cls not in my_pid:
+            with LegacyProcessSingleton.__lock:
+                if cls not in my_pid:
+                    my_pid[cls] = super().__call__(*args, **kwargs)
+        return my_pid[cls]
+
+
+def make_classes(metaclass: Type, count: int, delay: float) -> List[Type]:
+    """Create ``count`` singleton classes whose constructors take ``delay`` seconds."""
+
+    def __init__(self: Any) -> None:  # noqa: N807
+        time.sleep(delay)
+
+    return [metaclass(f"Cls{index}", (), {"__init__": __init__}) for index in range(count)]
+
+
+def run_threads(threads: int, target: Callable[[int], None]) -> float:
+    """Run ``target(index)`` in ``threads`` threads started together, returning the elapsed time."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index: int) -> None:
+        barrier.wait()
+        target(index)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    start = time.perf_counter()
+    barrier.wait()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def bench_cold(metaclass: Type, threads: int, classes: int, delay: float) -> float:
+    """Time every thread obtaining every instance while they are being constructed."""
+    classes_list = make_classes(metaclass, classes, delay)
+
+    def target(index: int) -> None:
+        # each thread starts with a different class, so constructions can overlap
+        offset = index * classes // threads
+        for cls in classes_list[offset:] + classes_list[:offset]:
+            cls()
+
+    return run_threads(threads, target)
+
+
+def bench_hot(metaclass: Type, threads: int, classes: int, calls: int) -> float:
+    """Time every thread repeatedly obtaining already-created instances."""
+    classes_list = make_classes(metaclass, classes, 0)
+    for cls in classes_list:
+        cls()
+
+    def target(index: int) -> None:
+        for _ in range(calls):
+            for cls in classes_list:
+                cls()
+
+    return run_threads(threads, target)
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--classes", type=int, default=64)
+    parser.add_argument("--delay", type=float, default=0.005, help="constructor time in seconds")
+    parser.add_argument("--calls", type=int, default=1000, help="hot calls per thread and class")
+    args = parser.parse_args()
+
+    for name, metaclass in (("legacy", LegacyProcessSingleton), ("current", ProcessSingleton)):
+        cold = bench_cold(metaclass, args.threads, args.classes, args.delay)
+        hot = bench_hot(metaclass, args.threads, args.classes, args.calls)
+        per_call = hot / (args.threads * args.classes * args.calls) * 1e9
+        print(f"{name:>8}: cold start {cold * 1e3:8.1f} ms, hot path {per_call:6.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Memory benchmark for dynamically created singleton classes and factories.
+
+Runs ``CYCLES`` cycles, each creating a singleton class or factory (in turn: a ``Singleton`` class,
+a keyed ``Singleton`` class, a ``GlobalFactory``, a ``ProcessFactory`` and a ``ThreadFactory``),
+calling it once and discarding it, and measures the memory still held after every ``STEP``
+cycles. Discarded classes and factories are garbage collected, so the memory held stays flat.
+
+Usage::
+
+    poetry run python benchmarks/bench_discard.py
+"""
+import gc
+import itertools
+import tracemalloc
+from typing import Callable, List
+
+from singletons import GlobalFactory, ProcessFactory, Singleton, ThreadFactory
+
+CYCLES = 100000
+STEP = 20000
+
+
+def create_singleton() -> None:
+    """Create, call and discard a singleton class."""
+    Singleton("Discarded", (), {})()
+
+
+def create_keyed_singleton() -> None:
+    """Create, call and discard a keyed singleton class."""
+    Singleton("Discarded", (), {}, keyed=True)()
+
+
+def create_global_factory() -> None:
+    """Create, call and discard a global factory."""
+    GlobalFactory(object)()
+
+
+def create_process_factory() -> None:
+    """Create, call and discard a process factory."""
+    ProcessFactory(object)()
+
+
+def create_thread_factory() -> None:
+    """Create, call and discard a thread factory."""
+    ThreadFactory(object)()
+
+
+CREATORS: List[Callable[[], None]] = [
+    create_singleton,
+    create_keyed_singleton,
+    create_global_factory,
+    create_process_factory,
+    create_thread_factory,
+]
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    creators = itertools.cycle(CREATORS)
+    print(f"{CYCLES} create/discard cycles")  # noqa: WPS421
+    for done in range(STEP, CYCLES + 1, STEP):
+        for _ in range(STEP):
+            next(creators)()
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0] - start
+        print(f"  {done:>6}: {held / 1024:8.1f} KiB held")  # noqa: WPS421
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Microbenchmark for calling factory functions.
+
+``GlobalFactory`` and ``ProcessFactory`` cache their object once it is built, and the factories of
+functions without parameters don't pack arguments, so a call is a method call and an attribute
+read. The "uncached" row shows the cost of a global factory going through the singleton metaclass
+on every call, as all factories used to; the "optional parameter" row a cached call without
+arguments, of a function whose parameters have defaults.
+
+Usage::
+
+    poetry run python benchmarks/bench_factory.py
+"""
+import timeit
+
+from singletons import GlobalFactory, ProcessFactory, Singleton, ThreadFactory
+from singletons.factory import _FactoryBase  # noqa: WPS450
+
+NUMBER = 1000000
+OBJ = object()
+
+
+class UncachedGlobalFactory(_FactoryBase):
+    """Global factory without the cache, going through the singleton metaclass."""
+
+    singleton_metaclass = Singleton
+
+
+def plain() -> object:
+    """Return a module global, as a baseline."""
+    return OBJ
+
+
+@GlobalFactory
+def global_obj() -> object:
+    """Return a global object."""
+    return object()
+
+
+@UncachedGlobalFactory
+def uncached_global_obj() -> object:
+    """Return a global object, without the cache."""
+    return object()
+
+
+@GlobalFactory
+def global_obj_with_default(arg: int = 0) -> object:
+    """Return a global object, taking an optional argument."""
+    return object()
+
+
+@ProcessFactory
+def process_obj() -> object:
+    """Return a process object."""
+    return object()
+
+
+@ThreadFactory
+def thread_obj() -> object:
+    """Return a thread object."""
+    return object()
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    timings = {
+        "plain function": plain,
+        "GlobalFactory": global_obj,
+        "GlobalFactory uncached": uncached_global_obj,
+        "GlobalFactory optional parameter": global_obj_with_default,
+        "ProcessFactory": process_obj,
+        "ThreadFactory": thread_obj,
+    }
+    for name, func in timings.items():
+        func()
+        seconds = min(timeit.repeat(func, number=NUMBER, repeat=5))
+        print(f"{name:>32}: {seconds / NUMBER * 1e9:6.1f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
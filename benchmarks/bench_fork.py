@@ -0,0 +1,46 @@
+"""
+Microbenchmark for the per-call cost of telling processes apart in ``ProcessSingleton``.
+
+The previous implementation called :func:`os.getpid` on every access. The scope is now reset by an
+:func:`os.register_at_fork` hook instead, so the hit path no longer makes a syscall.
+
+Usage::
+
+    poetry run python benchmarks/bench_fork.py
+"""
+import os
+import timeit
+
+from singletons import ProcessSingleton
+
+NUMBER = 1000000
+
+
+class PidProcessSingleton(ProcessSingleton):
+    """``ProcessSingleton`` telling processes apart by pid on every call, as it used to."""
+
+    _get_ident = staticmethod(os.getpid)
+
+
+class MyProcessSingleton(metaclass=ProcessSingleton):
+    """Singleton used for the benchmark."""
+
+
+class MyPidProcessSingleton(metaclass=PidProcessSingleton):
+    """Singleton used for the benchmark, with the previous scope lookup."""
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    timings = {
+        "os.getpid()": os.getpid,
+        "hit path with os.getpid()": MyPidProcessSingleton,
+        "hit path with fork hooks": MyProcessSingleton,
+    }
+    for name, func in timings.items():
+        seconds = min(timeit.repeat(func, number=NUMBER, repeat=5))
+        print(f"{name:>26}: {seconds / NUMBER * 1e9:6.1f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Memory benchmark for greenthread scopes.
+
+Spawns ``GREENLETS`` gevent greenlets, each calling ``FACTORIES`` ``GeventFactory`` factories, and
+measures the memory allocated while they are all alive, excluding the objects returned by the
+factories (one shared object) and the greenlets themselves (measured by a baseline run calling no
+factory).
+
+Usage::
+
+    poetry run python benchmarks/bench_memory.py
+"""
+import gc
+import tracemalloc
+from typing import Callable, List
+
+import gevent
+import gevent.event
+
+from singletons import GeventFactory
+
+GREENLETS = 10000
+FACTORIES = 20
+SHARED = object()
+
+
+def measure(factories: List[Callable[[], object]]) -> int:
+    """
+    Measure the memory held while greenlets that called the factories are alive.
+
+    :param factories: the factories called by each greenlet
+    :return: the allocated bytes
+    """
+    release = gevent.event.Event()
+
+    def worker() -> None:
+        for factory in factories:
+            factory()
+        release.wait()
+
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    greenlets = [gevent.spawn(worker) for _ in range(GREENLETS)]
+    gevent.sleep(0)
+    gevent.sleep(0)
+    held = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    release.set()
+    gevent.joinall(greenlets)
+    return held
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    factories = [GeventFactory(lambda: SHARED) for _ in range(FACTORIES)]
+    baseline = measure([])
+    held = measure(factories) - baseline
+    scopes = GREENLETS * FACTORIES
+    print(f"{GREENLETS} greenlets x {FACTORIES} factories")  # noqa: WPS421
+    print(f"  held: {held / 1024 / 1024:.1f} MiB")  # noqa: WPS421
+    print(f"   per (greenlet, factory): {held / scopes:.0f} bytes")  # noqa: WPS421
+
+
+if __name__ == "__main__":
+    main()
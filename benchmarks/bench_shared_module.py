@@ -0,0 +1,57 @@
+"""
+Microbenchmark for attribute accesses on a ``SharedModule``, in actual and mock modes.
+
+Compares the current module, which caches mocks and resolved ``Lazy`` attributes in its
+``__dict__``, against the previous implementation, which went through ``__getattr__`` on every
+access.
+
+Usage::
+
+    poetry run python benchmarks/bench_shared_module.py
+"""
+import timeit
+from typing import Any
+
+from singletons import GlobalFactory, SharedModule
+
+NUMBER = 1000000
+
+
+@GlobalFactory
+def global_object() -> object:
+    """Return a global object."""
+    return object()
+
+
+class LegacySharedModule(SharedModule):
+    """``SharedModule`` resolving attributes on every access, as it used to."""
+
+    globals = globals()  # noqa: A003
+
+    def __getattr__(self, key: str) -> Any:
+        if self._mock is None:
+            return self.globals[key]
+        if key not in self._mock:
+            self._mock[key] = self._instantiate_mock_instance(key)
+        return self._mock[key]
+
+
+class CurrentSharedModule(SharedModule):
+    """Shared module used for the benchmark."""
+
+    globals = globals()  # noqa: A003
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    for mode in ("actual", "mock"):
+        print(f"{mode}:")  # noqa: WPS421
+        for name, module in (("legacy", LegacySharedModule()), ("current", CurrentSharedModule())):
+            if mode == "mock":
+                module.setup_mock()
+            seconds = min(timeit.repeat(lambda: module.global_object, number=NUMBER, repeat=5))
+            print(f"  {name:>8}: {seconds / NUMBER * 1e9:6.1f} ns/access")  # noqa: WPS421
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,612 @@
+"""
+Benchmark suite covering every singleton metaclass, factory and ``SharedModule`` path.
+
+Benchmarks are named after their group:
+
+- ``hit/...``: obtaining the existing instance of each metaclass and factory
+- ``first/...``: constructing the instance, on the first call of a new class or factory
+- ``contention/...``: many threads obtaining instances at once, either already constructed
+  ("hot") or being constructed ("cold")
+- ``greenthread/...``: the hit path inside a greenthread, and the cost of a greenthread scope
+  (spawning a greenthread that constructs its instance), with eventlet and gevent
+- ``shared_module/...``: attribute accesses on a ``SharedModule``, in actual and mock modes
+
+Each result is the best time per operation out of ``--repeat`` runs. To check a change for
+regressions, save the results of the unchanged tree with ``--save``, then run the suite again
+with ``--compare``: benchmarks slower than the baseline by more than ``--threshold`` are flagged,
+and the exit status is 1 if there are any. Baselines are only comparable on the same machine and
+Python version.
+
+Usage::
+
+    git stash
+    poetry run python benchmarks/bench_suite.py --save baseline.json
+    git stash pop
+    poetry run python benchmarks/bench_suite.py --compare baseline.json
+    poetry run python benchmarks/bench_suite.py --filter hit/ --filter first/ --quick
+"""
+import argparse
+import asyncio
+import functools
+import gc
+import json
+import multiprocessing
+import platform
+import sys
+import time
+import timeit
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from bench_contention import bench_cold, bench_hot, run_threads
+
+from singletons import (
+    AsyncGlobalFactory,
+    AsyncProcessFactory,
+    ContextFactory,
+    ContextSingleton,
+    EventletFactory,
+    EventletSingleton,
+    ExecutorFactory,
+    ExecutorSingleton,
+    GeventFactory,
+    GeventSingleton,
+    GlobalFactory,
+    GreenthreadFactory,
+    GreenthreadSingleton,
+    Lazy,
+    ManagerFactory,
+    PooledFactory,
+    ProcessFactory,
+    ProcessSingleton,
+    ShardedFactory,
+    ShardedSingleton,
+    SharedMemoryFactory,
+    SharedModule,
+    Singleton,
+    ThreadFactory,
+    ThreadSingleton,
+    redetect_greenthread_environment,
+)
+
+HIT_NUMBER = 200000
+FIRST_NUMBER = 2000
+CONTENTION_CALLS = 2000
+CONTENTION_CLASSES = 64
+GREENTHREAD_NUMBER = 2000
+
+METACLASSES = (
+    Singleton,
+    ProcessSingleton,
+    ThreadSingleton,
+    ExecutorSingleton,
+    ContextSingleton,
+    ShardedSingleton,
+)
+FACTORIES = (
+    GlobalFactory,
+    ProcessFactory,
+    ThreadFactory,
+    ExecutorFactory,
+    ContextFactory,
+    ShardedFactory,
+)
+
+
+class Options(NamedTuple):
+    """Settings shared by the benchmarks."""
+
+    scale: float
+    repeat: int
+    threads: int
+
+    def count(self, number: int) -> int:
+        """
+        Scale a number of operations.
+
+        :param number: the number of operations of a full run
+        :return: the number of operations to run
+        """
+        return max(1, int(number * self.scale))
+
+
+# benchmark name -> function returning the best time per operation, in seconds, or None to skip
+BENCHMARKS: Dict[str, Callable[[Options], Optional[float]]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """
+    Register a benchmark.
+
+    :param name: the name of the benchmark, prefixed with its group
+    :return: a decorator registering the function
+    """
+
+    def decorator(func: Callable[[Options], Optional[float]]) -> Callable:
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def best_per_call(func: Callable[[], Any], number: int, repeat: int) -> float:
+    """
+    Time calls of a function that was already called once.
+
+    :param func: the function
+    :param number: the number of calls per run
+    :param repeat: the number of runs
+    :return: the best time per call, in seconds
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def best_first_call(create: Callable[[], Callable[[], Any]], number: int, repeat: int) -> float:
+    """
+    Time the first call of new functions, e.g. singleton classes.
+
+    :param create: function creating a new function to call
+    :param number: the number of functions per run
+    :param repeat: the number of runs
+    :return: the best time per call, in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        funcs = [create() for _ in range(number)]
+        gc.disable()
+        start = time.perf_counter()
+        for func in funcs:
+            func()
+        timings.append(time.perf_counter() - start)
+        gc.enable()
+        del funcs  # noqa: WPS420
+        gc.collect()
+    return min(timings) / number
+
+
+def best_in_loop(coroutine: Callable[[], Awaitable[float]]) -> float:
+    """
+    Run an asynchronous benchmark in a new event loop.
+
+    :param coroutine: coroutine function returning the best time per operation
+    :return: the best time per operation, in seconds
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine())
+    finally:
+        loop.close()
+
+
+def new_class(metaclass: type, **kwargs: Any) -> type:
+    """
+    Create a singleton class.
+
+    :param metaclass: the singleton metaclass
+    :param kwargs: class keyword arguments
+    :return: the class
+    """
+    return metaclass("Bench", (), {"__init__": lambda self, *args: None}, **kwargs)
+
+
+def checkout(factory: PooledFactory) -> Callable[[], None]:
+    """
+    Make a function borrowing an object from a pooled factory, and returning it.
+
+    :param factory: the factory
+    :return: the function
+    """
+
+    def borrow() -> None:
+        with factory():
+            pass  # noqa: WPS420
+
+    return borrow
+
+
+def register_hit(name: str, create: Callable[[], Callable[[], Any]]) -> None:
+    """
+    Register the hit path benchmark of a class or factory.
+
+    :param name: the name of the benchmark, without its group
+    :param create: function creating the class or factory to call
+    """
+
+    def run(options: Options) -> float:
+        func = create()
+        func()
+        return best_per_call(func, options.count(HIT_NUMBER), options.repeat)
+
+    BENCHMARKS[f"hit/{name}"] = run
+
+
+def register_first(name: str, create: Callable[[], Callable[[], Any]]) -> None:
+    """
+    Register the first construction benchmark of a class or factory.
+
+    :param name: the name of the benchmark, without its group
+    :param create: function creating the class or factory to call
+    """
+
+    def run(options: Options) -> float:
+        return best_first_call(create, options.count(FIRST_NUMBER), options.repeat)
+
+    BENCHMARKS[f"first/{name}"] = run
+
+
+for _metaclass in METACLASSES:
+    register_hit(_metaclass.__name__, functools.partial(new_class, _metaclass))
+    register_first(_metaclass.__name__, functools.partial(new_class, _metaclass))
+for _factory in FACTORIES:
+    register_hit(_factory.__name__, functools.partial(_factory, object))
+    register_first(_factory.__name__, functools.partial(_factory, object))
+for _name, _create in (
+    ("Singleton keyed", lambda: functools.partial(new_class(Singleton, keyed=True), "key")),
+    (
+        "ProcessSingleton keyed maxsize",
+        lambda: functools.partial(new_class(ProcessSingleton, keyed=True, maxsize=16), "key"),
+    ),
+    ("ThreadSingleton keyed", lambda: functools.partial(new_class(ThreadSingleton, keyed=True), 1)),
+    ("ProcessFactory keyed", lambda: functools.partial(ProcessFactory(lambda key: key), "key")),
+    ("PooledFactory", lambda: checkout(PooledFactory(object, size=1))),
+):
+    register_hit(_name, _create)
+    register_first(_name, _create)
+
+
+@benchmark("hit/AsyncGlobalFactory")
+def hit_async_global_factory(options: Options) -> float:
+    """
+    Await the object of an ``AsyncGlobalFactory``.
+
+    :param options: the benchmark settings
+    :return: the best time per operation, in seconds
+    """
+    return best_in_loop(functools.partial(best_await, AsyncGlobalFactory, options))
+
+
+@benchmark("hit/AsyncProcessFactory")
+def hit_async_process_factory(options: Options) -> float:
+    """
+    Await the object of an ``AsyncProcessFactory``.
+
+    :param options: the benchmark settings
+    :return: the best time per operation, in seconds
+    """
+    return best_in_loop(functools.partial(best_await, AsyncProcessFactory, options))
+
+
+async def build() -> object:
+    """
+    Build an object asynchronously.
+
+    :return: the object
+    """
+    return object()
+
+
+async def best_await(factory_class: type, options: Options) -> float:
+    """
+    Time awaiting the object of an asynchronous factory, once it is built.
+
+    :param factory_class: the factory class
+    :param options: the benchmark settings
+    :return: the best time per operation, in seconds
+    """
+    factory = factory_class(build)
+    await factory()
+    number = options.count(HIT_NUMBER)
+    timings = []
+    for _ in range(options.repeat):
+        start = time.perf_counter()
+        for _ in range(number):  # noqa: WPS440
+            await factory()
+        timings.append(time.perf_counter() - start)
+    return min(timings) / number
+
+
+@benchmark("hit/SharedMemoryFactory")
+def hit_shared_memory_factory(options: Options) -> Optional[float]:
+    """
+    Get the view of a ``SharedMemoryFactory``.
+
+    :param options: the benchmark settings
+    :return: the best time per operation in seconds, or None before Python 3.8
+    """
+    if sys.version_info < (3, 8):
+        return None
+    factory = SharedMemoryFactory(lambda: bytes(1))
+    factory()
+    return best_per_call(factory, options.count(HIT_NUMBER), options.repeat)
+
+
+@benchmark("hit/ManagerFactory")
+def hit_manager_factory(options: Options) -> Optional[float]:
+    """
+    Get the proxy of a ``ManagerFactory``, whose server process is started on the first call.
+
+    :param options: the benchmark settings
+    :return: the best time per operation in seconds, or None without the fork start method
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    manager_object()
+    return best_per_call(manager_object, options.count(HIT_NUMBER), options.repeat)
+
+
+@ManagerFactory
+def manager_object() -> dict:
+    """
+    Build the object of the manager server.
+
+    :return: the object
+    """
+    return {}
+
+
+def hot(func: Callable[[], Any], options: Options) -> float:
+    """
+    Time every thread repeatedly calling a function that was already called once.
+
+    :param func: the function
+    :param options: the benchmark settings
+    :return: the best time per call, in seconds
+    """
+    func()
+    calls = options.count(CONTENTION_CALLS) * 10
+
+    def target(index: int) -> None:
+        for _ in range(calls):
+            func()
+
+    timings = [run_threads(options.threads, target) for _ in range(options.repeat)]
+    return min(timings) / (options.threads * calls)
+
+
+for _metaclass in (Singleton, ProcessSingleton, ThreadSingleton, ShardedSingleton):
+
+    def _hot_metaclass(options: Options, metaclass: type = _metaclass) -> float:
+        calls = options.count(CONTENTION_CALLS) // 10 or 1
+        timings = [
+            bench_hot(metaclass, options.threads, CONTENTION_CLASSES, calls)
+            for _ in range(options.repeat)
+        ]
+        return min(timings) / (options.threads * CONTENTION_CLASSES * calls)
+
+    def _cold_metaclass(options: Options, metaclass: type = _metaclass) -> float:
+        classes = options.count(CONTENTION_CLASSES * 10)
+        timings = [
+            bench_cold(metaclass, options.threads, classes, 0) for _ in range(options.repeat)
+        ]
+        return min(timings) / (options.threads * classes)
+
+    BENCHMARKS[f"contention/hot {_metaclass.__name__}"] = _hot_metaclass
+    BENCHMARKS[f"contention/cold {_metaclass.__name__}"] = _cold_metaclass
+
+for _name, _create in (
+    ("GlobalFactory", lambda: GlobalFactory(object)),
+    ("ThreadFactory", lambda: ThreadFactory(object)),
+    ("ShardedFactory", lambda: ShardedFactory(object)),
+    ("PooledFactory size=4", lambda: checkout(PooledFactory(object, size=4))),
+):
+    BENCHMARKS[f"contention/hot {_name}"] = lambda options, create=_create: hot(create(), options)
+
+
+def greenthread_benchmarks(
+    environment: str,
+    spawn: Callable[..., Any],
+    metaclass: type,
+    factory_class: type,
+) -> None:
+    """
+    Register the benchmarks of a greenthread environment.
+
+    :param environment: 'eventlet' or 'gevent', which must be importable for the benchmarks to run
+    :param spawn: function running a function in a new greenthread, and returning its result
+    :param metaclass: the singleton metaclass of the environment
+    :param factory_class: the factory class of the environment
+    """
+    greenthread_classes = (
+        (metaclass.__name__, lambda: new_class(metaclass)),
+        (factory_class.__name__, lambda: factory_class(object)),
+        (f"GreenthreadSingleton ({environment})", lambda: new_class(GreenthreadSingleton)),
+        (f"GreenthreadFactory ({environment})", lambda: GreenthreadFactory(object)),
+    )
+
+    def run(options: Options, benchmark_func: Callable[[Options], float]) -> Optional[float]:
+        try:
+            __import__(environment)
+        except ImportError:
+            return None
+        redetect_greenthread_environment(environment)
+        try:
+            return benchmark_func(options)
+        finally:
+            redetect_greenthread_environment()
+
+    def hit(options: Options, create: Callable[[], Callable[[], Any]]) -> float:
+        func = create()
+
+        def in_greenthread() -> float:
+            func()
+            return best_per_call(func, options.count(HIT_NUMBER), options.repeat)
+
+        return spawn(in_greenthread)
+
+    def scope(options: Options, create: Optional[Callable[[], Callable[[], Any]]]) -> float:
+        func = (lambda: None) if create is None else create()
+        number = options.count(GREENTHREAD_NUMBER)
+        timings = []
+        for _ in range(options.repeat):
+            start = time.perf_counter()
+            for _ in range(number):  # noqa: WPS440
+                spawn(func)
+            timings.append(time.perf_counter() - start)
+        return min(timings) / number
+
+    for name, create in greenthread_classes:
+        BENCHMARKS[f"greenthread/hit {name}"] = functools.partial(
+            run,
+            benchmark_func=functools.partial(hit, create=create),
+        )
+        BENCHMARKS[f"greenthread/scope {name}"] = functools.partial(
+            run,
+            benchmark_func=functools.partial(scope, create=create),
+        )
+    BENCHMARKS[f"greenthread/scope {environment} spawn only"] = functools.partial(
+        run,
+        benchmark_func=functools.partial(scope, create=None),
+    )
+
+
+def spawn_eventlet(func: Callable[[], Any]) -> Any:
+    """
+    Run a function in a new eventlet greenthread.
+
+    :param func: the function
+    :return: its result
+    """
+    import eventlet  # noqa: WPS433
+
+    return eventlet.spawn(func).wait()
+
+
+def spawn_gevent(func: Callable[[], Any]) -> Any:
+    """
+    Run a function in a new gevent greenlet.
+
+    :param func: the function
+    :return: its result
+    """
+    import gevent  # noqa: WPS433
+
+    return gevent.spawn(func).get()
+
+
+greenthread_benchmarks("eventlet", spawn_eventlet, EventletSingleton, EventletFactory)
+greenthread_benchmarks("gevent", spawn_gevent, GeventSingleton, GeventFactory)
+
+
+@GlobalFactory
+def global_object() -> object:
+    """
+    Build a global object.
+
+    :return: the object
+    """
+    return object()
+
+
+lazy_module = Lazy("json")
+
+
+class BenchSharedModule(SharedModule):
+    """Shared module used for the benchmarks."""
+
+    globals = globals()  # noqa: A003
+
+
+def shared_module_access(mode: str, attribute: str, cached: bool = True) -> Callable:
+    """
+    Make a benchmark accessing an attribute of a shared module.
+
+    :param mode: 'actual' or 'mock'
+    :param attribute: the name of the attribute
+    :param cached: whether the attribute stays resolved, or is resolved on every access
+    :return: the benchmark
+    """
+
+    def run(options: Options) -> float:
+        module = BenchSharedModule()
+        if mode == "mock":
+            module.setup_mock()
+        if cached:
+            access = functools.partial(getattr, module, attribute)
+        else:
+
+            def access() -> Any:  # noqa: WPS430
+                module.invalidate_cache()
+                return getattr(module, attribute)
+
+        access()
+        return best_per_call(access, options.count(HIT_NUMBER), options.repeat)
+
+    return run
+
+
+for _mode in ("actual", "mock"):
+    for _attribute in ("global_object", "lazy_module"):
+        BENCHMARKS[f"shared_module/{_mode} {_attribute}"] = shared_module_access(_mode, _attribute)
+    BENCHMARKS[f"shared_module/{_mode} global_object uncached"] = shared_module_access(
+        _mode,
+        "global_object",
+        cached=False,
+    )
+
+
+def compare(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    threshold: float,
+) -> List[str]:
+    """
+    Compare results against a baseline.
+
+    :param results: the results, in nanoseconds per operation, by benchmark name
+    :param baseline: the baseline results
+    :param threshold: the relative slowdown above which a benchmark is a regression, e.g. 0.2
+    :return: the names of the regressed benchmarks
+    """
+    return [
+        name
+        for name, result in results.items()
+        if name in baseline and result > baseline[name] * (1 + threshold)
+    ]
+
+
+def main() -> None:
+    """Run the benchmarks and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--filter", action="append", help="only run benchmarks containing this")
+    parser.add_argument("--quick", action="store_true", help="run 10 times fewer operations")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--save", metavar="PATH", help="save the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare the results to a baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="regression threshold")
+    args = parser.parse_args()
+
+    options = Options(scale=0.1 if args.quick else 1, repeat=args.repeat, threads=args.threads)
+    baseline: Dict[str, float] = {}
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    results: Dict[str, float] = {}
+    for name, func in BENCHMARKS.items():
+        if args.filter and not any(pattern in name for pattern in args.filter):
+            continue
+        seconds = func(options)
+        if seconds is None:
+            print(f"{name:>50}: skipped")  # noqa: WPS421
+            continue
+        results[name] = seconds * 1e9
+        line = f"{name:>50}: {results[name]:9.1f} ns/op"
+        if name in baseline:
+            change = results[name] / baseline[name] - 1
+            flag = "  REGRESSION" if name in compare(results, baseline, args.threshold) else ""
+            line = f"{line}  {change:+7.1%} vs {baseline[name]:9.1f}{flag}"
+        print(line)  # noqa: WPS421
+
+    if args.save:
+        with open(args.save, "w") as results_file:
+            json.dump({"python": platform.python_version(), "results": results}, results_file)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}:")  # noqa: WPS421
+        for name in regressions:
+            print(f"  {name}")  # noqa: WPS421
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
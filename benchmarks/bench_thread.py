@@ -0,0 +1,55 @@
+"""
+Microbenchmark for the ``ThreadSingleton`` hit path.
+
+Compares the current metaclass against the previous implementation, which built ``str(id(cls))``
+and probed a shared :class:`threading.local` with ``hasattr`` and ``getattr`` on every call.
+
+Usage::
+
+    poetry run python benchmarks/bench_thread.py
+"""
+import threading
+import timeit
+from typing import Any, Optional
+
+from singletons import ThreadSingleton
+
+NUMBER = 1000000
+
+
+class LegacyThreadSingleton(type):
+    """The previous ``ThreadSingleton``."""
+
+    __local: Optional[threading.local] = None
+    __lock = threading.Lock()
+
+    def __call__(cls, *args: Any, **kwargs: Any) -> Any:
+        cls_id = str(id(cls))
+        if LegacyThreadSingleton.__local is None:
+            with LegacyThreadSingleton.__lock:
+                if LegacyThreadSingleton.__local is None:
+                    LegacyThreadSingleton.__local = threading.local()
+        if not hasattr(LegacyThreadSingleton.__local, cls_id):
+            instance = super().__call__(*args, **kwargs)
+            setattr(LegacyThreadSingleton.__local, cls_id, instance)
+        return getattr(LegacyThreadSingleton.__local, cls_id)
+
+
+class MyLegacyThreadSingleton(metaclass=LegacyThreadSingleton):
+    """Singleton used for the benchmark, with the previous implementation."""
+
+
+class MyThreadSingleton(metaclass=ThreadSingleton):
+    """Singleton used for the benchmark."""
+
+
+def main() -> None:
+    """Run the benchmark and print the results."""
+    for name, cls in (("legacy", MyLegacyThreadSingleton), ("current", MyThreadSingleton)):
+        cls()
+        seconds = min(timeit.repeat(cls, number=NUMBER, repeat=5))
+        print(f"{name:>8}: {seconds / NUMBER * 1e9:6.1f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
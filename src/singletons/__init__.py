@@ -1,35 +1,199 @@
-from singletons.factory import (
-    EventletFactory,
-    GeventFactory,
-    GlobalFactory,
-    GreenthreadFactory,
-    ProcessFactory,
-    ThreadFactory,
-)
-from singletons.shared_module import SharedModule
-from singletons.singleton import (
-    EventletSingleton,
-    GeventSingleton,
-    GreenthreadSingleton,
-    ProcessSingleton,
-    Singleton,
-    ThreadSingleton,
+"""
+Singleton metaclasses and factories.
+
+Names are imported from their submodule on first access, so that ``import singletons`` only loads
+what is used (e.g. :class:`SharedModule` and its dependency on :mod:`unittest.mock` are only loaded
+by tests using it).
+"""
+import importlib
+import sys
+
+# not imported from typing, which takes longer to import than the rest of the package
+TYPE_CHECKING = False
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any, List  # noqa: WPS433, WPS440
+
+    from singletons.cross_process import ManagerFactory, SharedMemoryFactory  # noqa: F401
+    from singletons.factory import (  # noqa: F401
+        AsyncGlobalFactory,
+        AsyncProcessFactory,
+        ContextFactory,
+        EventletFactory,
+        ExecutorFactory,
+        GeventFactory,
+        GlobalFactory,
+        GreenthreadFactory,
+        ProcessFactory,
+        ShardedFactory,
+        ThreadFactory,
+        dependency_graph,
+        warm_up,
+    )
+    from singletons.lifecycle import (  # noqa: F401
+        adispose_instances,
+        dispose_instances,
+        dispose_instances_at_exit,
+        get_instances,
+        reset_instances,
+    )
+    from singletons.metrics import (  # noqa: F401
+        disable_metrics,
+        enable_metrics,
+        get_metrics,
+        reset_metrics,
+    )
+    from singletons.pool import PooledFactory  # noqa: F401
+    from singletons.report import memory_report  # noqa: F401
+    from singletons.shared_module import Lazy, SharedModule  # noqa: F401
+    from singletons.singleton import (  # noqa: F401
+        ContextSingleton,
+        EventletSingleton,
+        ExecutorScope,
+        ExecutorSingleton,
+        GeventSingleton,
+        GreenthreadSingleton,
+        ProcessSingleton,
+        ShardedSingleton,
+        Singleton,
+        ThreadSingleton,
+    )
+    from singletons.utils import (  # noqa: F401
+        detect_greenthread_environment,
+        redetect_greenthread_environment,
+    )
+
+_EXPORTS = {  # noqa: WPS407
+    "AsyncGlobalFactory": "singletons.factory",
+    "AsyncProcessFactory": "singletons.factory",
+    "ContextFactory": "singletons.factory",
+    "EventletFactory": "singletons.factory",
+    "ExecutorFactory": "singletons.factory",
+    "GeventFactory": "singletons.factory",
+    "GlobalFactory": "singletons.factory",
+    "GreenthreadFactory": "singletons.factory",
+    "ProcessFactory": "singletons.factory",
+    "ThreadFactory": "singletons.factory",
+    "ShardedFactory": "singletons.factory",
+    "PooledFactory": "singletons.pool",
+    "ManagerFactory": "singletons.cross_process",
+    "SharedMemoryFactory": "singletons.cross_process",
+    "ContextSingleton": "singletons.singleton",
+    "EventletSingleton": "singletons.singleton",
+    "ExecutorScope": "singletons.singleton",
+    "ExecutorSingleton": "singletons.singleton",
+    "GeventSingleton": "singletons.singleton",
+    "GreenthreadSingleton": "singletons.singleton",
+    "ProcessSingleton": "singletons.singleton",
+    "ShardedSingleton": "singletons.singleton",
+    "Singleton": "singletons.singleton",
+    "ThreadSingleton": "singletons.singleton",
+    "detect_greenthread_environment": "singletons.utils",
+    "redetect_greenthread_environment": "singletons.utils",
+    "adispose_instances": "singletons.lifecycle",
+    "dispose_instances": "singletons.lifecycle",
+    "dispose_instances_at_exit": "singletons.lifecycle",
+    "get_instances": "singletons.lifecycle",
+    "reset_instances": "singletons.lifecycle",
+    "warm_up": "singletons.factory",
+    "dependency_graph": "singletons.factory",
+    "disable_metrics": "singletons.metrics",
+    "enable_metrics": "singletons.metrics",
+    "get_metrics": "singletons.metrics",
+    "reset_metrics": "singletons.metrics",
+    "memory_report": "singletons.report",
+    "Lazy": "singletons.shared_module",
+    "SharedModule": "singletons.shared_module",
+}
+_SUBMODULES = frozenset(
+    (
+        "cross_process",
+        "exceptions",
+        "factory",
+        "lifecycle",
+        "metrics",
+        "pool",
+        "report",
+        "shared_module",
+        "singleton",
+        "utils",
+    ),
 )
-from singletons.utils import detect_greenthread_environment
 
+# a literal list rather than computed from _EXPORTS, which type checkers can't evaluate
 __all__ = [
+    "AsyncGlobalFactory",
+    "AsyncProcessFactory",
+    "ContextFactory",
     "EventletFactory",
+    "ExecutorFactory",
     "GeventFactory",
     "GlobalFactory",
     "GreenthreadFactory",
     "ProcessFactory",
     "ThreadFactory",
+    "ShardedFactory",
+    "PooledFactory",
+    "ManagerFactory",
+    "SharedMemoryFactory",
+    "ContextSingleton",
     "EventletSingleton",
+    "ExecutorScope",
+    "ExecutorSingleton",
     "GeventSingleton",
     "GreenthreadSingleton",
     "ProcessSingleton",
+    "ShardedSingleton",
     "Singleton",
     "ThreadSingleton",
     "detect_greenthread_environment",
+    "redetect_greenthread_environment",
+    "adispose_instances",
+    "dispose_instances",
+    "dispose_instances_at_exit",
+    "get_instances",
+    "reset_instances",
+    "warm_up",
+    "dependency_graph",
+    "disable_metrics",
+    "enable_metrics",
+    "get_metrics",
+    "reset_metrics",
+    "memory_report",
+    "Lazy",
     "SharedModule",
 ]
+
+
+def __getattr__(name: str) -> "Any":  # noqa: WPS413
+    """
+    Import an exported name, or a submodule, on its first access.
+
+    :param name: the name
+    :raises AttributeError: if the package doesn't export the name
+    :return: the exported object
+    """
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    try:
+        module_name = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    exported = getattr(importlib.import_module(module_name), name)
+    # later accesses find it directly
+    globals()[name] = exported
+    return exported
+
+
+def __dir__() -> "List[str]":  # noqa: WPS413
+    """
+    List the names of the package, including the ones not imported yet.
+
+    :return: the names
+    """
+    return sorted(set(globals()) | set(__all__))
+
+
+if sys.version_info < (3, 7):  # pragma: no cover
+    # no module __getattr__ (PEP 562)
+    for _name in __all__:
+        __getattr__(_name)
@@ -0,0 +1,323 @@
+"""
+Factories whose object is shared by every process, instead of copied into each of them.
+
+Both are meant for pre-fork servers: build the objects in the parent process before forking the
+workers (e.g. with :func:`~singletons.warm_up`), and every worker uses the same object.
+"""
+import atexit
+import functools
+import itertools
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Sequence, Tuple, Type, cast
+
+from singletons.utils import register_after_fork
+
+if TYPE_CHECKING:  # pragma: no cover
+    from multiprocessing.managers import BaseManager  # noqa: WPS433
+
+_typeids = itertools.count()
+_server_objects: Dict[str, Any] = {}  # in the manager server process
+_server_lock = threading.Lock()
+
+
+def _get_server_object(typeid: str, func: Callable[[], Any]) -> Any:
+    """
+    Get the object of a factory in the manager server process, building it on first call.
+
+    :param typeid: the type id of the factory
+    :param func: the decorated function
+    :return: the object
+    """
+    with _server_lock:
+        try:
+            return _server_objects[typeid]
+        except KeyError:
+            shared = func()
+            _server_objects[typeid] = shared
+            return shared
+
+
+def _manager_class() -> "Type[BaseManager]":
+    """
+    Get the manager class, whose server process holds the objects of every ManagerFactory.
+
+    :return: the manager class
+    """
+    global _manager_cls  # noqa: WPS420
+    if _manager_cls is None:
+        from multiprocessing.managers import BaseManager  # noqa: WPS433, WPS440
+
+        class _SharedObjectsManager(BaseManager):  # noqa: WPS431
+            """Manager of the objects of every ManagerFactory."""
+
+        _manager_cls = _SharedObjectsManager  # noqa: WPS122, WPS442
+    return _manager_cls
+
+
+_manager_cls: Optional["Type[BaseManager]"] = None  # noqa: WPS122
+
+
+class _ManagerConnection:
+    """Connection of the current process to the manager server process."""
+
+    def __init__(self) -> None:
+        self.manager: Optional[Any] = None
+        self.client: Optional[Any] = None
+        self.lock = threading.Lock()
+        register_after_fork(self)
+
+    def get_client(self) -> Any:
+        """
+        Get a manager connected to the server, starting the server on first call.
+
+        :return: the connected manager
+        """
+        with self.lock:
+            if self.client is None:
+                if self.manager is None:
+                    import multiprocessing  # noqa: WPS433
+
+                    # the server must inherit the decorated functions, which can't be pickled
+                    manager = _manager_class()(ctx=multiprocessing.get_context("fork"))
+                    manager.start()
+                    self.manager = manager
+                    self.client = manager
+                else:
+                    # a forked child, which can't share the connections of its parent
+                    client = _manager_class()(
+                        address=self.manager.address,
+                        authkey=self.manager._authkey,  # noqa: WPS437
+                    )
+                    client.connect()
+                    self.client = client
+            return self.client
+
+    def _after_fork_in_child(self) -> None:
+        """Drop the connection inherited from the parent process."""
+        self.lock = threading.Lock()
+        self.client = None
+
+
+_connection = _ManagerConnection()
+
+
+class _CrossProcessFactoryBase:
+    """Base of the cross-process factories, which take no arguments and have no dependencies."""
+
+    dependencies: Tuple[Any, ...] = ()
+
+    def __new__(cls, func: Optional[Callable[[], Any]] = None, **options: Any) -> Any:
+        if func is None:
+            # used as ``@Factory(**options)``
+            return functools.partial(cls, **options)
+        return super().__new__(cls)
+
+    def _takes_no_arguments(self) -> bool:
+        """
+        Tell whether the factory can be called without arguments, to be warmed up or depended on.
+
+        :return: True
+        """
+        return True
+
+    def _find_path_to(self, target: Any) -> None:
+        """
+        Find a path of dependencies to another factory, to detect cycles.
+
+        :param target: the other factory
+        :return: None, as the factory has no dependencies
+        """
+        return None
+
+
+class ManagerFactory(_CrossProcessFactoryBase):
+    """
+    Decorator to create a factory whose object lives in a manager server process.
+
+    The object is built once, in a server process started (by forking) on the first call of any
+    manager factory, and every process gets a :mod:`multiprocessing.managers` proxy to it. Calls
+    of the proxy's methods are sent to the server, so the object must only be used through its
+    public methods (or through ``proxytype``, e.g. :class:`multiprocessing.managers.DictProxy` for
+    a dict). Forked processes connect to the server on their first call::
+
+        @ManagerFactory
+        def rate_limiter():
+            return RateLimiter(per_second=100)
+
+        # in the parent process, before forking the workers
+        singletons.warm_up(rate_limiter)
+
+    Manager factories must be defined before the server is started, and require the ``fork`` start
+    method (Unix).
+    """
+
+    def __init__(
+        self,
+        func: Callable[[], Any],
+        proxytype: Optional[type] = None,
+        exposed: Optional[Sequence[str]] = None,
+    ) -> None:
+        if _connection.manager is not None:
+            raise RuntimeError("ManagerFactory objects must be defined before the first call")
+        self._typeid = f"{getattr(func, '__qualname__', 'factory')}_{next(_typeids)}"
+        _manager_class().register(
+            self._typeid,
+            callable=functools.partial(_get_server_object, self._typeid, func),
+            proxytype=proxytype,
+            exposed=exposed,
+        )
+        self._proxy: Optional[Any] = None
+        self._lock = threading.Lock()
+        register_after_fork(self)
+        functools.update_wrapper(self, func)
+
+    def __call__(self) -> Any:
+        proxy = self._proxy
+        if proxy is None:
+            proxy = self._connect()
+        return proxy
+
+    def _connect(self) -> Any:
+        """
+        Get a proxy to the object, building it in the server if needed.
+
+        :return: the proxy
+        """
+        client = _connection.get_client()
+        with self._lock:
+            if self._proxy is None:
+                self._proxy = getattr(client, self._typeid)()
+            return self._proxy
+
+    def _after_fork_in_child(self) -> None:
+        """Drop the proxy inherited from the parent process, whose connection can't be shared."""
+        self._lock = threading.Lock()
+        self._proxy = None
+
+
+class SharedMemoryFactory(_CrossProcessFactoryBase):
+    """
+    Decorator to create a factory whose bytes-like object is copied into shared memory.
+
+    The object returned by the decorated function (``bytes``, ``bytearray``, ``array.array``, a
+    NumPy array...) is copied once into a :class:`multiprocessing.shared_memory.SharedMemory`
+    block, and every call returns a read-only :class:`memoryview` of the block. Forked processes
+    inherit the mapping of the block, so a large lookup table built in the parent process isn't
+    duplicated into each worker::
+
+        @SharedMemoryFactory
+        def embeddings():
+            return numpy.load("embeddings.npy")
+
+        table = numpy.frombuffer(embeddings(), dtype=numpy.float32)
+
+    Unrelated processes can share a block by ``name``: the first one builds it, and the other ones
+    attach to it (its size may then be rounded up to a page). The block is unlinked when the
+    process that created it exits. Requires Python 3.8+.
+    """
+
+    def __init__(self, func: Callable[[], Any], name: Optional[str] = None) -> None:
+        self._func = func
+        self._name = name
+        self._shm: Optional[Any] = None
+        self._view: Optional[memoryview] = None
+        self._lock = threading.Lock()
+        functools.update_wrapper(self, func)
+
+    def __call__(self) -> memoryview:
+        view = self._view
+        if view is None:
+            view = self._build()
+        return view
+
+    @property
+    def name(self) -> Optional[str]:
+        """
+        Get the name of the shared memory block.
+
+        :return: the name, or None if the block wasn't built or attached yet
+        """
+        shm = self._shm
+        return None if shm is None else shm.name
+
+    def _build(self) -> memoryview:
+        """
+        Attach to the named block, or build it.
+
+        :return: a read-only view of the block
+        """
+        with self._lock:
+            if self._view is None:
+                shm, nbytes, creator = None, None, None
+                if self._name is not None:
+                    shm = _attach(self._name)
+                if shm is None:
+                    shm, nbytes, creator = self._create()
+                buf = shm.buf[:nbytes]
+                self._shm = shm
+                self._view = buf.toreadonly()
+                atexit.register(_close, shm, (self._view, buf), creator)
+            return self._view
+
+    def _create(self) -> Tuple[Any, Optional[int], Optional[int]]:
+        """
+        Build the object and copy it into a new shared memory block.
+
+        :return: the block, the size of the object, and the pid of the process that created the
+            block (None if it was created concurrently by another process)
+        """
+        from multiprocessing import shared_memory  # noqa: WPS433
+
+        data = memoryview(self._func()).cast("B")
+        while True:  # noqa: WPS457
+            try:
+                shm = shared_memory.SharedMemory(
+                    name=self._name, create=True, size=max(data.nbytes, 1),
+                )
+            except FileExistsError:
+                # built concurrently by another process
+                attached = None if self._name is None else _attach(self._name)
+                if attached is not None:
+                    return attached, None, None
+                # and unlinked since, so create it again
+                continue
+            cast(memoryview, shm.buf)[: data.nbytes] = data
+            return shm, data.nbytes, os.getpid()
+
+
+def _attach(name: str) -> Optional[Any]:
+    """
+    Attach to an existing shared memory block, without unlinking it when this process exits.
+
+    :param name: the name of the block
+    :return: the block, or None if it doesn't exist
+    """
+    from multiprocessing import resource_tracker, shared_memory  # noqa: WPS433
+
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return None
+    # the resource tracker would unlink the block of its creator when this process exits
+    resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore  # noqa: WPS437
+    return shm
+
+
+def _close(shm: Any, views: Tuple[memoryview, ...], creator: Optional[int]) -> None:
+    """
+    Close a shared memory block at exit, and unlink it in the process that created it.
+
+    :param shm: the block
+    :param views: the views of the block held by its factory
+    :param creator: the pid of the process that created the block, if any
+    """
+    try:
+        for view in views:
+            view.release()
+        shm.close()
+    except BufferError:
+        # still exported, e.g. by a NumPy array: the mapping is released with the process
+        pass  # noqa: WPS420
+    if creator == os.getpid():
+        shm.unlink()
@@ -1,2 +1,10 @@
 class NoGreenthreadEnvironmentWarning(UserWarning):
     """Raised when a Greenthread scope is used but no greenthread environment is detected."""
+
+
+class DependencyCycleError(ValueError):
+    """Raised when factory dependencies would form a cycle."""
+
+
+class PoolTimeoutError(TimeoutError):
+    """Raised when no object of a pool was returned in time to be lent."""
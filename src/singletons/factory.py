@@ -1,14 +1,33 @@
 import functools
-from typing import Any, Callable
+import os
+import weakref
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type, cast
 
+from singletons.exceptions import DependencyCycleError
 from singletons.singleton import (
+    ContextSingleton,
     EventletSingleton,
+    ExecutorSingleton,
     GeventSingleton,
     GreenthreadSingleton,
     ProcessSingleton,
+    ShardedSingleton,
     Singleton,
     ThreadSingleton,
+    _SingletonBase,
 )
+from singletons.utils import (
+    FORK_HOOKS,
+    forget_creation,
+    record_creation,
+    register_after_fork,
+)
+
+
+_UNSET = object()
+# GlobalFactory and ProcessFactory objects, in order of definition
+_warmable: "weakref.WeakKeyDictionary[_CachingFactoryBase, None]" = weakref.WeakKeyDictionary()
 
 
 class _FactoryBase:
@@ -16,28 +35,243 @@ class _FactoryBase:
     Base class for Factory decorators.
 
     Subclasses must set ``singleton_metaclass`` as a class attribute.
+
+    If the decorated function takes arguments, one object is created per (hashable) combination of
+    arguments, in each scope. These objects can be bounded by passing the ``maxsize``, ``ttl`` and
+    ``on_evict`` options of keyed singletons (see :class:`~singletons.Singleton`) to the decorator::
+
+        @GlobalFactory(maxsize=100, on_evict=lambda client: client.close())
+        def tenant_client(tenant):
+            return Client(tenant)
+
+    The bounds also apply to the object of calls without arguments, e.g. ``ttl`` to build it again
+    periodically.
+
+    Factories of thread, greenthread and executor scoped metaclasses also take the ``on_scope_exit``
+    option (see :class:`~singletons.ThreadSingleton`), called with the objects of a scope when its
+    thread, greenthread or executor exits::
+
+        @ThreadFactory(on_scope_exit=lambda session: session.close())
+        def http_session():
+            return requests.Session()
+
+    Factories can declare the factories they depend on, which are built before the decorated
+    function is called, and which :func:`warm_up` builds first, in parallel where possible::
+
+        @GlobalFactory(depends_on=[redis_pool])
+        def celery_app():
+            ...
     """
 
-    def __init__(self, func: Callable[[], Any]) -> None:
+    def __new__(cls, func: Optional[Callable[..., Any]] = None, **options: Any) -> Any:
+        if func is None:
+            # used as ``@Factory(**options)``
+            return functools.partial(cls, **options)
+        return super().__new__(cls)
+
+    def __init__(
+        self, func: Callable[..., Any], depends_on: Iterable["_FactoryBase"] = (), **options: Any,
+    ) -> None:
         if not hasattr(type(self), "singleton_metaclass"):  # noqa: WPS421
             raise NotImplementedError(
                 "_FactoryBase subclasses must define the `singleton_metaclass` attribute",
             )  # pragma: no cover
+        metaclass = type(self).singleton_metaclass  # type: ignore
+        factory = self
+
+        class _Singleton(metaclass=metaclass, **options):  # type: ignore
+            """Internal singleton class, whose "instances" are the objects returned by ``func``."""
 
-        class _Singleton(metaclass=type(self).singleton_metaclass):  # type: ignore
-            """Internal singleton class."""
+            def __new__(cls) -> Any:  # noqa: WPS442
+                factory._build_dependencies()  # noqa: WPS437
+                return func()
 
-            def __init__(self) -> None:  # noqa: WPS442
-                self.my_obj = func()
+        class _KeyedSingleton(metaclass=metaclass, keyed=True, **options):  # type: ignore
+            """Internal singleton class for calls with arguments."""
 
-        self._singleton_cls = _Singleton
+            def __new__(cls, *args: Any, **kwargs: Any) -> Any:  # noqa: WPS442
+                factory._build_dependencies()  # noqa: WPS437
+                return func(*args, **kwargs)
+
+        # name the internal classes after the function, for metrics and reports
+        qualname = getattr(func, "__qualname__", _Singleton.__qualname__)
+        _Singleton.__qualname__ = qualname
+        _KeyedSingleton.__qualname__ = f"{qualname}[keyed]"
+        _Singleton.__module__ = _KeyedSingleton.__module__ = getattr(
+            func, "__module__", __name__,
+        )
+        self._singleton_cls = cast(_SingletonBase, _Singleton)
+        self._keyed_singleton_cls = cast(_SingletonBase, _KeyedSingleton)
+        self.dependencies: Tuple[_FactoryBase, ...] = ()
         functools.update_wrapper(self, func)
+        self.add_dependencies(*depends_on)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        if args or kwargs:
+            return self._keyed_singleton_cls(*args, **kwargs)
+        return self._singleton_cls()
+
+    def add_dependencies(self, *factories: "_FactoryBase") -> None:
+        """
+        Declare factories that this factory depends on, e.g. ones defined after it.
+
+        :param factories: the factories this one depends on
+        :raises TypeError: if a factory can't be called without arguments
+        :raises DependencyCycleError: if a factory depends on this one, directly or not
+        """
+        for dependency in factories:
+            if not dependency._takes_no_arguments():  # noqa: WPS437
+                raise TypeError(f"{dependency!r} can't be built without arguments")
+            cycle = dependency._find_path_to(self)  # noqa: WPS437
+            if cycle is not None:
+                names = " -> ".join(each.__name__ for each in (self, *cycle))  # type: ignore
+                raise DependencyCycleError(f"Factory dependency cycle: {names}")
+        self.dependencies += tuple(
+            dependency for dependency in factories if dependency not in self.dependencies
+        )
+
+    def _find_path_to(self, target: "_FactoryBase") -> Optional[List["_FactoryBase"]]:
+        """
+        Find a path of dependencies from this factory to ``target``.
+
+        :param target: the factory to find
+        :return: the factories from this one to ``target``, or None if it can't be reached
+        """
+        if self is target:
+            return [self]
+        for dependency in self.dependencies:
+            path = dependency._find_path_to(target)  # noqa: WPS437
+            if path is not None:
+                return [self, *path]
+        return None
+
+    def _build_dependencies(self) -> None:
+        """Build the factories that this factory depends on."""
+        for dependency in self.dependencies:
+            dependency()
 
-    def __call__(self) -> Any:
-        return self._singleton_cls().my_obj
+    def _takes_no_arguments(self) -> bool:
+        """
+        Tell whether the decorated function can be called without arguments.
 
+        :return: True if it can be called without arguments
+        """
+        import inspect  # noqa: WPS433
 
-class GlobalFactory(_FactoryBase):
+        try:
+            inspect.signature(self.__wrapped__).bind()  # type: ignore
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    def _get_instances(self, current_scope: bool = False) -> List[Any]:
+        """
+        Return the objects created by the factory.
+
+        :arg current_scope: only return the objects of the current scope
+        :return: the objects
+        """
+        return self._singleton_cls._get_instances(  # noqa: WPS437
+            current_scope,
+        ) + self._keyed_singleton_cls._get_instances(current_scope)  # noqa: WPS437
+
+    def _reset_instances(self, current_scope: bool = False) -> List[Any]:
+        """
+        Drop the objects created by the factory, so that they are created again when next called.
+
+        :arg current_scope: only drop the objects of the current scope
+        :return: the dropped objects
+        """
+        return self._singleton_cls._reset_instances(  # noqa: WPS437
+            current_scope,
+        ) + self._keyed_singleton_cls._reset_instances(current_scope)  # noqa: WPS437
+
+
+class _CachingFactoryBase(_FactoryBase):
+    """
+    Base class for Factory decorators whose object is shared by every caller in the process.
+
+    Once built, the object is cached on the factory, so that later calls don't go through the
+    singleton metaclass. The factory of a function without parameters is an instance of a variant
+    of its class, whose ``__call__`` doesn't take (and pack) any arguments either.
+    """
+
+    def __new__(cls, func: Optional[Callable[..., Any]] = None, **options: Any) -> Any:
+        if func is not None and cls.__call__ is _CachingFactoryBase.__call__:
+            if _has_no_parameters(func):
+                cls = _without_arguments(cls)  # noqa: WPS442
+        return super().__new__(cls, func, **options)
+
+    def __init__(self, func: Callable[..., Any], **options: Any) -> None:
+        super().__init__(func, **options)
+        self._obj: Any = _UNSET
+        # a bounded object can be evicted, so it is looked up on every call
+        self._cache_obj = self._singleton_cls._multiton_factory is None
+        self._singleton_cls._add_reset_callback(self._forget)  # noqa: WPS437
+        _warmable[self] = None
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        if args or kwargs:
+            return self._keyed_singleton_cls(*args, **kwargs)
+        return self._call_without_arguments()
+
+    def _call_without_arguments(self) -> Any:
+        """
+        Get the object, building it on the first call.
+
+        :return: the object
+        """
+        obj = self._obj
+        if obj is _UNSET:
+            obj = self._singleton_cls()
+            if self._cache_obj:
+                self._obj = obj
+        return obj
+
+    def _forget(self) -> None:
+        """Drop the cached object."""
+        self._obj = _UNSET
+
+
+def _has_no_parameters(func: Callable[..., Any]) -> bool:
+    """
+    Tell whether a function doesn't take any parameters, so that it is always called without.
+
+    :param func: the function
+    :return: True if its signature is known and empty
+    """
+    import inspect  # noqa: WPS433
+
+    try:
+        return not inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _without_arguments(cls: Type[_CachingFactoryBase]) -> Type[_CachingFactoryBase]:
+    """
+    Get the variant of a caching factory class for functions without parameters.
+
+    :param cls: the factory class
+    :return: a subclass named after it, whose ``__call__`` takes no arguments
+    """
+    variant = _variants.get(cls)
+    if variant is None:
+        namespace = {
+            "__call__": _CachingFactoryBase._call_without_arguments,  # noqa: WPS437
+            "__doc__": cls.__doc__,
+            "__module__": cls.__module__,
+            "__qualname__": cls.__qualname__,
+        }
+        variant = _variants.setdefault(cls, type(cls.__name__, (cls,), namespace))
+    return variant
+
+
+# the variants of caching factory classes, for functions without parameters
+_variants: Dict[Type[_CachingFactoryBase], Type[_CachingFactoryBase]] = {}
+
+
+class GlobalFactory(_CachingFactoryBase):
     """
     Decorator to create a global singleton factory function.
 
@@ -53,11 +287,22 @@ class GlobalFactory(_FactoryBase):
     singleton_metaclass = Singleton
 
 
-class ProcessFactory(_FactoryBase):
+class ProcessFactory(_CachingFactoryBase):
     """Decorator to create a process singleton factory function."""
 
     singleton_metaclass = ProcessSingleton
 
+    def __init__(self, func: Callable[..., Any], **options: Any) -> None:
+        super().__init__(func, **options)
+        register_after_fork(self)
+
+    def _after_fork_in_child(self) -> None:
+        """Drop the object inherited from the parent process."""
+        self._forget()
+
+    if not FORK_HOOKS:  # pragma: no cover
+        __call__ = _FactoryBase.__call__
+
 
 class ThreadFactory(_FactoryBase):
     """Decorator to create a thread singleton factory function."""
@@ -65,6 +310,26 @@ class ThreadFactory(_FactoryBase):
     singleton_metaclass = ThreadSingleton
 
 
+class ExecutorFactory(_FactoryBase):
+    """
+    Decorator to create an executor singleton factory function.
+
+    The worker threads of an executor share one object (see :class:`~singletons.ExecutorSingleton`).
+    """
+
+    singleton_metaclass = ExecutorSingleton
+
+
+class ContextFactory(_FactoryBase):
+    """
+    Decorator to create a context singleton factory function.
+
+    Each asyncio task gets its own object (see :class:`~singletons.ContextSingleton`).
+    """
+
+    singleton_metaclass = ContextSingleton
+
+
 class GreenthreadFactory(_FactoryBase):
     """
     Decorator to create a greenthread singleton factory function.
@@ -85,3 +350,321 @@ class GeventFactory(_FactoryBase):
     """Decorator to create a gevent singleton factory function."""
 
     singleton_metaclass = GeventSingleton
+
+
+class ShardedFactory(_FactoryBase):
+    """
+    Decorator to create a sharded singleton factory function.
+
+    Each thread gets one of the ``shards`` objects of the process (see
+    :class:`~singletons.ShardedSingleton`), which are merged by ``aggregate()``::
+
+        @ShardedFactory(shards=8, aggregate=lambda counters: sum(counters, Counter()))
+        def hits():
+            return Counter()
+
+        hits()["/"] += 1
+        hits.aggregate()
+    """
+
+    singleton_metaclass = ShardedSingleton
+
+    def aggregate(self, *args: Any, **kwargs: Any) -> Any:
+        """
+        Merge the objects of the current process.
+
+        :param args: positional arguments of the decorated function, for keyed objects
+        :param kwargs: keyword arguments of the decorated function, for keyed objects
+        :return: the result of the ``aggregate`` option, or the list of objects
+        """
+        if args or kwargs:
+            return self._keyed_singleton_cls.aggregate(*args, **kwargs)  # type: ignore
+        return self._singleton_cls.aggregate()  # type: ignore
+
+
+def dependency_graph(*factories: _FactoryBase) -> Dict[_FactoryBase, Tuple[_FactoryBase, ...]]:
+    """
+    Resolve the dependencies of factories.
+
+    :param factories: the factories to resolve, or none for every GlobalFactory and ProcessFactory
+    :return: the direct dependencies of the factories and of their dependencies, recursively, in
+        an order where every factory comes after its dependencies
+    """
+    if not factories:
+        factories = tuple(factory for factory in list(_warmable) if factory._takes_no_arguments())
+    graph: Dict[_FactoryBase, Tuple[_FactoryBase, ...]] = {}
+
+    def add(factory: _FactoryBase) -> None:  # noqa: WPS430
+        if factory not in graph:
+            for dependency in factory.dependencies:
+                add(dependency)
+            graph[factory] = factory.dependencies
+
+    for factory in factories:
+        add(factory)
+    return graph
+
+
+def warm_up(*factories: _FactoryBase, max_workers: Optional[int] = None) -> None:
+    """
+    Build the objects of factories and of their dependencies up front, instead of on first call.
+
+    Without arguments, every :class:`GlobalFactory` and :class:`ProcessFactory` whose function can
+    be called without arguments is built. Call this in the parent process before forking workers,
+    so that global objects are shared copy-on-write instead of built by each worker, and in each
+    worker to take the construction of process objects off the first request::
+
+        # gunicorn.conf.py
+        def when_ready(server):
+            singletons.warm_up(*global_factories)
+
+        def post_fork(server, worker):
+            singletons.warm_up(max_workers=8)
+
+    With ``max_workers``, factories are built on a thread pool as soon as their declared
+    dependencies are built, so that the warm-up takes as long as the slowest chain of dependencies.
+    A factory whose dependency failed isn't built. Every other factory is built even if some of
+    them fail, and the first error is then raised.
+
+    :param factories: the factories to build, or none for every factory
+    :param max_workers: build the factories on a thread pool of this size
+    """
+    graph = dependency_graph(*factories)
+    if max_workers is None:
+        errors = _warm_up_serially(graph)
+    else:
+        errors = _warm_up_in_parallel(graph, max_workers)
+    if errors:
+        raise errors[0]
+
+
+def _warm_up_serially(graph: Dict[_FactoryBase, Tuple[_FactoryBase, ...]]) -> List[Exception]:
+    """
+    Build factories one after the other.
+
+    :param graph: the factories and their dependencies, dependencies first
+    :return: the errors
+    """
+    errors: List[Exception] = []
+    failed: Set[_FactoryBase] = set()
+    for factory, dependencies in graph.items():
+        if failed.intersection(dependencies):
+            failed.add(factory)
+            continue
+        error = _capture(factory)
+        if error is not None:
+            errors.append(error)
+            failed.add(factory)
+    return errors
+
+
+def _warm_up_in_parallel(
+    graph: Dict[_FactoryBase, Tuple[_FactoryBase, ...]], max_workers: int,
+) -> List[Exception]:
+    """
+    Build factories on a thread pool, each one as soon as its dependencies are built.
+
+    :param graph: the factories and their dependencies, dependencies first
+    :param max_workers: the size of the thread pool
+    :return: the errors
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait  # noqa: WPS433
+
+    pending = {factory: set(dependencies) for factory, dependencies in graph.items()}
+    dependents = _dependents(graph)
+    errors: List[Exception] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running: Dict[Any, _FactoryBase] = {}
+        while True:
+            _submit_ready(executor, pending, running)
+            if not running:
+                # the factories left depend on failed ones
+                return errors
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = _finish(running.pop(future), future.result(), pending, dependents)
+                if error is not None:
+                    errors.append(error)
+
+
+def _dependents(
+    graph: Dict[_FactoryBase, Tuple[_FactoryBase, ...]],
+) -> Dict[_FactoryBase, List[_FactoryBase]]:
+    """
+    Invert a dependency graph.
+
+    :param graph: the factories and their dependencies
+    :return: the factories depending on each factory
+    """
+    dependents: Dict[_FactoryBase, List[_FactoryBase]] = defaultdict(list)
+    for factory, dependencies in graph.items():
+        for dependency in dependencies:
+            dependents[dependency].append(factory)
+    return dependents
+
+
+def _submit_ready(
+    executor: Any, pending: Dict[_FactoryBase, Set[_FactoryBase]], running: Dict[Any, _FactoryBase],
+) -> None:
+    """
+    Submit the factories whose dependencies are all built, moving them from pending to running.
+
+    :param executor: the thread pool
+    :param pending: the factories left, and the dependencies that they are waiting for
+    :param running: the factories submitted, by future
+    """
+    for factory in [each for each, waiting in pending.items() if not waiting]:
+        del pending[factory]  # noqa: WPS420
+        running[executor.submit(_capture, factory)] = factory
+
+
+def _finish(
+    factory: _FactoryBase,
+    error: Optional[Exception],
+    pending: Dict[_FactoryBase, Set[_FactoryBase]],
+    dependents: Dict[_FactoryBase, List[_FactoryBase]],
+) -> Optional[Exception]:
+    """
+    Unblock the dependents of a factory once it is built.
+
+    :param factory: the factory
+    :param error: the error of the factory, in which case its dependents stay pending
+    :param pending: the factories left, and the dependencies that they are waiting for
+    :param dependents: the factories depending on each factory
+    :return: the error
+    """
+    if error is None:
+        for dependent in dependents[factory]:
+            pending[dependent].discard(factory)
+    return error
+
+
+def _capture(factory: Callable[[], Any]) -> Optional[Exception]:
+    """
+    Call a factory, returning any error instead of raising it.
+
+    :param factory: the factory to call
+    :return: the error, or None if the factory succeeded
+    """
+    try:
+        factory()
+    except Exception as exc:  # noqa: B902
+        return exc
+    return None
+
+
+class _AsyncFactoryBase:
+    """
+    Base class for async Factory decorators.
+
+    Calling the decorated function returns an awaitable. Concurrent first callers share a single
+    in-flight construction, and once it has succeeded the completed task is handed out directly, so
+    awaiting it returns the object without suspending. A failed construction is not cached; the next
+    call retries it.
+
+    The in-flight construction belongs to the event loop of its first caller.
+    """
+
+    def __init__(self, func: Callable[[], Awaitable[Any]]) -> None:
+        self._func = func
+        self._result: Optional[Awaitable[Any]] = None
+        self._task: Optional[Any] = None
+        functools.update_wrapper(self, func)
+
+    def __call__(self) -> Awaitable[Any]:
+        result = self._result
+        if result is not None:
+            return result
+        return self._construct()
+
+    def _construct(self) -> Awaitable[Any]:
+        """
+        Start the construction, or join the one already in flight.
+
+        :return: an awaitable for the object
+        """
+        import asyncio  # noqa: WPS433
+
+        task = self._task
+        if task is None:
+            task = asyncio.ensure_future(self._func())
+            task.add_done_callback(self._on_done)
+            self._task = task
+        # a cancelled caller must not cancel the construction shared with the other callers
+        return asyncio.shield(task)
+
+    def _on_done(self, task: Any) -> None:
+        """
+        Cache the completed construction, or forget it so that it is retried.
+
+        :arg task: the finished construction task
+        """
+        if self._task is task:  # pragma: no branch
+            self._task = None
+        if not task.cancelled() and task.exception() is None:
+            self._result = task
+            record_creation(self)
+
+    def _get_instances(self, current_scope: bool = False) -> List[Any]:
+        """
+        Return the object created by the factory.
+
+        :arg current_scope: ignored, the object is shared by every scope
+        :return: the object, if it was created
+        """
+        result = self._result
+        if result is None:
+            return []
+        return [result.result()]  # type: ignore
+
+    def _reset_instances(self, current_scope: bool = False) -> List[Any]:
+        """
+        Drop the object created by the factory, so that it is created again when next called.
+
+        :arg current_scope: ignored, the object is shared by every scope
+        :return: the dropped object, if it was created
+        """
+        instances = self._get_instances()
+        self._result = None
+        forget_creation(self)
+        return instances
+
+
+class AsyncGlobalFactory(_AsyncFactoryBase):
+    """
+    Decorator to create a global singleton factory from a coroutine function.
+
+    Example usage::
+
+        @AsyncGlobalFactory
+        async def http_session():
+            return aiohttp.ClientSession()
+
+        session = await http_session()
+    """
+
+
+class AsyncProcessFactory(_AsyncFactoryBase):
+    """
+    Decorator to create a process singleton factory from a coroutine function.
+
+    The object and any in-flight construction are dropped in the child process after a fork.
+    """
+
+    def __init__(self, func: Callable[[], Awaitable[Any]]) -> None:
+        super().__init__(func)
+        self._pid = os.getpid()
+        register_after_fork(self)
+
+    def _after_fork_in_child(self) -> None:
+        """Drop the object and construction inherited from the parent process."""
+        self._result = None
+        self._task = None
+        self._pid = os.getpid()
+
+    if not FORK_HOOKS:  # pragma: no cover
+
+        def __call__(self) -> Awaitable[Any]:
+            if self._pid != os.getpid():
+                self._after_fork_in_child()
+            return super().__call__()
@@ -0,0 +1,150 @@
+"""
+Inspect, reset and dispose the instances held by singleton classes and factories.
+
+Every function takes an ``owner``: a class using one of the singleton metaclasses, or a factory.
+Without an owner, they apply to every owner holding instances, in the order of their first
+creation.
+"""
+import atexit
+from typing import Any, List, Optional
+
+from singletons.utils import created_owners
+
+_dispose_at_exit_registered = False  # noqa: WPS122
+
+
+def _owners(owner: Optional[Any]) -> List[Any]:
+    """
+    Return the owners to apply a lifecycle function to.
+
+    :param owner: a singleton class or factory, or None for every owner
+    :raises TypeError: if ``owner`` is neither a singleton class nor a factory
+    :return: the owners, in order of creation
+    """
+    if owner is None:
+        return created_owners()
+    if not hasattr(owner, "_reset_instances"):  # noqa: WPS421
+        raise TypeError(f"{owner!r} is neither a singleton class nor a factory")
+    return [owner]
+
+
+def get_instances(owner: Optional[Any] = None, *, current_scope: bool = False) -> List[Any]:
+    """
+    Get the instances held by a singleton class or factory, or by all of them.
+
+    Keyed instances are included. For :class:`~singletons.ContextSingleton`, only the instances of
+    the current context are visible.
+
+    :param owner: the singleton class or factory, or None for every owner
+    :param current_scope: only get the instances of the current scope (thread, greenthread...)
+    :return: the instances, in order of creation of their owners
+    """
+    instances = []
+    for each_owner in _owners(owner):
+        instances.extend(each_owner._get_instances(current_scope))  # noqa: WPS437
+    return instances
+
+
+def reset_instances(owner: Optional[Any] = None, *, current_scope: bool = False) -> List[Any]:
+    """
+    Forget the instances held by a singleton class or factory, or by all of them.
+
+    The instances are constructed again when next accessed. They are not closed, see
+    :func:`dispose_instances` for that. Resetting a :class:`~singletons.ContextSingleton` forgets
+    its instances in every context, even with ``current_scope``.
+
+    :param owner: the singleton class or factory, or None for every owner
+    :param current_scope: only forget the instances of the current scope (thread, greenthread...)
+    :return: the forgotten instances, in order of creation of their owners
+    """
+    instances = []
+    for each_owner in _owners(owner):
+        instances.extend(each_owner._reset_instances(current_scope))  # noqa: WPS437
+    return instances
+
+
+def dispose_instances(owner: Optional[Any] = None, *, current_scope: bool = False) -> None:
+    """
+    Forget the instances held by a singleton class or factory, or by all of them, and close them.
+
+    Instances are closed in reverse order of creation of their owners, so that an instance is
+    closed before the instances it was constructed with. Each instance is closed once, with its
+    ``close()`` method if it has one, else by running its ``aclose()`` coroutine in a new event loop.
+    Every instance is closed even if some of them fail, and the first error is then raised.
+
+    :param owner: the singleton class or factory, or None for every owner
+    :param current_scope: only dispose the instances of the current scope (thread, greenthread...)
+    """
+    error = None
+    for instance in _unique_reversed(reset_instances(owner, current_scope=current_scope)):
+        try:
+            _close(instance)
+        except Exception as exc:  # noqa: B902
+            error = error or exc
+    if error is not None:
+        raise error
+
+
+async def adispose_instances(owner: Optional[Any] = None, *, current_scope: bool = False) -> None:
+    """
+    Forget the instances held by a singleton class or factory, or by all of them, and close them.
+
+    Same as :func:`dispose_instances`, except that ``aclose()`` is awaited in the running event loop,
+    and preferred over ``close()``.
+
+    :param owner: the singleton class or factory, or None for every owner
+    :param current_scope: only dispose the instances of the current scope (thread, greenthread...)
+    """
+    error = None
+    for instance in _unique_reversed(reset_instances(owner, current_scope=current_scope)):
+        try:
+            aclose = getattr(instance, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            else:
+                _close(instance)
+        except Exception as exc:  # noqa: B902
+            error = error or exc
+    if error is not None:
+        raise error
+
+
+def dispose_instances_at_exit() -> None:
+    """Dispose every instance at interpreter exit, see :func:`dispose_instances`."""
+    global _dispose_at_exit_registered  # noqa: WPS420
+    if not _dispose_at_exit_registered:
+        atexit.register(dispose_instances)
+        _dispose_at_exit_registered = True  # noqa: WPS122, WPS442
+
+
+def _unique_reversed(instances: List[Any]) -> List[Any]:
+    """
+    Reverse the instances, keeping only the first occurrence of each.
+
+    :param instances: the instances, possibly held by several owners
+    :return: the unique instances, reversed
+    """
+    seen = set()
+    unique = []
+    for instance in reversed(instances):
+        if id(instance) not in seen:
+            seen.add(id(instance))
+            unique.append(instance)
+    return unique
+
+
+def _close(instance: Any) -> None:
+    """
+    Close an instance with ``close()``, or ``aclose()`` in a new event loop.
+
+    :param instance: the instance to close
+    """
+    close = getattr(instance, "close", None)
+    if close is not None:
+        close()
+        return
+    aclose = getattr(instance, "aclose", None)
+    if aclose is not None:
+        import asyncio  # noqa: WPS433
+
+        asyncio.run(aclose())
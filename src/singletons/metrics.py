@@ -0,0 +1,214 @@
+"""
+Opt-in metrics of singleton classes: calls, constructions and lock waits.
+
+Metrics are disabled by default, and cost nothing until :func:`enable_metrics` is called: calls are
+then counted by wrapping the ``__call__`` of the singleton metaclasses, which is restored by
+:func:`disable_metrics`. Calls answered by the cache of a
+:class:`~singletons.GlobalFactory`/:class:`~singletons.ProcessFactory` don't reach the metaclass,
+and aren't counted.
+"""
+import functools
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+from singletons.singleton import ContextSingleton, Singleton, _ScopedSingleton, set_observer
+
+# metaclasses defining their own __call__, inherited by the other ones
+_CALL_DEFINERS = (Singleton, _ScopedSingleton, ContextSingleton)
+_original_calls: Dict[type, Callable[..., Any]] = {}
+_recorder: Optional["_Recorder"] = None  # noqa: WPS122
+
+MetricsCallback = Callable[[str, str, float], None]
+
+
+class _ClassMetrics:
+    """Counters and timings of one singleton class."""
+
+    __slots__ = (
+        "calls",
+        "constructions",
+        "construction_errors",
+        "construction_seconds",
+        "max_construction_seconds",
+        "lock_waits",
+        "lock_wait_seconds",
+    )
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.constructions = 0
+        self.construction_errors = 0
+        self.construction_seconds = 0.0
+        self.max_construction_seconds = 0.0
+        self.lock_waits = 0
+        self.lock_wait_seconds = 0.0
+
+
+class _Recorder:
+    """Observer of the singleton metaclasses, recording the metrics of every class."""
+
+    def __init__(self, callback: Optional[MetricsCallback]) -> None:
+        self.classes: "weakref.WeakKeyDictionary[type, _ClassMetrics]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.callback = callback
+        self.lock = threading.Lock()
+
+    def get(self, cls: type) -> _ClassMetrics:
+        """
+        Return the metrics of a class.
+
+        :param cls: the singleton class
+        :return: its metrics
+        """
+        try:
+            return self.classes[cls]
+        except KeyError:
+            with self.lock:
+                return self.classes.setdefault(cls, _ClassMetrics())
+
+    def constructed(self, cls: type, seconds: float, failed: bool) -> None:
+        """
+        Record a construction.
+
+        :param cls: the singleton class
+        :param seconds: the duration of the construction
+        :param failed: whether the constructor raised
+        """
+        metrics = self.get(cls)
+        with self.lock:
+            if failed:
+                metrics.construction_errors += 1
+            else:
+                metrics.constructions += 1
+            metrics.construction_seconds += seconds
+            metrics.max_construction_seconds = max(metrics.max_construction_seconds, seconds)
+        if self.callback is not None:
+            name = _name(cls)
+            self.callback("construction_errors" if failed else "constructions", name, 1)
+            self.callback("construction_seconds", name, seconds)
+
+    def lock_waited(self, cls: type, seconds: float) -> None:
+        """
+        Record a wait for a lock held by another thread.
+
+        :param cls: the singleton class
+        :param seconds: the duration of the wait
+        """
+        metrics = self.get(cls)
+        with self.lock:
+            metrics.lock_waits += 1
+            metrics.lock_wait_seconds += seconds
+        if self.callback is not None:
+            name = _name(cls)
+            self.callback("lock_waits", name, 1)
+            self.callback("lock_wait_seconds", name, seconds)
+
+
+def enable_metrics(callback: Optional[MetricsCallback] = None) -> None:
+    """
+    Start recording the metrics of singleton classes.
+
+    ``callback`` is called with ``(metric, class_name, value)`` on every construction and lock wait,
+    e.g. to forward them to Prometheus or StatsD. The metrics are ``constructions``,
+    ``construction_errors`` and ``lock_waits`` (incremented by ``value``), and
+    ``construction_seconds`` and ``lock_wait_seconds`` (observed durations). Calls are only
+    counted, to keep them cheap.
+
+    Enabling metrics again replaces the callback, and keeps the recorded metrics.
+
+    :param callback: called with every construction and lock wait
+    """
+    global _recorder  # noqa: WPS420
+    if _recorder is None:
+        _recorder = _Recorder(callback)  # noqa: WPS122, WPS442
+        for metaclass in _CALL_DEFINERS:
+            original = metaclass.__dict__["__call__"]
+            _original_calls[metaclass] = original
+            metaclass.__call__ = _counting_call(original, _recorder)  # type: ignore
+        set_observer(_recorder)
+    else:
+        _recorder.callback = callback
+
+
+def disable_metrics() -> None:
+    """Stop recording metrics, and forget the recorded ones."""
+    global _recorder  # noqa: WPS420
+    set_observer(None)
+    for metaclass, original in _original_calls.items():
+        metaclass.__call__ = original  # type: ignore
+    _original_calls.clear()
+    _recorder = None  # noqa: WPS122, WPS442
+
+
+def get_metrics() -> Dict[str, Dict[str, float]]:
+    """
+    Export the recorded metrics as a plain dict.
+
+    For each class, by its qualified name (classes with the same name are aggregated):
+
+    - ``calls``: calls of the class (or factory) that reached the metaclass
+    - ``hits``: calls that didn't construct an instance
+    - ``constructions``/``construction_errors``: successful/failed constructions
+    - ``construction_seconds``/``max_construction_seconds``: total/longest construction time,
+      including the construction of the singletons built along the way
+    - ``lock_waits``/``lock_wait_seconds``: contended lock acquisitions, and the time waited
+    - ``instances``: instances currently held (see :func:`~singletons.get_instances`)
+
+    :return: the metrics by class name, empty if metrics are disabled
+    """
+    recorder = _recorder
+    if recorder is None:
+        return {}
+    exported: Dict[str, Dict[str, float]] = {}
+    with recorder.lock:
+        classes = list(recorder.classes.items())
+    for cls, metrics in classes:
+        values = {field: getattr(metrics, field) for field in _ClassMetrics.__slots__}
+        values["hits"] = max(metrics.calls - metrics.constructions - metrics.construction_errors, 0)
+        values["instances"] = len(cls._get_instances())  # type: ignore  # noqa: WPS437
+        existing = exported.setdefault(_name(cls), dict.fromkeys(values, 0))
+        for field, field_value in values.items():
+            if field == "max_construction_seconds":
+                existing[field] = max(existing[field], field_value)
+            else:
+                existing[field] += field_value
+    return exported
+
+
+def reset_metrics() -> None:
+    """Forget the recorded metrics, keeping them enabled."""
+    recorder = _recorder
+    if recorder is not None:
+        with recorder.lock:
+            recorder.classes.clear()
+
+
+def _counting_call(call: Callable[..., Any], recorder: _Recorder) -> Callable[..., Any]:
+    """
+    Wrap the ``__call__`` of a metaclass to count calls.
+
+    Counting isn't locked, so concurrent calls may be slightly undercounted.
+
+    :param call: the ``__call__`` of the metaclass
+    :param recorder: the recorder of the metrics
+    :return: the wrapped ``__call__``
+    """
+
+    @functools.wraps(call)
+    def __call__(cls: type, *args: Any, **kwargs: Any) -> Any:  # noqa: N807, WPS430
+        recorder.get(cls).calls += 1
+        return call(cls, *args, **kwargs)
+
+    return __call__
+
+
+def _name(cls: type) -> str:
+    """
+    Get the name of a class in the metrics.
+
+    :param cls: the singleton class
+    :return: its qualified name
+    """
+    return f"{cls.__module__}.{cls.__qualname__}"
@@ -0,0 +1,232 @@
+"""Bounded pools of objects, between one object per process and one per thread."""
+import functools
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from singletons.exceptions import PoolTimeoutError
+from singletons.factory import ProcessFactory
+
+_UNSET = object()
+
+
+class _Pool:
+    """
+    Pool of up to ``size`` objects created by ``create``, lent to one caller at a time.
+
+    Objects are created on demand. Returned objects are lent again before new ones are created, the
+    most recently returned one first, as it is the most likely to still be healthy.
+    """
+
+    def __init__(
+        self,
+        create: Callable[[], Any],
+        size: int,
+        timeout: Optional[float],
+        check: Optional[Callable[[Any], Any]],
+    ) -> None:
+        self.create = create
+        self.size = size
+        self.timeout = timeout
+        self.check = check
+        self.idle: List[Any] = []
+        self.created = 0
+        self.closed = False
+        self.condition = threading.Condition(threading.Lock())
+
+    def checkout(self, timeout: Any = _UNSET) -> "_Checkout":
+        """
+        Borrow an object, as a context manager returning it when exited.
+
+        :param timeout: seconds to wait for an object when all of them are lent, None to wait
+            forever; defaults to the timeout of the pool
+        :return: the context manager
+        """
+        return _Checkout(self, self.timeout if timeout is _UNSET else timeout)
+
+    def acquire(self, timeout: Optional[float]) -> Any:
+        """
+        Borrow an object, creating it if needed, and checking it if it was idle.
+
+        :param timeout: seconds to wait for an object when all of them are lent, None to wait forever
+        :raises PoolTimeoutError: if no object was returned in time
+        :raises RuntimeError: if the pool is closed
+        :return: the object, to be returned with :meth:`release`
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:  # noqa: WPS457
+            obj = self._take(deadline)
+            if obj is _UNSET:
+                try:
+                    return self.create()
+                except BaseException:
+                    self._discard(None)
+                    raise
+            if self.check is None or self._healthy(obj):
+                return obj
+            self._discard(obj)
+
+    def release(self, obj: Any) -> None:
+        """
+        Return a borrowed object to the pool.
+
+        :param obj: the object
+        """
+        with self.condition:
+            if not self.closed:
+                self.idle.append(obj)
+                self.condition.notify()
+                return
+            self.created -= 1
+        _close(obj)
+
+    def close(self) -> None:
+        """Close the idle objects, and the lent ones once they are returned."""
+        with self.condition:
+            self.closed = True
+            idle = self.idle
+            self.idle = []
+            self.created -= len(idle)
+            self.condition.notify_all()
+        for obj in idle:
+            _close(obj)
+
+    def _take(self, deadline: Optional[float]) -> Any:
+        """
+        Take an idle object, or the right to create one.
+
+        :param deadline: the time to wait until, per :func:`time.monotonic`, None to wait forever
+        :raises PoolTimeoutError: if no object was returned in time
+        :raises RuntimeError: if the pool is closed
+        :return: the idle object, or ``_UNSET`` to create one
+        """
+        with self.condition:
+            while True:  # noqa: WPS457
+                if self.closed:
+                    raise RuntimeError("the pool is closed")
+                if self.idle:
+                    return self.idle.pop()
+                if self.created < self.size:
+                    self.created += 1
+                    return _UNSET
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeoutError(f"all {self.size} objects of the pool are in use")
+                self.condition.wait(remaining)
+
+    def _healthy(self, obj: Any) -> bool:
+        """
+        Check an idle object before lending it.
+
+        :param obj: the object
+        :return: whether the check returned a true value without raising
+        """
+        try:
+            return bool(self.check(obj))  # type: ignore
+        except Exception:  # noqa: B902
+            return False
+
+    def _discard(self, obj: Any) -> None:
+        """
+        Discard an unhealthy object, or a failed creation, making room for a new object.
+
+        :param obj: the object, closed if possible, or None
+        """
+        with self.condition:
+            self.created -= 1
+            self.condition.notify()
+        if obj is not None:
+            try:
+                _close(obj)
+            except Exception:  # noqa: B902, S110
+                pass  # noqa: WPS420
+
+
+class _Checkout:
+    """Context manager borrowing an object from a pool, and returning it when exited."""
+
+    __slots__ = ("pool", "timeout", "obj")
+
+    def __init__(self, pool: _Pool, timeout: Optional[float]) -> None:
+        self.pool = pool
+        self.timeout = timeout
+
+    def __enter__(self) -> Any:
+        self.obj = self.pool.acquire(self.timeout)
+        return self.obj
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.pool.release(self.obj)
+
+
+class PooledFactory(ProcessFactory):
+    """
+    Decorator to create a factory lending objects from a bounded pool, per process.
+
+    Calling the factory returns a context manager borrowing one of up to ``size`` objects, created
+    by the decorated function when needed, and returning it to the pool when exited. Each object is
+    used by one caller at a time, so objects that aren't thread-safe (e.g. clients) can be shared by
+    many threads without creating one per thread::
+
+        @PooledFactory(size=8, timeout=5, check=lambda client: client.ping())
+        def client():
+            return Client()
+
+        with client() as c:
+            c.query()
+
+    When all the objects are lent, callers wait for one to be returned, for at most ``timeout``
+    seconds if set, after which :class:`~singletons.exceptions.PoolTimeoutError` is raised. With
+    ``check``, idle objects are checked before being lent, and discarded (and closed, if they have a
+    ``close()`` method) if ``check`` returns a false value or raises.
+
+    As with :class:`~singletons.ProcessFactory`, a forked child process gets a new pool. Disposing
+    the factory (see :func:`~singletons.dispose_instances`) closes its pool: the idle objects are
+    closed, and the lent ones when they are returned. If the decorated function takes arguments,
+    there is a pool per combination of arguments.
+    """
+
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        size: int = 10,
+        timeout: Optional[float] = None,
+        check: Optional[Callable[[Any], Any]] = None,
+        **options: Any,
+    ) -> None:
+        if size < 1:
+            raise ValueError("size must be at least 1")
+
+        @functools.wraps(func)
+        def new_pool(*args: Any, **kwargs: Any) -> _Pool:  # noqa: WPS430
+            return _Pool(functools.partial(func, *args, **kwargs), size, timeout, check)
+
+        super().__init__(new_pool, **options)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> _Checkout:
+        return self.pool(*args, **kwargs).checkout()
+
+    def pool(self, *args: Any, **kwargs: Any) -> _Pool:
+        """
+        Get the pool of the current process, e.g. to borrow an object with another timeout::
+
+            with client.pool().checkout(timeout=1) as c:
+                ...
+
+        :param args: positional arguments for the decorated function
+        :param kwargs: keyword arguments for the decorated function
+        :return: the pool
+        """
+        pool: _Pool = super().__call__(*args, **kwargs)
+        return pool
+
+
+def _close(obj: Any) -> None:
+    """
+    Close an object with its ``close()`` method, if it has one.
+
+    :param obj: the object
+    """
+    close = getattr(obj, "close", None)
+    if close is not None:
+        close()
@@ -0,0 +1,120 @@
+"""Reports of the memory held by singleton classes and factories, to diagnose memory growth."""
+import gc
+import sys
+import types
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set
+
+from singletons.utils import created_owners
+
+# shared by many instances, not retained by any of them
+_SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.CodeType,
+)
+MAX_SIZE_OBJECTS = 100000
+
+
+def memory_report(debug: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Report the scopes and instances held by singleton classes and factories.
+
+    For each metaclass (or async factory type), by name, and for each of its classes with instances
+    in ``classes``, by qualified name:
+
+    - ``scopes``: the number of scopes (threads, greenthreads...) holding instances
+    - ``instances``: the number of instances, including keyed ones
+    - ``size``: the approximate size in bytes of the instances and of the objects they reference,
+      each object being counted once in the whole report, and classes, modules and functions not
+      being counted. A :class:`~singletons.ContextSingleton` only reports the current context.
+
+    With ``debug``, each class also reports ``stale_scopes``: the identifiers of the scopes whose
+    thread or greenthread no longer exists, but whose instances are still held. This walks every
+    object tracked by the garbage collector for greenthread scopes, so it is slow. Scopes of a
+    metaclass that can't tell whether they're alive are never reported as stale.
+
+    :param debug: also report the stale scopes
+    :return: the report
+    """
+    report: Dict[str, Dict[str, Any]] = {}
+    seen: Set[int] = set()
+    live_scopes: Dict[type, Optional[Set[Hashable]]] = {}
+    for owner in created_owners():
+        scopes = _get_scopes(owner)
+        if not scopes:
+            continue
+        metaclass = type(owner)
+        instances = [instance for scope in scopes.values() for instance in scope]
+        summary: Dict[str, Any] = {
+            "scopes": len(scopes),
+            "instances": len(instances),
+            "size": _approximate_size(instances, seen),
+        }
+        if debug:
+            if metaclass not in live_scopes:
+                live_scopes[metaclass] = _get_live_scopes(owner)
+            alive = live_scopes[metaclass]
+            summary["stale_scopes"] = [] if alive is None else [
+                ident for ident in scopes if ident is not None and ident not in alive
+            ]
+        totals = report.setdefault(
+            metaclass.__name__, {"scopes": 0, "instances": 0, "size": 0, "classes": {}},
+        )
+        for field in ("scopes", "instances", "size"):
+            totals[field] += summary[field]
+        totals["classes"][f"{owner.__module__}.{owner.__qualname__}"] = summary
+    return report
+
+
+def _get_scopes(owner: Any) -> Dict[Optional[Hashable], List[Any]]:
+    """
+    Get the instances held by an owner, by scope.
+
+    :param owner: a singleton class or factory
+    :return: the instances of each scope holding some
+    """
+    get_scopes = getattr(owner, "_get_scopes", None)
+    if get_scopes is not None:
+        scopes: Dict[Optional[Hashable], List[Any]] = get_scopes()
+        return scopes
+    instances = owner._get_instances()  # noqa: WPS437
+    return {None: instances} if instances else {}
+
+
+def _get_live_scopes(owner: Any) -> Optional[Set[Hashable]]:
+    """
+    Get the scopes of an owner whose thread or greenthread still exists.
+
+    :param owner: a singleton class or factory
+    :return: the scope identifiers, or None if it can't be told
+    """
+    get_live_scopes = getattr(owner, "_get_live_scopes", None)
+    if get_live_scopes is None:
+        return None
+    live_scopes: Optional[Set[Hashable]] = get_live_scopes()
+    return live_scopes
+
+
+def _approximate_size(objects: Iterable[Any], seen: Set[int]) -> int:
+    """
+    Sum the sizes of objects and of the objects they reference, recursively.
+
+    :param objects: the objects to measure
+    :param seen: identifiers of the objects already counted, updated
+    :return: the size in bytes
+    """
+    size = 0
+    pending = list(objects)
+    counted = 0
+    while pending and counted < MAX_SIZE_OBJECTS:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        counted += 1
+        size += sys.getsizeof(obj, 0)
+        pending.extend(gc.get_referents(obj))
+    return size
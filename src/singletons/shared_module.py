@@ -1,22 +1,33 @@
+import functools
+import importlib
 import logging
+import threading
 import types
-from typing import Any, Callable, MutableMapping, Optional, Type, Union
+from typing import Any, Callable, Mapping, MutableMapping, Optional, Set, Type, Union
 from unittest.mock import Mock
 
 from singletons.factory import (  # noqa: WPS436
+    ContextFactory,
     EventletFactory,
+    ExecutorFactory,
     GeventFactory,
     GlobalFactory,
     GreenthreadFactory,
     ProcessFactory,
+    ShardedFactory,
     ThreadFactory,
+    _AsyncFactoryBase,
     _FactoryBase,
 )
+from singletons.pool import PooledFactory
 from singletons.singleton import (
+    ContextSingleton,
     EventletSingleton,
+    ExecutorSingleton,
     GeventSingleton,
     GreenthreadSingleton,
     ProcessSingleton,
+    ShardedSingleton,
     Singleton,
     ThreadSingleton,
 )
@@ -24,18 +35,91 @@ from singletons.utils import env_to_bool
 
 SETUP_MOCK = "SINGLETONS_SETUP_MOCK"
 LOG = logging.getLogger(__name__)
-METACLASS_FACTORY_MAP = types.MappingProxyType(
+METACLASS_FACTORY_MAP: Mapping[type, Type[_FactoryBase]] = types.MappingProxyType(
     {
         Singleton: GlobalFactory,
         ProcessSingleton: ProcessFactory,
         ThreadSingleton: ThreadFactory,
+        ContextSingleton: ContextFactory,
         GreenthreadSingleton: GreenthreadFactory,
         EventletSingleton: EventletFactory,
         GeventSingleton: GeventFactory,
+        ShardedSingleton: ShardedFactory,
+        ExecutorSingleton: ExecutorFactory,
     },
 )
 
 
+_UNRESOLVED = object()
+
+
+class Lazy:
+    """
+    Attribute of a :class:`SharedModule`, resolved on its first access and then stored in place.
+
+    Either an import string, ``"package.module"`` or ``"package.module:attribute"``, or a function
+    called without arguments::
+
+        numpy = Lazy("numpy")
+        Client = Lazy("myapp.clients:Client")
+        settings = Lazy(load_settings)
+
+    The import or function call happens once, even if several threads access the attribute
+    concurrently. In mock mode, lazy attributes are replaced by a Mock without being resolved.
+    """
+
+    def __init__(self, target: Union[str, Callable[[], Any]]) -> None:
+        self.target = target
+        self._value: Any = _UNRESOLVED
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.target!r})"
+
+    def resolve(self) -> Any:
+        """
+        Import or build the attribute, once.
+
+        :return: the attribute
+        """
+        if self._value is _UNRESOLVED:
+            with self._lock:
+                if self._value is _UNRESOLVED:  # pragma: no branch
+                    # double checked locking pattern
+                    self._value = self._load()
+        return self._value
+
+    def _load(self) -> Any:
+        """
+        Import or build the attribute.
+
+        :return: the attribute
+        """
+        if not isinstance(self.target, str):
+            return self.target()
+        module_name, _, attribute_path = self.target.partition(":")
+        loaded = importlib.import_module(module_name)
+        if attribute_path:
+            for attribute in attribute_path.split("."):
+                loaded = getattr(loaded, attribute)
+        return loaded
+
+
+@functools.lru_cache(maxsize=None)
+def _factory_for_metaclass(metaclass: type) -> Optional[Type[_FactoryBase]]:
+    """
+    Select the factory matching a metaclass, or its closest base in ``METACLASS_FACTORY_MAP``.
+
+    :arg metaclass: One of the Singleton metaclasses, or any type
+    :return: The appropriate Factory class, or None
+    """
+    for base in metaclass.__mro__:
+        factory = METACLASS_FACTORY_MAP.get(base)
+        if factory is not None:
+            return factory
+    return None
+
+
 class SharedModule(types.ModuleType):
     """
     Base class used to intercept attribute accesses to a module.
@@ -52,6 +136,13 @@ class SharedModule(types.ModuleType):
         class _Shared(SharedModule):
             globals = globals()
         sys.modules[__name__] = _Shared()
+
+    Globals can be declared as :class:`Lazy`, to be imported or built on their first access.
+
+    Mocks and resolved :class:`Lazy` attributes are cached in the module's own ``__dict__``, so
+    that later accesses are plain attribute lookups. The cache is invalidated when attributes are
+    set on the module and by ``setup_mock``/``teardown_mock``. Other actual objects are looked up
+    in ``globals`` on every access, so that globals rebound by the original module are seen.
     """
 
     _mock: Optional[MutableMapping] = None
@@ -62,6 +153,7 @@ class SharedModule(types.ModuleType):
                 "SharedModule subclasses must define the `globals` attribute "
                 + "(see documentation for example)",
             )  # pragma: no cover
+        super().__setattr__("_SharedModule__cached", set())
         if env_to_bool(SETUP_MOCK):
             self.setup_mock()  # pragma: no cover
 
@@ -72,6 +164,7 @@ class SharedModule(types.ModuleType):
         All attribute accesses will receive mock objects instead of actual ones.
         """
         self._mock = {}
+        self.invalidate_cache()
 
     def teardown_mock(self) -> None:
         """
@@ -80,26 +173,62 @@ class SharedModule(types.ModuleType):
         Remove all existing Mocks.
         """
         self._mock = None
+        self.invalidate_cache()
+
+    def invalidate_cache(self) -> None:
+        """Forget the resolved attributes, so that they are resolved again on their next access."""
+        cached: Set[str] = self.__cached
+        module_dict = self.__dict__
+        for key in list(cached):
+            module_dict.pop(key, None)
+        cached.clear()
 
     def __getattr__(self, key: str) -> Any:
-        if self._mock is None:
+        mock = self._mock
+        if mock is None:
             try:
-                return self.globals[key]
+                attr_value = self.globals[key]
             except KeyError:
                 raise AttributeError(
                     f"module '{self.globals['__name__']}' has no attribute '{key}'",
                 )
-        if key not in self._mock:
-            self._mock[key] = self._instantiate_mock_instance(key)
-        return self._mock[key]
+            if not isinstance(attr_value, Lazy):
+                # not cached, as the original module may rebind it (e.g. with ``global``)
+                return attr_value
+            attr_value = attr_value.resolve()
+            # store it in place, for the functions of the original module too
+            self.globals[key] = attr_value
+        else:
+            attr_value = self._get_mock(key, mock)
+        self.__cached.add(key)
+        self.__dict__[key] = attr_value
+        return attr_value
 
     def __setattr__(self, key: str, attr_value: Any) -> None:
         if key == "_mock":
             super().__setattr__(key, attr_value)
         if self._mock is None:
             self.globals[key] = attr_value
-            return
-        self._mock[key] = attr_value
+        else:
+            self._mock[key] = attr_value
+        if key in self.__cached:
+            self.__cached.discard(key)
+            self.__dict__.pop(key, None)
+
+    def _get_mock(self, key: str, mock: MutableMapping[str, Any]) -> Any:
+        """
+        Get the mock of an attribute, instantiating it on first access.
+
+        :arg key: The item name
+        :arg mock: The mocks of the module
+        :return: The mock
+        """
+        try:
+            return mock[key]
+        except KeyError:
+            attr_value = self._instantiate_mock_instance(key)
+        mock[key] = attr_value
+        return attr_value
 
     def _instantiate_mock_instance(self, key: str) -> Union[Callable, Mock]:
         """
@@ -114,6 +243,9 @@ class SharedModule(types.ModuleType):
         except KeyError:
             raise AttributeError(f"module '{self.globals['__name__']}' has no attribute '{key}'")
 
+        special_mock = _special_mock(original)
+        if special_mock is not None:
+            return special_mock
         metaclass = getattr(original, "singleton_metaclass", None) or type(original)
         factory = self._select_factory(metaclass)
         if factory is None:
@@ -121,20 +253,52 @@ class SharedModule(types.ModuleType):
         LOG.debug("Using factory %s for %s", factory, key)
 
         # create a factory with the appropriate scope
-        @factory  # type: ignore
-        def _mock_factory() -> Mock:  # noqa: WPS430
-            return Mock()
+        return factory(_new_mock)
 
-        return _mock_factory
-
-    def _select_factory(self, metaclass: Type) -> Optional[Type[_FactoryBase]]:
+    def _select_factory(self, metaclass: type) -> Optional[Type[_FactoryBase]]:
         """
         Select the appropriate factory to use based on the metaclass.
 
         :arg metaclass: One of the Singleton metaclasses
         :return: The appropriate Factory class, or None
         """
-        for key, factory in METACLASS_FACTORY_MAP.items():
-            if issubclass(metaclass, key):
-                return factory
-        return None
+        return _factory_for_metaclass(metaclass)
+
+
+def _special_mock(original: Any) -> Optional[Union[Callable, Mock]]:
+    """
+    Build the mock of an attribute whose type takes precedence over its metaclass.
+
+    :arg original: The original attribute
+    :return: The factory or Mock, or None to select the factory of the metaclass
+    """
+    if isinstance(original, Lazy):
+        # resolving it could import heavy dependencies that the tests don't need
+        return Mock()
+    if isinstance(original, PooledFactory):
+        # lends mocks, so that the factory is still used as a context manager
+        return PooledFactory(_new_mock)
+    if isinstance(original, _AsyncFactoryBase):
+        # builds an awaitable mock once, per process if the original is per process
+        return type(original)(_new_async_mock)
+    return None
+
+
+def _new_mock(*args: Any, **kwargs: Any) -> Mock:
+    """
+    Create the mock object of a mock factory.
+
+    :arg args: ignored positional arguments of the factory
+    :arg kwargs: ignored keyword arguments of the factory
+    :return: the mock
+    """
+    return Mock()
+
+
+async def _new_async_mock() -> Mock:
+    """
+    Create the mock object of a mock async factory.
+
+    :return: the mock
+    """
+    return Mock()
@@ -1,14 +1,498 @@
+import copy
+import functools
 import os
 import threading
-from collections import defaultdict
-from typing import Any, ClassVar, MutableMapping, Optional, Type, TypeVar
+import time
+import weakref
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Hashable,
+    List,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
-from singletons.utils import greenthread_ident
+from singletons.utils import (
+    FORK_HOOKS,
+    forget_creation,
+    greenthread_current,
+    greenthread_ident,
+    live_greenlet_idents,
+    record_creation,
+    register_after_fork,
+)
 
 T = TypeVar("T")  # noqa: WPS111
 
 
-class Singleton(type):
+_KWARGS_MARK = object()
+_MISSING = object()
+# notified of constructions and lock waits while metrics are enabled, see singletons.metrics
+_observer: Optional[Any] = None  # noqa: WPS122
+
+
+def set_observer(observer: Optional[Any]) -> None:
+    """
+    Set the object notified of constructions and lock waits, or None to stop notifying.
+
+    The observer must implement ``constructed(cls, seconds, failed)`` and
+    ``lock_waited(cls, seconds)``.
+
+    :arg observer: the observer
+    """
+    global _observer  # noqa: WPS420
+    _observer = observer  # noqa: WPS122, WPS442
+
+
+def _acquire(owner: type, lock: threading.Lock) -> None:
+    """
+    Acquire a lock of a singleton class, reporting the time waited for it to the observer.
+
+    :arg owner: the singleton class
+    :arg lock: the lock
+    """
+    if lock.acquire(blocking=False):
+        return
+    observer = _observer
+    if observer is None:
+        lock.acquire()
+        return
+    start = time.perf_counter()
+    lock.acquire()
+    observer.lock_waited(owner, time.perf_counter() - start)
+
+
+def _call_each(callback: Callable[[Any], Any], instances: List[Any]) -> None:
+    """
+    Call a callback with each instance, even if some of the calls fail.
+
+    :arg callback: the callback
+    :arg instances: the instances
+    :raises Exception: the first error of the callback, once every call is done
+    """
+    error = None
+    for instance in instances:
+        try:
+            callback(instance)
+        except Exception as exc:  # noqa: B902
+            error = error or exc
+    if error is not None:
+        raise error
+
+
+def _make_key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Hashable:
+    """
+    Make the key of a keyed singleton instance from its constructor arguments.
+
+    :arg args: positional arguments for the constructor
+    :arg kwargs: keyword arguments for the constructor
+    :return: a hashable key, independent of the order of the keyword arguments
+    """
+    if kwargs:
+        return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+    return args
+
+
+class _Multiton:
+    """The instances of a keyed singleton class within one scope, one per key."""
+
+    def __init__(self) -> None:
+        self.instances: MutableMapping[Hashable, Any] = {}
+        self.locks: Dict[Hashable, threading.Lock] = {}
+
+    def get(self, owner: Any, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        """
+        Return the instance for the constructor arguments, constructing it if needed.
+
+        Only the lock of the key is held while the instance is being constructed. The lock is
+        dropped once the construction is over, so callers that waited for it start over.
+
+        :arg owner: the singleton class
+        :arg args: positional arguments for the constructor
+        :arg kwargs: keyword arguments for the constructor
+        :return: the instance
+        """
+        key = _make_key(args, kwargs)
+        while True:  # noqa: WPS457
+            try:
+                return self._lookup(key)
+            except KeyError:
+                lock = self.locks.setdefault(key, threading.Lock())
+            _acquire(owner, lock)
+            try:
+                # double checked locking pattern, on the lock of the current construction
+                if self.locks.get(key) is lock:
+                    return self._construct(owner, key, args, kwargs)
+            finally:
+                lock.release()
+
+    def values(self) -> List[Any]:
+        """
+        Return the instances.
+
+        :return: the instances, in order of construction (or of use, if bounded)
+        """
+        return list(self.instances.values())
+
+    def copy(self) -> "_Multiton":
+        """
+        Return a copy holding the same instances, whose keys can be added separately.
+
+        :return: the copy
+        """
+        multiton = copy.copy(self)
+        multiton.instances = copy.copy(self.instances)
+        multiton.locks = {}
+        return multiton
+
+    def _construct(
+        self, owner: Any, key: Hashable, args: Tuple[Any, ...], kwargs: Dict[str, Any],
+    ) -> Any:
+        """
+        Construct and store the instance for ``key``, then drop its lock even if this fails.
+
+        :arg owner: the singleton class
+        :arg key: the key
+        :arg args: positional arguments for the constructor
+        :arg kwargs: keyword arguments for the constructor
+        :return: the instance
+        """
+        try:
+            instance = owner._construct(*args, **kwargs)  # noqa: WPS437
+            self._store(key, instance)
+        finally:
+            # late callers find the instance, or retry the construction under a new lock
+            self.locks.pop(key, None)
+        return instance
+
+    def _lookup(self, key: Hashable) -> Any:
+        """
+        Return the instance for ``key``.
+
+        :arg key: the key
+        :raises: KeyError if there is no instance for the key
+        :return: the instance
+        """
+        return self.instances[key]
+
+    def _store(self, key: Hashable, instance: Any) -> None:
+        """
+        Store the instance constructed for ``key``.
+
+        :arg key: the key
+        :arg instance: the instance
+        """
+        self.instances[key] = instance
+
+
+class _BoundedMultiton(_Multiton):
+    """
+    Keyed instances within one scope, with a maximum size and/or time to live.
+
+    When there are more than ``maxsize`` instances, the least recently used ones are evicted.
+    Instances are evicted ``ttl`` seconds after they were constructed. ``on_evict`` is called with
+    every evicted instance, outside of any lock.
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        super().__init__()
+        self.instances: "OrderedDict[Hashable, Any]" = OrderedDict()  # in order of use
+        self.deadlines: "OrderedDict[Hashable, float]" = OrderedDict()  # in order of construction
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        # guards the order of use and the evictions
+        self.lock = threading.Lock()
+
+    def _lookup(self, key: Hashable) -> Any:
+        with self.lock:
+            instance = self.instances[key]
+            if self.ttl is None or self.deadlines[key] > time.monotonic():
+                self.instances.move_to_end(key)
+                return instance
+            del self.instances[key]  # noqa: WPS420
+            del self.deadlines[key]  # noqa: WPS420
+        self._evicted([instance])
+        raise KeyError(key)
+
+    def _store(self, key: Hashable, instance: Any) -> None:
+        evicted = []
+        with self.lock:
+            self.instances[key] = instance
+            if self.ttl is not None:
+                now = time.monotonic()
+                self.deadlines[key] = now + self.ttl
+                while self.deadlines and next(iter(self.deadlines.values())) <= now:
+                    evicted.append(self.instances.pop(self.deadlines.popitem(last=False)[0]))
+            if self.maxsize is not None:
+                while len(self.instances) > self.maxsize:
+                    old_key, old_instance = self.instances.popitem(last=False)
+                    self.deadlines.pop(old_key, None)
+                    evicted.append(old_instance)
+        self._evicted(evicted)
+
+    def _evicted(self, instances: List[Any]) -> None:
+        """
+        Notify ``on_evict`` of evicted instances.
+
+        :arg instances: the evicted instances
+        """
+        if self.on_evict is not None:
+            for instance in instances:
+                self.on_evict(instance)
+
+
+_CLASS_OPTIONS = frozenset(
+    ("keyed", "maxsize", "ttl", "on_evict", "on_scope_exit", "shards", "aggregate"),
+)
+
+
+# the identifier of a scope and (weak references to) the classes holding it, by id of the scope owner
+_scope_classes: Dict[int, Tuple[Hashable, List["weakref.ref[_ScopedSingleton]"]]] = {}
+# owners can be shared by threads (e.g. executor scopes); reentrant, as a finalizer run by the
+# garbage collector while it is held can construct instances in turn
+_scope_lock = threading.RLock()
+
+
+def _track_scope(owner: object, cls: "_ScopedSingleton", ident: Hashable) -> Hashable:
+    """
+    Evict a scope from the instances of ``cls`` once its owner is garbage collected.
+
+    A single finalizer is registered per owner, for every class holding the scope, as there can be
+    many short-lived owners (e.g. greenthreads) and many classes. The classes share the identifier
+    object returned, instead of each holding an equal copy. Classes are only weakly referenced, so
+    that the classes holding a long-lived scope (e.g. the main thread) can still be garbage
+    collected.
+
+    :arg owner: the object whose lifetime bounds the scope
+    :arg cls: the class holding the scope
+    :arg ident: the identifier of the scope
+    :return: the identifier to store the scope under
+    """
+    owner_id = id(owner)
+    with _scope_lock:
+        tracked = _scope_classes.get(owner_id)
+        if tracked is None:
+            tracked = (ident, [])
+            _scope_classes[owner_id] = tracked
+            weakref.finalize(owner, _evict_scope, owner_id).atexit = False
+        elif tracked[0] != ident:  # pragma: no cover
+            # an owner with different identifiers, depending on the metaclass
+            weakref.finalize(owner, _evict_class_scope, weakref.ref(cls), ident).atexit = False
+            return ident
+        refs = tracked[1]
+        if not any(ref() is cls for ref in refs):
+            # drop the collected classes, so that a long-lived scope doesn't accumulate them
+            refs[:] = [ref for ref in refs if ref() is not None]
+            refs.append(weakref.ref(cls))
+        return tracked[0]
+
+
+def _evict_scope(owner_id: int) -> None:
+    """
+    Evict a scope from every class holding it, once its owner was garbage collected.
+
+    Classes are evicted in reverse order of their first use of the scope, so that an instance is
+    passed to ``on_scope_exit`` before the instances it was constructed with. Every class is evicted
+    even if some ``on_scope_exit`` callbacks fail, and the first error is then raised.
+
+    :arg owner_id: the id of the owner
+    """
+    ident, refs = _scope_classes.pop(owner_id, (None, ()))
+    error = None
+    for ref in reversed(refs):
+        try:
+            _evict_class_scope(ref, ident)
+        except Exception as exc:  # noqa: B902
+            error = error or exc
+    if error is not None:
+        raise error
+
+
+def _evict_class_scope(ref: "weakref.ref[_ScopedSingleton]", ident: Hashable) -> None:
+    """
+    Evict a scope from the instances of a class, unless the class was garbage collected.
+
+    :arg ref: a weak reference to the class
+    :arg ident: the identifier of the scope
+    """
+    cls = ref()
+    if cls is not None:
+        cls._evict_scope(ident)  # noqa: WPS437
+
+
+class _SingletonBase(type):
+    """
+    Base class for the singleton metaclasses.
+
+    Pass ``keyed=True`` as a class keyword argument to create one instance per (hashable)
+    combination of constructor arguments, instead of ignoring the arguments once the instance
+    exists::
+
+        class Client(metaclass=Singleton, keyed=True):
+            def __init__(self, region):
+                self.region = region
+
+        assert Client("east") is Client("east")
+        assert Client("east") is not Client("west")
+
+    The order of keyword arguments doesn't matter, but ``Client("east")`` and
+    ``Client(region="east")`` are different keys.
+
+    The keyed instances of each scope can be bounded (which implies ``keyed=True``):
+
+    - ``maxsize``: keep at most this many instances, evicting the least recently used ones
+    - ``ttl``: evict instances this many seconds after they were constructed
+    - ``on_evict``: called with every evicted instance, e.g. to close it
+
+    ::
+
+        class TenantClient(metaclass=Singleton, maxsize=100, ttl=3600, on_evict=close_client):
+            def __init__(self, tenant):
+                ...
+
+    Subclasses inherit the keyed mode and bounds of their base class.
+
+    Subclasses must implement ``_get_instances``, ``_get_scopes`` and ``_forget_instances``, used by
+    the lifecycle functions (see :mod:`singletons.lifecycle`) and reports (see
+    :mod:`singletons.report`).
+    """
+
+    def __new__(  # noqa: D102
+        mcs,  # noqa: N804
+        name: str,
+        bases: Tuple[type, ...],
+        namespace: Dict[str, Any],
+        **kwargs: Any,
+    ) -> "_SingletonBase":
+        type_kwargs = {key: value for key, value in kwargs.items() if key not in _CLASS_OPTIONS}
+        return super().__new__(mcs, name, bases, namespace, **type_kwargs)
+
+    def __init__(  # noqa: WPS211
+        cls,
+        name: str,
+        bases: Tuple[type, ...],
+        namespace: Dict[str, Any],
+        keyed: Optional[bool] = None,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[Any], None]] = None,
+        **kwargs: Any,
+    ) -> None:
+        # the options of other metaclasses (e.g. on_scope_exit) are left for this one
+        unsupported = [
+            key for key, value in kwargs.items() if key in _CLASS_OPTIONS and value is not None
+        ]
+        if unsupported:
+            raise TypeError(f"{type(cls).__name__} doesn't support {', '.join(unsupported)}")
+        super().__init__(name, bases, namespace, **kwargs)
+        multiton_factory = getattr(cls, "_multiton_factory", None)
+        if maxsize is not None or ttl is not None or on_evict is not None:
+            if keyed is False:
+                raise TypeError("maxsize, ttl and on_evict require keyed singletons")
+            multiton_factory = functools.partial(
+                _BoundedMultiton, maxsize=maxsize, ttl=ttl, on_evict=on_evict,
+            )
+        elif keyed is not None:
+            multiton_factory = _Multiton if keyed else None
+        cls._multiton_factory: Optional[Callable[[], _Multiton]] = multiton_factory
+        cls.__reset_callbacks: List[Callable[[], None]] = []
+
+    def _construct(cls, *args: Any, **kwargs: Any) -> Any:
+        """
+        Construct a new instance, and record the creation for the lifecycle functions.
+
+        :arg args: positional arguments for the constructor
+        :arg kwargs: keyword arguments for the constructor
+        :return: the new instance
+        """
+        observer = _observer
+        if observer is None:
+            instance = super().__call__(*args, **kwargs)
+        else:
+            start = time.perf_counter()
+            try:
+                instance = super().__call__(*args, **kwargs)
+            except BaseException:
+                observer.constructed(cls, time.perf_counter() - start, failed=True)
+                raise
+            observer.constructed(cls, time.perf_counter() - start, failed=False)
+        record_creation(cls)
+        return instance
+
+    def _get_instances(cls, current_scope: bool = False) -> List[Any]:
+        """
+        Return the instances of the class.
+
+        :arg current_scope: only return the instances of the current scope
+        :return: the instances, including keyed ones
+        """
+        raise NotImplementedError()  # pragma: no cover
+
+    def _get_scopes(cls) -> Dict[Optional[Hashable], List[Any]]:
+        """
+        Return the instances of the class, by scope.
+
+        :return: the instances of each scope holding some, by scope identifier
+        """
+        instances = cls._get_instances()
+        return {None: instances} if instances else {}
+
+    @staticmethod
+    def _get_live_scopes() -> Optional[Set[Hashable]]:
+        """
+        Return the identifiers of the scopes whose thread or greenthread still exists.
+
+        :return: the identifiers, or None if it can't be told
+        """
+        return None
+
+    def _forget_instances(cls, current_scope: bool) -> List[Any]:
+        """
+        Drop the instances of the class, so that they are constructed again when next accessed.
+
+        :arg current_scope: only drop the instances of the current scope
+        :return: the dropped instances
+        """
+        raise NotImplementedError()  # pragma: no cover
+
+    def _reset_instances(cls, current_scope: bool = False) -> List[Any]:
+        """
+        Drop the instances of the class, and notify the reset callbacks.
+
+        :arg current_scope: only drop the instances of the current scope
+        :return: the dropped instances
+        """
+        instances = cls._forget_instances(current_scope)
+        if not current_scope:
+            forget_creation(cls)
+        for callback in cls.__reset_callbacks:
+            callback()
+        return instances
+
+    def _add_reset_callback(cls, callback: Callable[[], None]) -> None:
+        """
+        Call ``callback`` whenever instances of the class are reset.
+
+        :arg callback: the callback, e.g. to drop a cached instance
+        """
+        cls.__reset_callbacks.append(callback)
+
+
+class Singleton(_SingletonBase):
     """
     Thread-safe singleton metaclass.
 
@@ -28,76 +512,596 @@ class Singleton(type):
 
     """
 
-    __instances: ClassVar[MutableMapping[Type, Any]] = {}
-    __locks: ClassVar[MutableMapping[Type, threading.Lock]] = defaultdict(threading.Lock)
+    def __init__(
+        cls, name: str, bases: Tuple[type, ...], namespace: Dict[str, Any], **kwargs: Any,
+    ) -> None:
+        super().__init__(name, bases, namespace, **kwargs)
+        # stored on the class rather than in dicts keyed by class, so that a discarded class (e.g.
+        # the class of a dynamically created factory) is garbage collected along with its instance
+        cls.__instance: Any = _MISSING
+        cls.__multiton: Optional[_Multiton] = cls.__new_multiton()
+        cls.__lock = threading.Lock()
 
     def __call__(cls: Type[T], *args: Any, **kwargs: Any) -> T:  # noqa: D102
-        if cls not in Singleton.__instances:
-            with Singleton.__locks[cls]:
-                if cls not in Singleton.__instances:  # pragma: no branch
+        instance = cls.__instance  # type: ignore
+        if instance is _MISSING:
+            multiton = cls.__multiton  # type: ignore
+            if multiton is not None:
+                return multiton.get(cls, args, kwargs)  # type: ignore
+            lock = cls.__lock  # type: ignore
+            _acquire(cls, lock)
+            try:
+                instance = cls.__instance  # type: ignore
+                if instance is _MISSING:  # pragma: no branch
                     # double checked locking pattern
-                    Singleton.__instances[cls] = super().__call__(*args, **kwargs)  # type: ignore
-        return Singleton.__instances[cls]  # type: ignore
+                    instance = cls._construct(*args, **kwargs)  # type: ignore
+                    cls.__instance = instance  # type: ignore
+            finally:
+                lock.release()
+        return instance  # type: ignore
+
+    def __new_multiton(cls) -> Optional[_Multiton]:
+        """
+        Create the store of the keyed instances of the class.
+
+        :return: the store, or None if the class isn't keyed
+        """
+        multiton_factory = cls._multiton_factory
+        return None if multiton_factory is None else multiton_factory()
+
+    def _get_instances(cls, current_scope: bool = False) -> List[Any]:
+        instance = cls.__instance
+        instances = [] if instance is _MISSING else [instance]
+        multiton = cls.__multiton
+        if multiton is not None:
+            instances.extend(multiton.values())
+        return instances
+
+    def _forget_instances(cls, current_scope: bool) -> List[Any]:
+        with cls.__lock:
+            instances = cls._get_instances()
+            cls.__instance = _MISSING
+            cls.__multiton = cls.__new_multiton()
+        return instances
 
 
-class ProcessSingleton(type):
+class _ScopedSingleton(_SingletonBase):
     """
-    Thread-safe process-based singleton metaclass.
+    Base class for thread-safe singleton metaclasses that create one instance per scope.
 
-    Ensures that one instance is created per process.
+    Subclasses must implement ``_get_ident``, returning the identifier of the current scope.
+
+    Every class keeps its own instances, one per scope, and a lock per scope that is only held while
+    the instance is being constructed. Once created, an instance is returned with a single dict
+    lookup and no locking.
+
+    A scope is evicted once its owner (see ``_get_scope_owner``) is garbage collected. Set
+    ``max_scopes`` on a metaclass subclass to bound the number of scopes kept alive per class,
+    evicting the oldest ones first::
+
+        class BoundedGeventSingleton(GeventSingleton):
+            max_scopes = 10000
+
+    Pass ``on_scope_exit`` as a class keyword argument to be called with every instance of a scope
+    (including keyed ones) when its owner exits, e.g. to close the clients of a thread as soon as it
+    exits instead of when they are garbage collected::
+
+        class Client(metaclass=ThreadSingleton, on_scope_exit=lambda client: client.close()):
+            ...
+
+    ``on_scope_exit`` is called in the exiting thread (or wherever the owner is garbage collected),
+    and is not called for the scopes evicted by ``max_scopes``, or reset by
+    :func:`~singletons.reset_instances`.
     """
 
-    __pids: ClassVar[MutableMapping[int, MutableMapping[Type, Any]]] = {}
-    __lock = threading.Lock()
+    max_scopes: ClassVar[Optional[int]] = None
+
+    def __init__(  # noqa: WPS211
+        cls,
+        name: str,
+        bases: Tuple[type, ...],
+        namespace: Dict[str, Any],
+        on_scope_exit: Optional[Callable[[Any], None]] = None,
+        **kwargs: Any,
+    ) -> None:
+        if on_scope_exit is not None and not type(cls)._scopes_exit():
+            raise TypeError(f"{type(cls).__name__} doesn't support on_scope_exit")
+        super().__init__(name, bases, namespace, **kwargs)
+        if on_scope_exit is None:
+            on_scope_exit = getattr(cls, "_on_scope_exit", None)
+        cls._on_scope_exit: Optional[Callable[[Any], None]] = on_scope_exit
+        cls.__instances: MutableMapping[Hashable, Any] = {}
+        # keyed classes keep a _Multiton per scope here instead, so their hit path misses above
+        cls.__multitons: MutableMapping[Hashable, _Multiton] = {}
+        cls.__locks: MutableMapping[Hashable, threading.Lock] = {}
 
     def __call__(cls: Type[T], *args: Any, **kwargs: Any) -> T:  # noqa: D102
-        pids = ProcessSingleton.__pids
-        pid = cls._get_ident()  # type: ignore
-        if pid not in pids:
-            with ProcessSingleton.__lock:
-                if pid not in pids:  # pragma: no branch
-                    # double checked locking pattern
-                    pids[pid] = {}
-                    pids[pid][cls] = super().__call__(*args, **kwargs)  # type: ignore
-        my_pid = pids[pid]
-        if cls not in my_pid:
-            with ProcessSingleton.__lock:
-                if cls not in my_pid:  # pragma: no branch
-                    # double checked locking pattern
-                    my_pid[cls] = super().__call__(*args, **kwargs)  # type: ignore
-        return my_pid[cls]  # type: ignore
+        ident = cls._get_ident()  # type: ignore
+        try:
+            return cls.__instances[ident]  # type: ignore
+        except KeyError:
+            return cls.__create(ident, args, kwargs)  # type: ignore
+
+    def __create(cls, ident: Hashable, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        """
+        Construct the instance for the current scope, or get it from the keyed instances.
+
+        :arg ident: the identifier of the current scope
+        :arg args: positional arguments for the constructor
+        :arg kwargs: keyword arguments for the constructor
+        :return: the instance
+        """
+        multiton_factory = cls._multiton_factory
+        if multiton_factory is None:
+            return cls.__get_or_create(
+                ident, cls.__instances, functools.partial(cls._construct, *args, **kwargs),
+            )
+        multiton = cls.__multitons.get(ident)
+        if multiton is None:
+
+            def construct_multiton() -> _Multiton:  # noqa: WPS430
+                new_multiton = multiton_factory()
+                # tracks the scope after the instances constructed along the way, which are then
+                # passed to on_scope_exit after this one
+                new_multiton.get(cls, args, kwargs)
+                return new_multiton
+
+            multiton = cls.__get_or_create(ident, cls.__multitons, construct_multiton)
+        return multiton.get(cls, args, kwargs)
+
+    def __get_or_create(
+        cls, ident: Hashable, store: MutableMapping[Hashable, Any], construct: Callable[[], Any],
+    ) -> Any:
+        """
+        Get the value for the current scope, holding only the lock of this scope and class.
+
+        :arg ident: the identifier of the current scope
+        :arg store: the values of the class, by scope
+        :arg construct: constructor of the value
+        :return: the value
+        """
+        locks = cls.__locks
+        lock = locks.setdefault(ident, threading.Lock())
+        _acquire(cls, lock)
+        try:
+            # double checked locking pattern
+            try:
+                value = store[ident]
+            except KeyError:
+                value = construct()
+                owner = cls._get_scope_owner()
+                if owner is not None:
+                    # evict the scope as soon as its owner is gone, before its ident can be reused
+                    ident = _track_scope(owner, cls, ident)
+                store[ident] = value
+            # late callers find the value, so the lock is no longer needed
+            locks.pop(ident, None)
+        finally:
+            lock.release()
+        cls.__drop_oldest_scopes(store)
+        return value
+
+    def __drop_oldest_scopes(cls, store: MutableMapping[Hashable, Any]) -> None:
+        """
+        Drop the values of the oldest scopes beyond the ``max_scopes`` of the metaclass.
+
+        :arg store: the values of the class, by scope
+        """
+        max_scopes = type(cls).max_scopes
+        if max_scopes is not None:
+            while len(store) > max_scopes:
+                evicted = next(iter(store))
+                store.pop(evicted, None)
+                cls.__locks.pop(evicted, None)
+
+    def _get_instances(cls, current_scope: bool = False) -> List[Any]:
+        instances = cls.__scoped_values(cls.__instances, current_scope)
+        for multiton in cls.__scoped_values(cls.__multitons, current_scope):
+            instances.extend(multiton.values())
+        return instances
+
+    def _forget_instances(cls, current_scope: bool) -> List[Any]:
+        instances = cls._get_instances(current_scope)
+        if current_scope:
+            ident = cls._get_ident()
+            cls.__instances.pop(ident, None)
+            cls.__multitons.pop(ident, None)
+        else:
+            cls.__instances.clear()
+            cls.__multitons.clear()
+        return instances
+
+    def _evict_scope(cls, ident: Hashable) -> None:
+        """
+        Drop the instances of a scope whose owner is gone, passing them to ``on_scope_exit``.
+
+        :arg ident: the identifier of the scope
+        """
+        instance = cls.__instances.pop(ident, _MISSING)
+        multiton = cls.__multitons.pop(ident, None)
+        cls.__locks.pop(ident, None)
+        on_scope_exit = cls._on_scope_exit
+        if on_scope_exit is None:
+            return
+        instances = [] if instance is _MISSING else [instance]
+        if multiton is not None:
+            instances.extend(multiton.values())
+        _call_each(on_scope_exit, instances)
+
+    def _get_scope_instances(cls, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> List[Any]:
+        """
+        Return the instance of every scope, for the given constructor arguments if keyed.
+
+        :arg args: positional arguments for the constructor of keyed instances
+        :arg kwargs: keyword arguments for the constructor of keyed instances
+        :return: the instances of the scopes holding one
+        """
+        if cls._multiton_factory is None:
+            return list(cls.__instances.values())
+        key = _make_key(args, kwargs)
+        instances = []
+        for multiton in list(cls.__multitons.values()):
+            try:
+                instances.append(multiton.instances[key])
+            except KeyError:
+                pass  # noqa: WPS420
+        return instances
+
+    def _get_scopes(cls) -> Dict[Optional[Hashable], List[Any]]:
+        scopes: Dict[Optional[Hashable], List[Any]] = {
+            ident: [instance] for ident, instance in list(cls.__instances.items())
+        }
+        for ident, multiton in list(cls.__multitons.items()):  # noqa: WPS440
+            scopes.setdefault(ident, []).extend(multiton.values())
+        return scopes
+
+    def __scoped_values(cls, store: MutableMapping[Hashable, Any], current_scope: bool) -> List[Any]:
+        """
+        Return the values of ``store`` for the current scope, or for every scope.
+
+        :arg store: the values of the class, by scope
+        :arg current_scope: only return the value of the current scope
+        :return: the values
+        """
+        if not current_scope:
+            return list(store.values())
+        try:
+            return [store[cls._get_ident()]]
+        except KeyError:
+            return []
+
+    def _forget_locks(cls) -> None:
+        """Drop the scope locks, e.g. in a forked child."""
+        # a lock may have been held by another thread of the parent, which doesn't exist here
+        cls.__locks.clear()
+
+    def _after_fork_in_child(cls) -> None:
+        """Drop the instances inherited from the parent process, or re-initialise them."""
+        inherited = list(cls.__instances.items())
+        inherited_multitons = list(cls.__multitons.items())
+        cls.__instances.clear()
+        cls.__multitons.clear()
+        cls._forget_locks()
+        if getattr(cls, "after_fork", None) is None:
+            return
+        for ident, instance in inherited:
+            instance.after_fork()
+            cls.__instances[ident] = instance
+        for ident, multiton in inherited_multitons:  # noqa: WPS440
+            multiton.locks.clear()
+            for instance in multiton.instances.values():  # noqa: WPS440
+                instance.after_fork()
+            cls.__multitons[ident] = multiton
 
     @staticmethod
     def _get_ident() -> int:
         """
         Return the identifier for the scope.
 
-        :return: an int unique per process
+        :return: an int unique per scope
+        """
+        raise NotImplementedError()  # pragma: no cover
+
+    @staticmethod
+    def _get_scope_owner() -> Optional[object]:
+        """
+        Return the object whose lifetime bounds the scope.
+
+        :return: a weakly referenceable object, or None if the scope is never evicted
+        """
+        return None
+
+    @classmethod
+    def _scopes_exit(mcs) -> bool:  # noqa: N804
+        """
+        Tell whether the scopes have an owner, whose exit evicts them.
+
+        :return: False if the scopes last as long as the process
+        """
+        return mcs._get_scope_owner is not _ScopedSingleton._get_scope_owner
+
+
+class ProcessSingleton(_ScopedSingleton):
+    """
+    Thread-safe process-based singleton metaclass.
+
+    Ensures that one instance is created per process.
+
+    In the child process of a fork, the instances inherited from the parent are dropped. A class can
+    keep its instance across forks instead by defining an ``after_fork()`` method, which is called in
+    the child to re-initialise the instance (e.g. to reconnect)::
+
+        class Client(metaclass=ProcessSingleton):
+            def __init__(self):
+                self.connect()
+
+            def after_fork(self):
+                self.connect()
+    """
+
+    def __init__(
+        cls, name: str, bases: Tuple[type, ...], namespace: Dict[str, Any], **kwargs: Any,
+    ) -> None:
+        super().__init__(name, bases, namespace, **kwargs)
+        register_after_fork(cls)
+
+    if FORK_HOOKS:
+
+        @staticmethod
+        def _get_ident() -> int:
+            """
+            Return the identifier for the scope.
+
+            The instances are reset in the child process after a fork, so the process scope
+            doesn't need to be told apart with :func:`os.getpid` on every call.
+
+            :return: an int unique per process
+            """
+            return 0
+
+    else:  # pragma: no cover
+        _get_ident = staticmethod(os.getpid)
+
+    @classmethod
+    def _get_live_scopes(mcs) -> Optional[Set[Hashable]]:  # noqa: N804
+        """
+        Return the identifier of the current process, the only one whose instances are used.
+
+        :return: the identifiers
         """
-        return os.getpid()
+        return {mcs._get_ident()}
+
+
+class _ThreadScopeOwner:
+    """Sentinel stored in thread-local storage, released when its thread exits."""
 
 
-class ThreadSingleton(type):
+_thread_scope = threading.local()
+
+
+class ThreadSingleton(_ScopedSingleton):
     """
     Thread-based singleton metaclass.
 
-    Ensures that one instance is created per thread.
+    Ensures that one instance is created per thread. The instances of a thread are released when the
+    thread exits, and passed to the ``on_scope_exit`` class keyword argument if any, e.g. to close
+    them deterministically::
+
+        class Client(metaclass=ThreadSingleton, on_scope_exit=lambda client: client.close()):
+            ...
+    """
+
+    _get_ident = staticmethod(threading.get_ident)
+
+    @staticmethod
+    def _get_live_scopes() -> Optional[Set[Hashable]]:
+        """
+        Return the identifiers of the running threads.
+
+        :return: the identifiers
+        """
+        return {thread.ident for thread in threading.enumerate()}
+
+    @staticmethod
+    def _get_scope_owner() -> Optional[object]:
+        """
+        Return a sentinel object that lives exactly as long as the current thread.
+
+        :return: the sentinel of the current thread
+        """
+        try:
+            owner: _ThreadScopeOwner = _thread_scope.owner
+        except AttributeError:
+            owner = _ThreadScopeOwner()
+            _thread_scope.owner = owner
+        return owner
+
+
+class ExecutorScope:
+    """
+    Scope shared by the worker threads of an executor or thread pool, see :class:`ExecutorSingleton`.
+
+    Pass its ``enter`` method as the ``initializer`` of the executor. The ``initializer`` of the
+    scope, if any, is called with ``initargs`` afterwards.
+    """
+
+    def __init__(
+        self, initializer: Optional[Callable[..., Any]] = None, initargs: Tuple[Any, ...] = (),
+    ) -> None:
+        self._initializer = initializer
+        self._initargs = initargs
+
+    def enter(self) -> None:
+        """Make the current thread use this scope, until it exits."""
+        _executor_scope.scope = self
+        if self._initializer is not None:
+            self._initializer(*self._initargs)
+
+
+class _ExecutorScopeLocal(threading.local):
+    """The executor scope of the current thread, if any."""
+
+    # a class default rather than a missing attribute, which costs an AttributeError on every call
+    # of the singletons outside of executors
+    scope: Optional[ExecutorScope] = None
+
+
+_executor_scope = _ExecutorScopeLocal()
+
+
+class ExecutorSingleton(_ScopedSingleton):
+    """
+    Executor-based singleton metaclass.
+
+    Ensures that one instance is created per :class:`ExecutorScope`, shared by the worker threads
+    of the executor it initialised, instead of one per thread::
+
+        scope = ExecutorScope()
+        executor = ThreadPoolExecutor(max_workers=32, initializer=scope.enter)
+
+    Outside of the workers of such an executor, one instance is created per thread, as with
+    :class:`ThreadSingleton`. The instances of a scope are released once the executor has shut down
+    and the scope is no longer referenced.
+    """
+
+    @staticmethod
+    def _get_ident() -> int:
+        """
+        Return the identifier for the scope.
+
+        :return: the id of the scope of the current thread's executor, or the thread ident
+        """
+        scope = _executor_scope.scope
+        if scope is None:
+            return threading.get_ident()
+        return id(scope)
+
+    @staticmethod
+    def _get_scope_owner() -> Optional[object]:
+        """
+        Return the object whose lifetime bounds the scope.
+
+        :return: the scope of the current thread's executor, or the sentinel of the thread
+        """
+        scope = _executor_scope.scope
+        if scope is None:
+            return ThreadSingleton._get_scope_owner()
+        return scope
+
+
+_CONTEXT_UNSUPPORTED = ("maxsize", "ttl", "on_evict")
+
+
+class ContextSingleton(_SingletonBase):
     """
+    Context-based singleton metaclass.
+
+    Ensures that one instance is created per :class:`contextvars.Context`. As asyncio runs every
+    task in a copy of the context it was created from, an instance created inside a task is private
+    to that task and is released along with it. Instances that already exist when a task is created
+    are inherited by the task.
 
-    __local: Optional[threading.local] = None
-    __lock = threading.Lock()
+    Instances are held by the contexts that created them, so a discarded class (e.g. of a
+    dynamically created factory) is only garbage collected along with those contexts.
+
+    Keyed instances can't be bounded, as they are shared with the contexts copied from theirs.
+
+    Requires Python 3.7+.
+    """
+
+    def __init__(
+        cls, name: str, bases: Tuple[type, ...], namespace: Dict[str, Any], **kwargs: Any,
+    ) -> None:
+        # an instance evicted from one context could still be used by the others
+        unsupported = [option for option in _CONTEXT_UNSUPPORTED if option in kwargs]
+        if unsupported:
+            raise TypeError(f"{type(cls).__name__} doesn't support {', '.join(unsupported)}")
+        super().__init__(name, bases, namespace, **kwargs)
+        cls.__new_vars()
+
+    def __new_vars(cls) -> None:
+        """Create the context variables holding the instances, forgetting any previous ones."""
+        import contextvars  # noqa: WPS433
+
+        var_name = f"{cls.__module__}.{cls.__qualname__}"
+        cls.__var: "contextvars.ContextVar[Any]" = contextvars.ContextVar(var_name)
+        # keyed classes keep a _Multiton here instead, so their hit path misses above
+        cls.__multiton_var: "contextvars.ContextVar[_Multiton]" = contextvars.ContextVar(
+            f"{var_name}.multiton",
+        )
 
     def __call__(cls: Type[T], *args: Any, **kwargs: Any) -> T:  # noqa: D102
-        cls_id = str(id(cls))
-        if ThreadSingleton.__local is None:
-            with ThreadSingleton.__lock:
-                if ThreadSingleton.__local is None:  # pragma: no branch
-                    # double checked locking pattern
-                    ThreadSingleton.__local = threading.local()
-        if not hasattr(ThreadSingleton.__local, cls_id):
-            instance = super().__call__(*args, **kwargs)  # type: ignore
-            setattr(ThreadSingleton.__local, cls_id, instance)
-        return getattr(ThreadSingleton.__local, cls_id)  # type: ignore
+        var = cls.__var  # type: ignore
+        try:
+            return var.get()  # type: ignore
+        except LookupError:
+            multiton_factory = cls._multiton_factory  # type: ignore
+            if multiton_factory is None:
+                instance = cls._construct(*args, **kwargs)  # type: ignore
+                var.set(instance)
+                return instance  # type: ignore
+        return cls.__get_keyed(multiton_factory, args, kwargs)  # type: ignore
+
+    def __get_keyed(
+        cls, multiton_factory: Callable[[], _Multiton], args: Tuple[Any, ...], kwargs: Dict[str, Any],
+    ) -> Any:
+        """
+        Get the keyed instance for the constructor arguments in the current context.
+
+        :arg multiton_factory: constructor of the store of keyed instances
+        :arg args: positional arguments for the constructor
+        :arg kwargs: keyword arguments for the constructor
+        :return: the instance
+        """
+        multiton_var = cls.__multiton_var
+        multiton = multiton_var.get(None)
+        key = _make_key(args, kwargs)
+        if multiton is None:
+            multiton = multiton_factory()
+        else:
+            try:
+                return multiton._lookup(key)  # noqa: WPS437
+            except KeyError:
+                # copy on write, as the contexts copied from this one (e.g. tasks) share the store
+                multiton = multiton.copy()
+        instance = cls._construct(*args, **kwargs)
+        multiton._store(key, instance)  # noqa: WPS437
+        multiton_var.set(multiton)
+        return instance
+
+    def _get_instances(cls, current_scope: bool = False) -> List[Any]:
+        """
+        Return the instances of the class visible from the current context.
+
+        The instances of other contexts can't be listed.
+
+        :arg current_scope: ignored, only the current context is visible
+        :return: the instances, including keyed ones
+        """
+        instances = []
+        try:
+            instances.append(cls.__var.get())
+        except LookupError:
+            pass  # noqa: WPS420
+        multiton = cls.__multiton_var.get(None)
+        if multiton is not None:
+            instances.extend(multiton.values())
+        return instances
+
+    def _forget_instances(cls, current_scope: bool) -> List[Any]:
+        """
+        Drop the instances of the class, in every context.
+
+        A context variable can't be unset, so the variables are replaced, which forgets the
+        instances of every context, even with ``current_scope``. Only the instances of the current
+        context are returned.
+
+        :arg current_scope: ignored, every context is reset
+        :return: the dropped instances of the current context
+        """
+        instances = cls._get_instances()
+        cls.__new_vars()
+        return instances
 
 
 class GreenthreadSingleton(ProcessSingleton):
@@ -108,19 +1112,28 @@ class GreenthreadSingleton(ProcessSingleton):
     autodetected).
     """
 
-    @staticmethod
-    def _get_ident() -> int:
+    _get_ident = staticmethod(greenthread_ident)
+    _get_scope_owner = staticmethod(greenthread_current)
+
+    @classmethod
+    def _get_live_scopes(mcs) -> Optional[Set[Hashable]]:  # noqa: N804
         """
-        Return the identifier for the greenthread.
+        Return the identifiers of the greenthreads that still exist.
 
-        :return: an int unique for the greenthread
+        Finding them walks every object tracked by the garbage collector, which is slow.
+
+        :return: the identifiers, or those of the process if there is no greenthread environment
         """
-        return greenthread_ident()
+        if mcs._get_scope_owner() is None:
+            return super()._get_live_scopes()
+        return live_greenlet_idents()
 
 
 class EventletSingleton(ProcessSingleton):
     """Greenthread-based singleton metaclass, targeting eventlet specifically."""
 
+    _get_live_scopes = staticmethod(live_greenlet_idents)
+
     @staticmethod
     def _get_ident() -> int:
         """
@@ -132,10 +1145,23 @@ class EventletSingleton(ProcessSingleton):
 
         return eventlet.corolocal.get_ident()
 
+    @staticmethod
+    def _get_scope_owner() -> Optional[object]:
+        """
+        Return the current greenthread.
+
+        :return: the current greenlet
+        """
+        import eventlet.greenthread  # noqa: WPS433
+
+        return eventlet.greenthread.getcurrent()
+
 
 class GeventSingleton(ProcessSingleton):
     """Greenthread-based singleton metaclass, targeting gevent specifically."""
 
+    _get_live_scopes = staticmethod(live_greenlet_idents)
+
     @staticmethod
     def _get_ident() -> int:
         """
@@ -147,12 +1173,191 @@ class GeventSingleton(ProcessSingleton):
 
         return gevent.thread.get_ident()
 
+    @staticmethod
+    def _get_scope_owner() -> Optional[object]:
+        """
+        Return the current greenthread.
+
+        :return: the current greenlet
+        """
+        import gevent  # noqa: WPS433
+
+        return gevent.getcurrent()
+
+
+# multiplier of Fibonacci hashing, spreading aligned thread idents evenly over the shards
+_SHARD_MIX = 0x9E3779B97F4A7C15  # noqa: WPS432
+_SHARD_MASK = 0xFFFFFFFFFFFFFFFF  # noqa: WPS432
+_SHARDED_UNSUPPORTED = ("maxsize", "ttl", "on_evict", "on_scope_exit")
+
+
+class ShardedSingleton(_ScopedSingleton):
+    """
+    Sharded singleton metaclass.
+
+    Ensures that at most ``shards`` instances (replicas) are created per process, and routes each
+    thread to one of them by hashing its ident, so that an internally locked object such as a
+    counter, a rate limiter or a cache isn't contended by every thread::
+
+        def total(counters):
+            return sum(counter.count for counter in counters)
+
+        class Counter(metaclass=ShardedSingleton, shards=8, aggregate=total):
+            def __init__(self):
+                self.lock = threading.Lock()
+                self.count = 0
+
+            def increment(self):
+                with self.lock:
+                    self.count += 1
+
+        Counter().increment()
+        Counter.aggregate()
+
+    ``shards`` defaults to the number of CPUs. A replica is created on the first call of a thread
+    routed to its shard, and each thread then keeps its replica as a :class:`ThreadSingleton` would,
+    so returning it costs a single dict lookup. Reads merge the replicas with ``aggregate()``, which
+    passes the list of replicas to the ``aggregate`` class keyword argument, or returns the list
+    itself without it. Keyed classes aggregate the replicas of the constructor arguments passed to
+    ``aggregate()``, and can't be bounded.
+
+    The replicas are shared by threads, so they are only dropped by a reset of every scope, and in
+    the child process of a fork.
+    """
+
+    _get_ident = staticmethod(threading.get_ident)
+    _get_scope_owner = staticmethod(ThreadSingleton._get_scope_owner)
+
+    def __init__(  # noqa: WPS211
+        cls,
+        name: str,
+        bases: Tuple[type, ...],
+        namespace: Dict[str, Any],
+        shards: Optional[int] = None,
+        aggregate: Optional[Callable[[List[Any]], Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        unsupported = [option for option in _SHARDED_UNSUPPORTED if option in kwargs]
+        if unsupported:
+            raise TypeError(f"sharded singletons don't support {', '.join(unsupported)}")
+        super().__init__(name, bases, namespace, **kwargs)
+        if shards is None:
+            shards = getattr(cls, "_shards", None) or os.cpu_count() or 1
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        if aggregate is None:
+            aggregate = getattr(cls, "_aggregate", None)
+        cls._shards: int = shards
+        cls._aggregate: Optional[Callable[[List[Any]], Any]] = aggregate
+        # by shard, or by shard and key for keyed classes
+        cls.__replicas: Dict[Hashable, Any] = {}
+        cls.__replica_locks: Dict[Hashable, threading.Lock] = {}
+        register_after_fork(cls)
+
+    def aggregate(cls, *args: Any, **kwargs: Any) -> Any:
+        """
+        Merge the replicas of the current process.
+
+        :arg args: positional arguments for the constructor of keyed replicas
+        :arg kwargs: keyword arguments for the constructor of keyed replicas
+        :return: the result of the ``aggregate`` class keyword argument, or the replicas
+        """
+        if cls._multiton_factory is None:
+            replicas = list(cls.__replicas.values())
+        else:
+            key = _make_key(args, kwargs)
+            replicas = [
+                replica
+                for replica_key, replica in list(cls.__replicas.items())
+                if replica_key[1] == key  # type: ignore
+            ]
+        aggregate = cls._aggregate
+        return replicas if aggregate is None else aggregate(replicas)
+
+    def _construct(cls, *args: Any, **kwargs: Any) -> Any:
+        """
+        Get the replica of the shard of the current thread, constructing it if needed.
+
+        :arg args: positional arguments for the constructor
+        :arg kwargs: keyword arguments for the constructor
+        :return: the replica
+        """
+        replica_key = cls.__replica_key(args, kwargs)
+        try:
+            return cls.__replicas[replica_key]
+        except KeyError:
+            lock = cls.__replica_locks.setdefault(replica_key, threading.Lock())
+        _acquire(cls, lock)
+        try:
+            # double checked locking pattern
+            try:
+                return cls.__replicas[replica_key]
+            except KeyError:
+                replica = super()._construct(*args, **kwargs)
+            cls.__replicas[replica_key] = replica
+            cls.__replica_locks.pop(replica_key, None)
+        finally:
+            lock.release()
+        return replica
+
+    def __replica_key(cls, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Hashable:
+        """
+        Return the key of the replica of the current thread.
+
+        :arg args: positional arguments for the constructor
+        :arg kwargs: keyword arguments for the constructor
+        :return: the shard, along with the key of the arguments if keyed
+        """
+        mixed = ((cls._get_ident() * _SHARD_MIX) & _SHARD_MASK) >> 32
+        shard = mixed % cls._shards
+        if cls._multiton_factory is None:
+            return shard
+        return (shard, _make_key(args, kwargs))
+
+    def _get_instances(cls, current_scope: bool = False) -> List[Any]:
+        if current_scope:
+            # the replicas used by the current thread
+            return super()._get_instances(current_scope)
+        return list(cls.__replicas.values())
+
+    def _get_scopes(cls) -> Dict[Optional[Hashable], List[Any]]:
+        scopes: Dict[Optional[Hashable], List[Any]] = {}
+        for replica_key, replica in list(cls.__replicas.items()):
+            shard = replica_key if cls._multiton_factory is None else replica_key[0]  # type: ignore
+            scopes.setdefault(shard, []).append(replica)
+        return scopes
+
+    def _forget_instances(cls, current_scope: bool) -> List[Any]:
+        """
+        Drop the replicas, or only the routing of the current thread to its replicas.
+
+        :arg current_scope: only make the current thread look up its replicas again, as they are
+            shared with other threads
+        :return: the dropped replicas, none with ``current_scope``
+        """
+        replicas: List[Any] = []
+        if not current_scope:
+            replicas = list(cls.__replicas.values())
+            cls.__replicas = {}
+        super()._forget_instances(current_scope)
+        return replicas
+
+    def _after_fork_in_child(cls) -> None:
+        """Drop the replicas inherited from the parent process."""
+        # a lock may have been held by another thread of the parent, which doesn't exist here
+        cls.__replica_locks = {}
+        cls._forget_locks()
+        cls._forget_instances(current_scope=False)
+
 
 SINGLETON_TYPES = (
     Singleton,
     ProcessSingleton,
     ThreadSingleton,
+    ExecutorSingleton,
+    ContextSingleton,
     GreenthreadSingleton,
     EventletSingleton,
     GeventSingleton,
+    ShardedSingleton,
 )
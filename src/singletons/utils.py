@@ -1,12 +1,21 @@
 import contextlib
+import gc
 import os
 import sys
+import threading
 import warnings
+import weakref
+from typing import Any, Callable, Hashable, List, Optional, Set
 
 from singletons.exceptions import NoGreenthreadEnvironmentWarning
 
 BOOLEAN_TRUE_STRINGS = frozenset(("true", "on", "ok", "y", "yes", "1"))
+FORK_HOOKS = hasattr(os, "register_at_fork")
 _greenthread_environment = None  # noqa: WPS121, WPS122
+_fork_aware: "weakref.WeakSet[Any]" = weakref.WeakSet()
+# singleton classes and factories that hold instances, in order of first creation
+_creations: "weakref.WeakKeyDictionary[Any, None]" = weakref.WeakKeyDictionary()
+_creations_lock = threading.Lock()
 
 
 def _detect_greenthread_environment() -> str:
@@ -46,28 +55,133 @@ def detect_greenthread_environment() -> str:
     return _greenthread_environment  # noqa: WPS121
 
 
+def redetect_greenthread_environment(environment: Optional[str] = None) -> str:
+    """
+    Forget the detected greenthread environment, and detect it again.
+
+    Call this if eventlet or gevent monkey-patching happens after greenthread scopes were first used.
+
+    :param environment: 'eventlet', 'gevent' or 'default' to use instead of detecting it
+    :return: 'eventlet', 'gevent', or 'default' (neither environment detected)
+    """
+    global _greenthread_environment, _greenthread_ident, _greenthread_current  # noqa: WPS420
+    _greenthread_environment = environment  # noqa: WPS122, WPS442
+    _greenthread_ident = _resolve_greenthread_ident  # noqa: WPS122, WPS442
+    _greenthread_current = _resolve_greenthread_current  # noqa: WPS122, WPS442
+    return detect_greenthread_environment()
+
+
 def greenthread_ident() -> int:
     """
     Get the identifier of the current greenthread environment.
 
     :return: get_ident() or 0 if no greenthread environment is detected.
     """
+    return _greenthread_ident()
+
+
+def greenthread_current() -> Optional[object]:
+    """
+    Get the current greenthread of the current greenthread environment.
+
+    :return: the current greenlet, or None if no greenthread environment is detected.
+    """
+    return _greenthread_current()
+
+
+def _resolve_greenthread_functions() -> None:
+    """Point the greenthread functions directly to those of the detected environment."""
+    global _greenthread_ident, _greenthread_current  # noqa: WPS420
     greenthread_environment = detect_greenthread_environment()
     if greenthread_environment == "eventlet":
         import eventlet.corolocal  # noqa: WPS433
+        import eventlet.greenthread  # noqa: WPS433
 
-        return eventlet.corolocal.get_ident()
-    if greenthread_environment == "gevent":
+        _greenthread_ident = eventlet.corolocal.get_ident  # noqa: WPS122, WPS442
+        _greenthread_current = eventlet.greenthread.getcurrent  # noqa: WPS122, WPS442
+    elif greenthread_environment == "gevent":
+        import gevent  # noqa: WPS433
         import gevent.thread  # noqa: WPS433
 
-        return gevent.thread.get_ident()
+        _greenthread_ident = gevent.thread.get_ident  # noqa: WPS122, WPS442
+        _greenthread_current = gevent.getcurrent  # noqa: WPS122, WPS442
+    else:
+        _greenthread_ident = _warn_no_greenthread_environment  # noqa: WPS122, WPS442
+        _greenthread_current = _no_greenthread  # noqa: WPS122, WPS442
+
+
+def _resolve_greenthread_ident() -> int:
+    """
+    Resolve the greenthread functions, then get the identifier of the current greenthread.
+
+    :return: get_ident() or 0 if no greenthread environment is detected.
+    """
+    _resolve_greenthread_functions()
+    return _greenthread_ident()
+
+
+def _resolve_greenthread_current() -> Optional[object]:
+    """
+    Resolve the greenthread functions, then get the current greenthread.
+
+    :return: the current greenlet, or None if no greenthread environment is detected.
+    """
+    _resolve_greenthread_functions()
+    return _greenthread_current()
+
+
+def _warn_no_greenthread_environment() -> int:
+    """
+    Warn that there is no greenthread environment, once per detection.
+
+    :return: 0
+    """
+    global _greenthread_ident  # noqa: WPS420
     warnings.warn(
         "No greenthread environment detected - falling back to global scope",
         NoGreenthreadEnvironmentWarning,
     )
+    _greenthread_ident = _no_greenthread_ident  # noqa: WPS122, WPS442
+    return 0
+
+
+def _no_greenthread_ident() -> int:
+    """
+    Get the identifier of the global scope used when there is no greenthread environment.
+
+    :return: 0
+    """
     return 0
 
 
+def _no_greenthread() -> None:
+    """Get the current greenthread when there is no greenthread environment."""
+
+
+def live_greenlet_idents() -> Optional[Set[Hashable]]:
+    """
+    Get the identifiers of the greenlets that haven't finished, as returned by eventlet and gevent.
+
+    This walks every object tracked by the garbage collector, so it is slow.
+
+    :return: the identifiers, or None if greenlet isn't installed
+    """
+    try:
+        import greenlet  # noqa: WPS433
+    except ImportError:
+        return None
+    return {
+        id(obj)
+        for obj in gc.get_objects()
+        # finished greenlets may still be referenced, e.g. by their spawner
+        if isinstance(obj, greenlet.greenlet) and not obj.dead
+    }
+
+
+_greenthread_ident: Callable[[], int] = _resolve_greenthread_ident
+_greenthread_current: Callable[[], Optional[object]] = _resolve_greenthread_current
+
+
 def env_to_bool(key: str) -> bool:
     """
     Parse an environment variable and coerce it to a boolean value.
@@ -77,3 +191,70 @@ def env_to_bool(key: str) -> bool:
     """
     str_value = os.environ.get(key, "")
     return str_value.strip().lower() in BOOLEAN_TRUE_STRINGS
+
+
+def register_after_fork(obj: Any) -> None:
+    """
+    Call ``obj._after_fork_in_child()`` in the child process after every fork.
+
+    Only a weak reference to ``obj`` is kept. Does nothing if :func:`os.register_at_fork` isn't
+    available (Python < 3.7).
+
+    :param obj: the object to notify
+    """
+    _fork_aware.add(obj)
+
+
+def record_creation(owner: Any) -> None:
+    """
+    Record that ``owner`` (a singleton class or factory) holds instances.
+
+    Owners are listed by :func:`created_owners` in the order of their first recorded creation, so
+    that an owner whose instance is constructed while constructing another one comes first. Only a
+    weak reference to ``owner`` is kept.
+
+    :param owner: the singleton class or factory
+    """
+    if owner not in _creations:
+        with _creations_lock:
+            _creations.setdefault(owner, None)
+
+
+def forget_creation(owner: Any) -> None:
+    """
+    Forget that ``owner`` holds instances, once they were all reset.
+
+    :param owner: the singleton class or factory
+    """
+    with _creations_lock:
+        _creations.pop(owner, None)
+
+
+def created_owners() -> List[Any]:
+    """
+    Get the singleton classes and factories holding instances.
+
+    :return: the owners, in the order of their first recorded creation
+    """
+    with _creations_lock:
+        return list(_creations)
+
+
+def _after_fork_in_child() -> None:
+    """Notify every registered object, even if some of them fail."""
+    global _creations_lock  # noqa: WPS420
+    # the lock may have been held by another thread of the parent, which doesn't exist here
+    _creations_lock = threading.Lock()  # noqa: WPS122, WPS442
+    error = None
+    for obj in list(_fork_aware):
+        try:
+            obj._after_fork_in_child()  # noqa: WPS437
+        except Exception as exc:  # noqa: B902
+            error = error or exc
+    if error is not None:
+        # reported by the interpreter, as fork hooks can't raise
+        raise error
+
+
+if FORK_HOOKS:  # pragma: no branch
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1 @@
+def getcurrent() -> object: ...
@@ -0,0 +1,2 @@
+class greenlet:
+    dead: bool
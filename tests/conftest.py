@@ -0,0 +1,12 @@
+from typing import Generator
+
+import pytest
+import singletons
+
+
+@pytest.fixture()
+def _redetect_greenthread_environment() -> Generator:
+    """Start from a fresh greenthread environment detection."""
+    singletons.redetect_greenthread_environment()
+    yield
+    singletons.redetect_greenthread_environment()
@@ -0,0 +1,5 @@
+"""Module imported lazily by ``shared``."""
+
+
+class Dependency:
+    """Class imported lazily by ``shared``."""
@@ -15,7 +15,40 @@ def thread_object() -> object:
     return object()
 
 
+@singletons.ExecutorFactory
+def executor_object() -> object:
+    """Return an executor object."""
+    return object()
+
+
+@singletons.ShardedFactory(shards=2)
+def sharded_object() -> object:
+    """Return a sharded object."""
+    return object()
+
+
+@singletons.PooledFactory(size=2)
+def pooled_object() -> object:
+    """Return a pooled object."""
+    return object()
+
+
+@singletons.AsyncGlobalFactory
+async def async_object() -> object:
+    """Return a global object, asynchronously."""
+    return object()
+
+
 simple_obj = object()
+lazy_dependency = singletons.Lazy("lazy_dependency:Dependency")
+lazy_object = singletons.Lazy(object)
+rebound_object = None
+
+
+def rebind_object(new_object: object) -> None:
+    """Rebind a global of this module, as e.g. an ``init()`` function would."""
+    global rebound_object  # noqa: WPS420
+    rebound_object = new_object
 
 
 class _Shared(singletons.SharedModule):
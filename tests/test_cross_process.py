@@ -0,0 +1,154 @@
+import multiprocessing
+import os
+import sys
+import uuid
+from multiprocessing.managers import DictProxy
+
+import pytest
+import singletons
+
+JOIN_TIMEOUT = 2
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "register_at_fork"), reason="requires os.register_at_fork",
+)
+
+
+class Counter:
+    """Object shared through the manager."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def increment(self) -> int:
+        self.count += 1
+        return self.count
+
+
+# manager factories must be defined before the manager is started
+@singletons.ManagerFactory
+def shared_counter() -> Counter:
+    return Counter()
+
+
+@singletons.ManagerFactory(proxytype=DictProxy)
+def shared_dict() -> dict:
+    return {}
+
+
+@singletons.SharedMemoryFactory
+def lookup_table() -> bytes:
+    return bytes(range(256)) * 4
+
+
+def increment_in_child(q: multiprocessing.Queue) -> None:
+    """Helper function incrementing the shared counter in a child process."""
+    shared_dict()["child"] = os.getpid()
+    q.put(shared_counter().increment())
+
+
+def test_manager_factory() -> None:
+    """Test that forked children use the object of the parent process."""
+    assert shared_counter() is shared_counter()
+    start = shared_counter().increment()
+    context = multiprocessing.get_context("fork")
+    test_q = context.Queue()
+    p = context.Process(target=increment_in_child, args=(test_q,))
+    p.start()
+    assert test_q.get(timeout=JOIN_TIMEOUT) == start + 1
+    p.join(JOIN_TIMEOUT)
+    assert shared_counter().increment() == start + 2
+    assert shared_dict()["child"] == p.pid
+    singletons.warm_up(shared_counter)
+
+
+def test_manager_factory_defined_late() -> None:
+    """Test that manager factories can't be defined once the manager is started."""
+    shared_counter()
+    with pytest.raises(RuntimeError):
+        singletons.ManagerFactory(Counter)
+
+
+def read_in_child(q: multiprocessing.Queue) -> None:
+    """Helper function reading the lookup table in a child process."""
+    q.put(bytes(lookup_table()))
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason="requires multiprocessing.shared_memory")
+def test_shared_memory_factory() -> None:
+    """Test that the object is copied once, and read by forked children."""
+    table = lookup_table()
+    assert table is lookup_table()
+    assert table.readonly
+    assert bytes(table) == bytes(range(256)) * 4
+    context = multiprocessing.get_context("fork")
+    test_q = context.Queue()
+    p = context.Process(target=read_in_child, args=(test_q,))
+    p.start()
+    assert test_q.get(timeout=JOIN_TIMEOUT) == bytes(table)
+    p.join(JOIN_TIMEOUT)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason="requires multiprocessing.shared_memory")
+def test_shared_memory_factory_by_name() -> None:
+    """Test that factories with the same name share the block of the first one."""
+    name = f"singletons-{uuid.uuid4().hex[:8]}"
+    built = []
+
+    @singletons.SharedMemoryFactory(name=name)
+    def first() -> bytes:
+        built.append("first")
+        return b"shared"
+
+    @singletons.SharedMemoryFactory(name=name)
+    def second() -> bytes:
+        built.append("second")
+        return b"other"
+
+    assert bytes(first()) == b"shared"
+    assert bytes(second()[:6]) == b"shared"
+    assert second.name == first.name == name
+    assert built == ["first"]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason="requires multiprocessing.shared_memory")
+def test_shared_memory_factory_by_name_unlinked_concurrently(monkeypatch) -> None:
+    """Test that the block is created again if its concurrent creator unlinked it in between."""
+    from multiprocessing import shared_memory
+
+    name = f"singletons-{uuid.uuid4().hex[:8]}"
+    other = shared_memory.SharedMemory(name=name, create=True, size=8)
+    attach = singletons.cross_process._attach
+    calls = []
+
+    def racing_attach(block_name: str):
+        calls.append(block_name)
+        if len(calls) == 1:
+            return None  # not created yet by the other process
+        if len(calls) == 2:
+            other.close()
+            other.unlink()
+            return None
+        return attach(block_name)
+
+    monkeypatch.setattr(singletons.cross_process, "_attach", racing_attach)
+
+    @singletons.SharedMemoryFactory(name=name)
+    def table() -> bytes:
+        return b"rebuilt"
+
+    assert bytes(table()) == b"rebuilt"
+    assert len(calls) == 2
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason="requires multiprocessing.shared_memory")
+def test_shared_memory_factory_dependency() -> None:
+    """Test that other factories can depend on cross-process factories."""
+
+    @singletons.GlobalFactory(depends_on=[lookup_table])
+    def table_size() -> int:
+        return lookup_table().nbytes
+
+    assert singletons.dependency_graph(table_size) == {lookup_table: (), table_size: (lookup_table,)}
+    singletons.warm_up(table_size)
+    assert table_size() == 1024
@@ -1,3 +1,4 @@
+import gc
 import uuid
 from typing import Type
 
@@ -13,9 +14,9 @@ JOIN_TIMEOUT = 2
 @pytest.fixture()
 def _force_eventlet():
     """Manually mark the greenthread environment as ``eventlet``."""
-    singletons.utils._greenthread_environment = "eventlet"
+    singletons.redetect_greenthread_environment("eventlet")
     yield
-    singletons.utils._greenthread_environment = None
+    singletons.redetect_greenthread_environment()
 
 
 @pytest.mark.usefixtures("_force_eventlet")
@@ -49,3 +50,21 @@ def test_greenthread_singleton(metaclass: Type, repetitions: int):
         assert a == b
         assert a not in seen_uuids
         seen_uuids.add(a)
+
+
+@pytest.mark.usefixtures("_force_eventlet")
+@pytest.mark.parametrize("metaclass", [singletons.GreenthreadSingleton, singletons.EventletSingleton])
+def test_dead_greenthread_scopes_are_evicted(metaclass: Type):
+    """Test that scopes are released once their greenthread is garbage collected."""
+
+    class MySingleton(metaclass=metaclass):
+        """Dummy Singleton class."""
+
+    greenthreads = [eventlet.spawn(MySingleton) for _ in range(100)]
+    for greenthread in greenthreads:
+        greenthread.wait()
+    assert len(MySingleton._ScopedSingleton__instances) == 100
+
+    del greenthreads, greenthread
+    gc.collect()
+    assert not MySingleton._ScopedSingleton__instances
@@ -1,12 +1,20 @@
+import asyncio
+import functools
+import gc
 import multiprocessing
+import operator
+import os
 import queue
 import threading
+import time
 import uuid
+import weakref
+from collections import Counter
 from typing import Type
 
 import pytest
 import singletons
-from singletons.exceptions import NoGreenthreadEnvironmentWarning
+from singletons.exceptions import DependencyCycleError, NoGreenthreadEnvironmentWarning
 
 JOIN_TIMEOUT = 2
 
@@ -74,6 +82,7 @@ def test_process_factory(prefix: str, queue_cls: Type, process: Type, repetition
         seen_uuids.add(a)
 
 
+@pytest.mark.usefixtures("_redetect_greenthread_environment")
 def test_greenthread_factory_with_no_greenthreads():
     """Test Greenthread Factory when there are no greenthread libraries enabled."""
 
@@ -86,3 +95,401 @@ def test_greenthread_factory_with_no_greenthreads():
         a = my_uuid()
         b = my_uuid()
         assert a is b
+
+
+def test_context_factory() -> None:
+    """Test ContextFactory."""
+
+    @singletons.ContextFactory
+    def my_uuid():
+        """Get a uuid per context."""
+        return uuid.uuid4()
+
+    async def inner_func():
+        a = my_uuid()
+        await asyncio.sleep(0)  # force the tasks to interleave
+        b = my_uuid()
+        return a, b
+
+    async def main():
+        return await asyncio.gather(*(inner_func() for _ in range(8)))
+
+    results = asyncio.run(main())
+    assert all(a == b for a, b in results)
+    assert len({a for a, _ in results}) == 8
+
+
+@pytest.mark.parametrize("factory", [singletons.AsyncGlobalFactory, singletons.AsyncProcessFactory])
+def test_async_factory_single_flight(factory: Type) -> None:
+    """Test that concurrent first callers share one construction."""
+    constructed = []
+
+    @factory
+    async def my_uuid():
+        """Get a uuid, slowly."""
+        await asyncio.sleep(0.01)
+        constructed.append(uuid.uuid4())
+        return constructed[-1]
+
+    async def main():
+        results = await asyncio.gather(*(my_uuid() for _ in range(8)))
+        return results, await my_uuid()
+
+    results, later = asyncio.run(main())
+    assert constructed == [later]
+    assert set(results) == {later}
+
+
+def test_async_factory_retries_failure() -> None:
+    """Test that a failed construction isn't cached."""
+    attempts = []
+
+    @singletons.AsyncGlobalFactory
+    async def flaky():
+        """Fail on the first attempt."""
+        attempts.append(None)
+        if len(attempts) == 1:
+            raise ConnectionError()
+        return object()
+
+    async def main():
+        with pytest.raises(ConnectionError):
+            await flaky()
+        return await flaky(), await flaky()
+
+    a, b = asyncio.run(main())
+    assert a is b
+    assert len(attempts) == 2
+
+
+def test_async_factory_survives_cancelled_caller() -> None:
+    """Test that cancelling one caller doesn't cancel the shared construction."""
+
+    @singletons.AsyncGlobalFactory
+    async def slow_object():
+        """Get an object, slowly."""
+        await asyncio.sleep(0.01)
+        return object()
+
+    async def main():
+        cancelled = asyncio.ensure_future(slow_object())
+        waiting = asyncio.ensure_future(slow_object())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await waiting
+
+    assert asyncio.run(main()) is not None
+
+
+@singletons.AsyncProcessFactory
+async def async_process_my_uuid():
+    """Get a uuid per Process."""
+    return uuid.uuid4()
+
+
+async def get_async_process_my_uuid():
+    """Await the uuid of the current Process."""
+    return await async_process_my_uuid()
+
+
+def async_process_inner_func(q: multiprocessing.Queue):
+    """Helper function for testing AsyncProcessFactory across forks."""
+    q.put(asyncio.run(get_async_process_my_uuid()))
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="requires os.register_at_fork")
+def test_async_process_factory_after_fork() -> None:
+    """Test that a forked child doesn't reuse the parent's object."""
+    parent = asyncio.run(get_async_process_my_uuid())
+    context = multiprocessing.get_context("fork")
+    test_q = context.Queue()
+    p = context.Process(target=async_process_inner_func, args=(test_q,))
+    p.start()
+    child = test_q.get(timeout=JOIN_TIMEOUT)
+    p.join(JOIN_TIMEOUT)
+    assert child != parent
+    assert asyncio.run(get_async_process_my_uuid()) == parent
+
+
+def process_fork_inner_func(q: multiprocessing.Queue):
+    """Helper function for testing ProcessFactory across forks."""
+    q.put(process_my_uuid())
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="requires os.register_at_fork")
+def test_process_factory_after_fork() -> None:
+    """Test that a forked child doesn't reuse the object cached by the parent."""
+    parent = process_my_uuid()
+    context = multiprocessing.get_context("fork")
+    test_q = context.Queue()
+    p = context.Process(target=process_fork_inner_func, args=(test_q,))
+    p.start()
+    child = test_q.get(timeout=JOIN_TIMEOUT)
+    p.join(JOIN_TIMEOUT)
+    assert child != parent
+    assert process_my_uuid() == parent
+
+
+@pytest.mark.parametrize(
+    "factory", [singletons.GlobalFactory, singletons.ProcessFactory, singletons.ThreadFactory],
+)
+def test_factory_with_arguments(factory: Type) -> None:
+    """Test that factories taking arguments create one object per argument combination."""
+
+    @factory
+    def client(region, timeout=1, retries=0):
+        """Get a client per region and options."""
+        return uuid.uuid4()
+
+    east = client("east")
+    assert client("east") is east
+    assert client("west") is not east
+    assert client("east", timeout=2, retries=1) is client("east", retries=1, timeout=2)
+    assert client("east", timeout=2) is not east
+
+
+@pytest.mark.parametrize("factory", [singletons.GlobalFactory, singletons.ProcessFactory])
+def test_factory_without_parameters(factory: Type) -> None:
+    """Test that the factories of functions without parameters don't take arguments either."""
+
+    @factory
+    def my_uuid():
+        """Get an UUID."""
+        return uuid.uuid4()
+
+    assert isinstance(my_uuid, factory)
+    assert type(my_uuid).__name__ == factory.__name__
+    assert my_uuid.__doc__ == "Get an UUID."
+    assert my_uuid() is my_uuid()
+    with pytest.raises(TypeError):
+        my_uuid(1)
+    assert type(factory(lambda key=None: None)) is factory
+
+
+@pytest.mark.parametrize(
+    "factory", [singletons.GlobalFactory, singletons.ProcessFactory, singletons.ThreadFactory],
+)
+def test_discarded_factories_are_collected(factory: Type) -> None:
+    """Test that discarded factories are collected with their objects and internal classes."""
+
+    def create_and_discard() -> tuple:
+        my_factory = factory(lambda key=None: uuid.uuid4())
+        return weakref.ref(my_factory), weakref.ref(my_factory(key=1)), weakref.ref(my_factory())
+
+    refs = [create_and_discard() for _ in range(100)]
+    gc.collect()
+    assert all(ref() is None for cycle_refs in refs for ref in cycle_refs)
+
+
+def test_factory_on_scope_exit() -> None:
+    """Test that the objects of a thread, with and without arguments, are passed to on_scope_exit."""
+    closed: list = []
+
+    @singletons.ThreadFactory(on_scope_exit=closed.append)
+    def thread_uuid(key=None):
+        return uuid.uuid4()
+
+    created: list = []
+    t = threading.Thread(target=lambda: created.extend([thread_uuid(), thread_uuid("key")]))
+    t.start()
+    t.join(JOIN_TIMEOUT)
+    assert sorted(closed) == sorted(created)
+
+
+@pytest.mark.parametrize(
+    "factory_cls", [singletons.GlobalFactory, singletons.ProcessFactory, singletons.ContextFactory],
+)
+def test_factory_on_scope_exit_unsupported(factory_cls: Type) -> None:
+    """Test that on_scope_exit is rejected by factories whose scopes never exit."""
+    with pytest.raises(TypeError, match="on_scope_exit"):
+        factory_cls(object, on_scope_exit=print)
+
+
+def test_context_factory_bounds_unsupported() -> None:
+    """Test that bounds are rejected by ContextFactory, whose objects are shared with tasks."""
+    with pytest.raises(TypeError, match="maxsize"):
+        singletons.ContextFactory(object, maxsize=1)
+
+
+def test_sharded_factory() -> None:
+    """Test that ShardedFactory objects are merged by aggregate, with and without arguments."""
+
+    @singletons.ShardedFactory(shards=2, aggregate=lambda counters: sum(counters, Counter()))
+    def hits(path=None):
+        return Counter()
+
+    hits()["/"] += 1
+    hits("/")["hits"] += 2
+    assert hits.aggregate() == Counter({"/": 1})
+    assert hits.aggregate("/") == Counter({"hits": 2})
+
+
+def test_factory_with_bounds() -> None:
+    """Test that factory options bound the objects created per argument combination."""
+    evicted = []
+
+    @singletons.GlobalFactory(maxsize=1, on_evict=evicted.append)
+    def client(region):
+        """Get a client per region, keeping only the last one."""
+        return region
+
+    assert client.__doc__ == "Get a client per region, keeping only the last one."
+    assert client("east") == "east"
+    assert client("west") == "west"
+    assert evicted == ["east"]
+
+
+@pytest.mark.parametrize("factory_cls", [singletons.GlobalFactory, singletons.ThreadFactory])
+def test_factory_with_bounds_without_arguments(factory_cls: Type) -> None:
+    """Test that the bounds also apply to the object of calls without arguments."""
+    evicted = []
+
+    @factory_cls(ttl=0.05, on_evict=evicted.append)
+    def client():
+        return uuid.uuid4()
+
+    first = client()
+    assert client() == first
+    time.sleep(0.1)
+    assert client() != first
+    assert evicted == [first]
+
+
+def test_thread_factory_with_arguments_per_thread() -> None:
+    """Test that keyed objects of a ThreadFactory are per thread."""
+
+    @singletons.ThreadFactory
+    def client(region):
+        """Get a client per region and thread."""
+        return uuid.uuid4()
+
+    test_q: queue.Queue = queue.Queue()
+    t = threading.Thread(target=lambda: test_q.put(client("east")))
+    t.start()
+    assert test_q.get(timeout=JOIN_TIMEOUT) != client("east")
+
+
+def test_warm_up(monkeypatch) -> None:
+    """Test that warm_up() builds the factories that can be called without arguments."""
+    # only warm up the factories of this test, rather than those left by other tests
+    monkeypatch.setattr(singletons.factory, "_warmable", weakref.WeakKeyDictionary())
+    built = []
+
+    @singletons.GlobalFactory
+    def my_uuid():
+        """Get a UUID."""
+        built.append("my_uuid")
+        return uuid.uuid4()
+
+    @singletons.ProcessFactory
+    def client(region):
+        """Get a client per region, which can't be warmed up."""
+        built.append(region)
+
+    singletons.warm_up()
+    assert built == ["my_uuid"]
+    my_uuid()
+    assert built == ["my_uuid"]
+
+
+def test_warm_up_in_parallel() -> None:
+    """Test warming up factories on a thread pool, with dependencies and failures."""
+    threads = set()
+
+    @singletons.GlobalFactory
+    def pool():
+        """Get a pool, built once even if required by several factories."""
+        threads.add(threading.get_ident())
+        return uuid.uuid4()
+
+    @singletons.GlobalFactory
+    def client():
+        """Get a client depending on the pool."""
+        return (pool(), uuid.uuid4())
+
+    @singletons.ProcessFactory
+    def failing():
+        """Fail to build."""
+        raise ValueError("failing")
+
+    with pytest.raises(ValueError, match="failing"):
+        singletons.warm_up(failing, client, pool, max_workers=3)
+    assert client()[0] is pool()
+    assert len(threads) == 1
+
+
+def test_factory_dependencies() -> None:
+    """Test that declared dependencies are built first and resolved into a graph."""
+    built = []
+
+    @singletons.GlobalFactory
+    def redis_pool():
+        """Get a pool."""
+        built.append("redis_pool")
+        return uuid.uuid4()
+
+    @singletons.ThreadFactory(depends_on=[redis_pool])
+    def celery_app():
+        """Get an app depending on the pool."""
+        built.append("celery_app")
+        return uuid.uuid4()
+
+    @singletons.ProcessFactory(depends_on=[celery_app, redis_pool])
+    def worker():
+        """Get a worker depending on the app and the pool."""
+        built.append("worker")
+        return uuid.uuid4()
+
+    assert worker.dependencies == (celery_app, redis_pool)
+    assert singletons.dependency_graph(worker) == {
+        redis_pool: (),
+        celery_app: (redis_pool,),
+        worker: (celery_app, redis_pool),
+    }
+    worker()
+    assert built == ["redis_pool", "celery_app", "worker"]
+
+
+def test_factory_dependency_cycle() -> None:
+    """Test that dependency cycles are rejected when declared."""
+
+    @singletons.GlobalFactory
+    def first():
+        """Get the first object."""
+
+    @singletons.GlobalFactory(depends_on=[first])
+    def second():
+        """Get the second object."""
+
+    @singletons.GlobalFactory
+    def with_arguments(region):
+        """Get an object per region."""
+
+    with pytest.raises(DependencyCycleError, match="first -> second -> first"):
+        first.add_dependencies(second)
+    with pytest.raises(DependencyCycleError):
+        first.add_dependencies(first)
+    with pytest.raises(TypeError):
+        first.add_dependencies(with_arguments)
+    assert first.dependencies == ()
+
+
+def test_warm_up_critical_path() -> None:
+    """Test that independent dependencies are built concurrently, and failures skip dependents."""
+    delay = 0.2
+
+    def slow_factory():
+        time.sleep(delay)
+        return uuid.uuid4()
+
+    pools = [singletons.GlobalFactory(slow_factory) for _ in range(4)]
+    app = singletons.GlobalFactory(slow_factory, depends_on=pools)
+    failing_pool = singletons.GlobalFactory(functools.partial(operator.truediv, 1, 0))
+    skipped = singletons.GlobalFactory(uuid.uuid4, depends_on=[failing_pool])
+
+    start = time.monotonic()
+    with pytest.raises(ZeroDivisionError):
+        singletons.warm_up(app, skipped, max_workers=8)
+    assert time.monotonic() - start < 4 * delay
+    assert singletons.get_instances(app) == [app()]
+    assert singletons.get_instances(skipped) == []
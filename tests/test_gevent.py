@@ -1,3 +1,4 @@
+import gc
 import uuid
 from typing import Type
 
@@ -14,9 +15,9 @@ JOIN_TIMEOUT = 2
 @pytest.fixture()
 def _force_gevent():
     """Manually mark the greenthread environment as ``gevent``."""
-    singletons.utils._greenthread_environment = "gevent"
+    singletons.redetect_greenthread_environment("gevent")
     yield
-    singletons.utils._greenthread_environment = None
+    singletons.redetect_greenthread_environment()
 
 
 @pytest.mark.usefixtures("_force_gevent")
@@ -50,3 +51,37 @@ def test_greenthread_singleton(metaclass: Type, repetitions: int):
         assert a == b
         assert a not in seen_uuids
         seen_uuids.add(a)
+
+
+@pytest.mark.usefixtures("_force_gevent")
+@pytest.mark.parametrize("metaclass", [singletons.GreenthreadSingleton, singletons.GeventSingleton])
+def test_dead_greenthread_scopes_are_evicted(metaclass: Type):
+    """Test that scopes are released once their greenthread is garbage collected."""
+
+    class MySingleton(metaclass=metaclass):
+        """Dummy Singleton class."""
+
+    greenthreads = [gevent.spawn(MySingleton) for _ in range(100)]
+    gevent.joinall(greenthreads, timeout=JOIN_TIMEOUT)
+    assert len(MySingleton._ScopedSingleton__instances) == 100
+
+    del greenthreads
+    gevent.sleep()  # let the hub drop its references to finished greenthreads
+    gc.collect()
+    assert not MySingleton._ScopedSingleton__instances
+
+
+def test_bounded_greenthread_scopes():
+    """Test that ``max_scopes`` evicts the oldest scopes."""
+
+    class BoundedGeventSingleton(singletons.GeventSingleton):
+        max_scopes = 2
+
+    class MySingleton(metaclass=BoundedGeventSingleton):
+        """Dummy Singleton class."""
+
+    scopes = MySingleton._ScopedSingleton__instances
+    greenthreads = [gevent.spawn(MySingleton) for _ in range(5)]
+    gevent.joinall(greenthreads, timeout=JOIN_TIMEOUT)
+    assert len(scopes) == 2
+    assert set(scopes) == {id(g) for g in greenthreads[-2:]}
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+
+import pytest
+import singletons
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def loaded_modules(code: str) -> set:
+    """
+    Run ``code`` in a new interpreter, and list the modules it loaded.
+
+    :param code: the code to run
+    :return: the names of the loaded modules
+    """
+    env = dict(os.environ, PYTHONPATH=SRC)
+    env.pop("SINGLETONS_SETUP_MOCK", None)
+    output = subprocess.run(
+        [sys.executable, "-c", f"import sys\n{code}\nprint(' '.join(sys.modules))"],
+        check=True,
+        env=env,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+    return set(output.split())
+
+
+def test_import_is_lazy() -> None:
+    """Test that importing the package doesn't load its submodules and their dependencies."""
+    modules = loaded_modules("import singletons")
+    assert "singletons" in modules
+    assert not {module for module in modules if module.startswith("singletons.")}
+    assert "typing" not in modules
+    assert "unittest.mock" not in modules
+
+
+def test_import_loads_what_is_used() -> None:
+    """Test that accessing a name only loads its submodule."""
+    modules = loaded_modules("import singletons\nsingletons.ThreadFactory")
+    assert {"singletons.factory", "singletons.singleton", "singletons.utils"} <= modules
+    assert "singletons.shared_module" not in modules
+    assert "unittest.mock" not in modules
+    assert "logging" not in modules
+    assert "inspect" not in modules
+
+
+def test_lazy_exports() -> None:
+    """Test that every exported name and submodule can be accessed."""
+    for name in singletons.__all__:
+        assert getattr(singletons, name) is not None
+    assert singletons.shared_module.SharedModule is singletons.SharedModule
+    assert set(singletons.__all__) <= set(dir(singletons))
+    assert sorted(singletons.__all__) == sorted(singletons._EXPORTS)
+    with pytest.raises(AttributeError):
+        assert singletons.nonexistent
@@ -0,0 +1,184 @@
+import asyncio
+import queue
+import threading
+import uuid
+from typing import List, Type
+
+import pytest
+import singletons
+
+JOIN_TIMEOUT = 2
+
+
+class Resource:
+    """Instance recording when it is closed."""
+
+    def __init__(self, name: str, closed: List[str]) -> None:
+        self.name = name
+        self.closed = closed
+
+    def close(self) -> None:
+        self.closed.append(self.name)
+
+
+@pytest.mark.parametrize(
+    "metaclass",
+    [
+        singletons.Singleton,
+        singletons.ProcessSingleton,
+        singletons.ThreadSingleton,
+        singletons.ContextSingleton,
+    ],
+)
+def test_reset_instances(metaclass: Type) -> None:
+    """Test that reset instances are constructed again when next accessed."""
+
+    class MySingleton(metaclass=metaclass):
+        def __init__(self) -> None:
+            self.uuid = uuid.uuid4()
+
+    class Keyed(metaclass=metaclass, keyed=True):
+        def __init__(self, key: str) -> None:
+            self.key = key
+
+    assert singletons.get_instances(MySingleton) == []
+    instance = MySingleton()
+    assert singletons.get_instances(MySingleton) == [instance]
+    assert singletons.reset_instances(MySingleton) == [instance]
+    assert singletons.get_instances(MySingleton) == []
+    assert MySingleton() is not instance
+
+    keyed = [Keyed("a"), Keyed("b")]
+    assert singletons.get_instances(Keyed) == keyed
+    assert singletons.reset_instances(Keyed) == keyed
+    assert Keyed("a") is not keyed[0]
+
+
+def test_reset_instances_current_scope() -> None:
+    """Test resetting the instances of the current thread only."""
+
+    class MySingleton(metaclass=singletons.ThreadSingleton):
+        def __init__(self) -> None:
+            self.uuid = uuid.uuid4()
+
+    started, stop = threading.Event(), threading.Event()
+    test_q: queue.Queue = queue.Queue()
+
+    def inner_func() -> None:
+        test_q.put(MySingleton())
+        started.set()
+        stop.wait(JOIN_TIMEOUT)
+
+    t = threading.Thread(target=inner_func)
+    t.start()
+    try:
+        started.wait(JOIN_TIMEOUT)
+        other, mine = test_q.get(timeout=JOIN_TIMEOUT), MySingleton()
+        assert singletons.get_instances(MySingleton, current_scope=True) == [mine]
+        assert singletons.reset_instances(MySingleton, current_scope=True) == [mine]
+        assert singletons.get_instances(MySingleton) == [other]
+    finally:
+        stop.set()
+        t.join(JOIN_TIMEOUT)
+
+
+@pytest.mark.parametrize("factory", [singletons.GlobalFactory, singletons.ProcessFactory])
+def test_reset_factory(factory: Type) -> None:
+    """Test that resetting a factory drops its cached object."""
+
+    @factory
+    def my_uuid():
+        """Get a UUID."""
+        return uuid.uuid4()
+
+    first = my_uuid()
+    assert singletons.get_instances(my_uuid) == [first]
+    assert singletons.reset_instances(my_uuid) == [first]
+    assert my_uuid() != first
+
+
+def test_dispose_instances_in_reverse_order() -> None:
+    """Test that instances are closed before the instances they were constructed with."""
+    closed: List[str] = []
+
+    class Pool(Resource, metaclass=singletons.Singleton):
+        def __init__(self) -> None:
+            super().__init__("pool", closed)
+
+    class Client(Resource, metaclass=singletons.Singleton):
+        def __init__(self) -> None:
+            self.pool = Pool()
+            super().__init__("client", closed)
+
+    @singletons.GlobalFactory
+    def client():
+        """Get the client, once more."""
+        return Client()
+
+    first = client()
+    assert first is Client()
+    singletons.dispose_instances()
+    assert closed == ["client", "pool"]
+    assert client() is not first
+    assert singletons.get_instances(Client) == [client()]
+
+
+def test_dispose_instances_closes_all_and_raises_first_error() -> None:
+    """Test that a failing close() doesn't prevent closing the other instances."""
+    closed: List[str] = []
+
+    class Failing(metaclass=singletons.Singleton, keyed=True):
+        def __init__(self, name: str) -> None:
+            self.name = name
+
+        def close(self) -> None:
+            closed.append(self.name)
+            raise ValueError(self.name)
+
+    Failing("a"), Failing("b")
+    with pytest.raises(ValueError, match="b"):
+        singletons.dispose_instances(Failing)
+    assert closed == ["b", "a"]
+
+
+def test_adispose_instances() -> None:
+    """Test that aclose() is awaited, or run in a new event loop when disposing synchronously."""
+    closed: List[str] = []
+
+    class Session(metaclass=singletons.Singleton, keyed=True):
+        def __init__(self, name: str) -> None:
+            self.name = name
+
+        async def aclose(self) -> None:
+            closed.append(self.name)
+
+    Session("async")
+    asyncio.run(singletons.adispose_instances(Session))
+    Session("sync")
+    singletons.dispose_instances(Session)
+    assert closed == ["async", "sync"]
+
+
+def test_async_factory_instances() -> None:
+    """Test resetting the object of an async factory."""
+
+    @singletons.AsyncGlobalFactory
+    async def my_uuid():
+        """Get a UUID."""
+        return uuid.uuid4()
+
+    async def get_my_uuid():
+        return await my_uuid()
+
+    first = asyncio.run(get_my_uuid())
+    assert singletons.get_instances(my_uuid) == [first]
+    assert my_uuid in singletons.utils.created_owners()
+    assert singletons.reset_instances(my_uuid) == [first]
+    assert my_uuid not in singletons.utils.created_owners()
+    assert asyncio.run(get_my_uuid()) != first
+
+
+def test_not_an_owner() -> None:
+    """Test that lifecycle functions reject objects that don't hold instances."""
+    with pytest.raises(TypeError):
+        singletons.reset_instances(object())
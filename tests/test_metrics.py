@@ -0,0 +1,97 @@
+import threading
+from typing import Generator, List, Tuple
+
+import pytest
+import singletons
+
+JOIN_TIMEOUT = 2
+
+
+@pytest.fixture()
+def metrics_events() -> Generator:
+    """Enable metrics for a test, collecting the callback events."""
+    events: List[Tuple[str, str, float]] = []
+    singletons.enable_metrics(lambda metric, name, value: events.append((metric, name, value)))
+    yield events
+    singletons.disable_metrics()
+
+
+def test_metrics_disabled() -> None:
+    """Test that metrics are empty, and the metaclasses untouched, when disabled."""
+    call = singletons.Singleton.__call__
+    singletons.enable_metrics()
+    singletons.disable_metrics()
+    assert singletons.Singleton.__call__ is call
+    assert singletons.get_metrics() == {}
+
+
+def test_metrics(metrics_events: List[Tuple[str, str, float]]) -> None:
+    """Test counting calls, constructions and their errors."""
+
+    class MySingleton(metaclass=singletons.ThreadSingleton):
+        fail = True
+
+        def __init__(self) -> None:
+            if MySingleton.fail:
+                raise ValueError("fail")
+
+    with pytest.raises(ValueError):
+        MySingleton()
+    MySingleton.fail = False
+    MySingleton()
+    MySingleton()
+    MySingleton()
+
+    name = f"{__name__}.{MySingleton.__qualname__}"
+    metrics = singletons.get_metrics()[name]
+    assert metrics["calls"] == 4
+    assert metrics["hits"] == 2
+    assert metrics["constructions"] == 1
+    assert metrics["construction_errors"] == 1
+    assert metrics["instances"] == 1
+    assert metrics["construction_seconds"] >= metrics["max_construction_seconds"] > 0
+    assert [event[:2] for event in metrics_events] == [
+        ("construction_errors", name),
+        ("construction_seconds", name),
+        ("constructions", name),
+        ("construction_seconds", name),
+    ]
+    singletons.reset_metrics()
+    assert singletons.get_metrics() == {}
+
+
+def test_metrics_factory(metrics_events: List[Tuple[str, str, float]]) -> None:
+    """Test that factories are reported by the name of their function."""
+
+    @singletons.ThreadFactory
+    def my_factory(key=None):
+        """Get an object, per key."""
+        return object()
+
+    my_factory()
+    my_factory("keyed")
+    metrics = singletons.get_metrics()
+    assert metrics[f"{__name__}.{my_factory.__qualname__}"]["constructions"] == 1
+    assert metrics[f"{__name__}.{my_factory.__qualname__}[keyed]"]["constructions"] == 1
+
+
+def test_metrics_lock_wait(metrics_events: List[Tuple[str, str, float]]) -> None:
+    """Test that waiting for another thread's construction is measured."""
+    constructing, release = threading.Event(), threading.Event()
+
+    class MySingleton(metaclass=singletons.Singleton):
+        def __init__(self) -> None:
+            constructing.set()
+            release.wait(JOIN_TIMEOUT)
+
+    t = threading.Thread(target=MySingleton)
+    t.start()
+    constructing.wait(JOIN_TIMEOUT)
+    threading.Timer(0.05, release.set).start()
+    MySingleton()
+    t.join(JOIN_TIMEOUT)
+
+    metrics = singletons.get_metrics()[f"{__name__}.{MySingleton.__qualname__}"]
+    assert metrics["lock_waits"] == 1
+    assert metrics["lock_wait_seconds"] > 0
+    assert metrics["hits"] == 1
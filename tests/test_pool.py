@@ -0,0 +1,147 @@
+import multiprocessing
+import os
+import threading
+from typing import List
+
+import pytest
+import singletons
+from singletons.exceptions import PoolTimeoutError
+
+JOIN_TIMEOUT = 2
+
+
+class Client:
+    """Object lent by the pools."""
+
+    def __init__(self, name: str = "client") -> None:
+        self.name = name
+        self.healthy = True
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_pooled_factory() -> None:
+    """Test that objects are reused, and that callers wait when all of them are lent."""
+    created: List[Client] = []
+
+    @singletons.PooledFactory(size=2, timeout=0.01)
+    def client() -> Client:
+        created.append(Client())
+        return created[-1]
+
+    with client() as a:
+        pass  # noqa: WPS420
+    with client() as b:
+        assert b is a
+        with client() as c:
+            assert c is not a
+            with pytest.raises(PoolTimeoutError):
+                with client():
+                    pass  # noqa: WPS420
+    assert len(created) == 2
+
+
+def test_pooled_factory_waits_for_returned_object() -> None:
+    """Test that a waiting caller gets the object returned by another thread."""
+
+    @singletons.PooledFactory(size=1)
+    def client() -> Client:
+        return Client()
+
+    borrowed = threading.Event()
+    release = threading.Event()
+
+    def inner_func() -> None:
+        with client():
+            borrowed.set()
+            release.wait(JOIN_TIMEOUT)
+
+    t = threading.Thread(target=inner_func)
+    t.start()
+    borrowed.wait(JOIN_TIMEOUT)
+    with pytest.raises(PoolTimeoutError):
+        client.pool().checkout(timeout=0).__enter__()
+    release.set()
+    with client.pool().checkout(timeout=JOIN_TIMEOUT) as obj:
+        assert isinstance(obj, Client)
+    t.join(JOIN_TIMEOUT)
+
+
+def test_pooled_factory_check() -> None:
+    """Test that unhealthy idle objects are closed and replaced, and failed creations retried."""
+    created: List[Client] = []
+    failures = [ValueError("unreachable")]
+
+    @singletons.PooledFactory(size=1, timeout=0, check=lambda obj: obj.healthy)
+    def client() -> Client:
+        if failures:
+            raise failures.pop()
+        created.append(Client())
+        return created[-1]
+
+    with pytest.raises(ValueError, match="unreachable"):
+        with client():
+            pass  # noqa: WPS420
+    with client() as a:
+        a.healthy = False
+    with client() as b:
+        assert b is not a
+    assert a.closed
+    assert not b.closed
+
+
+def test_pooled_factory_with_arguments() -> None:
+    """Test that there is a pool per combination of arguments."""
+
+    @singletons.PooledFactory(size=1, timeout=0)
+    def client(name: str) -> Client:
+        return Client(name)
+
+    with client("east") as east, client("west") as west:
+        assert (east.name, west.name) == ("east", "west")
+    assert client.pool("east") is client.pool("east")
+
+
+def test_pooled_factory_dispose() -> None:
+    """Test that disposing the factory closes its idle objects, and the lent ones when returned."""
+
+    @singletons.PooledFactory(size=2)
+    def client() -> Client:
+        return Client()
+
+    with client() as lent:
+        with client() as idle:
+            pass  # noqa: WPS420
+        pool = client.pool()
+        singletons.dispose_instances(client)
+        assert idle.closed
+        assert not lent.closed
+        with pytest.raises(RuntimeError):
+            pool.checkout().__enter__()
+    assert lent.closed
+    assert client.pool() is not pool
+
+
+def new_pool_inner_func(q: multiprocessing.Queue, factory, parent_pool) -> None:
+    """Helper function telling whether a forked child gets a new pool."""
+    q.put(factory.pool() is not parent_pool)
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="requires os.register_at_fork")
+def test_pooled_factory_after_fork() -> None:
+    """Test that a forked child gets a new pool."""
+
+    @singletons.PooledFactory(size=1)
+    def client() -> Client:
+        return Client()
+
+    parent = client.pool()
+    context = multiprocessing.get_context("fork")
+    test_q = context.Queue()
+    p = context.Process(target=new_pool_inner_func, args=(test_q, client, parent))
+    p.start()
+    assert test_q.get(timeout=JOIN_TIMEOUT)
+    p.join(JOIN_TIMEOUT)
+    assert client.pool() is parent
@@ -0,0 +1,62 @@
+import queue
+import threading
+
+import singletons
+
+JOIN_TIMEOUT = 2
+
+
+def test_memory_report() -> None:
+    """Test reporting the scopes, instances and size of singleton classes."""
+
+    class MySingleton(metaclass=singletons.ThreadSingleton):
+        def __init__(self) -> None:
+            self.payload = bytearray(100000)
+
+    class Keyed(metaclass=singletons.Singleton, keyed=True):
+        def __init__(self, key: str) -> None:
+            self.key = key
+
+    stop = threading.Event()
+    test_q: queue.Queue = queue.Queue()
+
+    def inner_func() -> None:
+        test_q.put(MySingleton())
+        stop.wait(JOIN_TIMEOUT)
+
+    t = threading.Thread(target=inner_func)
+    t.start()
+    try:
+        test_q.get(timeout=JOIN_TIMEOUT)
+        MySingleton()
+        Keyed("a"), Keyed("b")
+        report = singletons.memory_report()
+    finally:
+        stop.set()
+        t.join(JOIN_TIMEOUT)
+
+    thread_report = report["ThreadSingleton"]["classes"][f"{__name__}.{MySingleton.__qualname__}"]
+    assert thread_report["scopes"] == 2
+    assert thread_report["instances"] == 2
+    assert thread_report["size"] > 200000
+    assert "stale_scopes" not in thread_report
+    keyed_report = report["Singleton"]["classes"][f"{__name__}.{Keyed.__qualname__}"]
+    assert keyed_report["scopes"] == 1
+    assert keyed_report["instances"] == 2
+    assert report["ThreadSingleton"]["instances"] >= 2
+
+
+def test_memory_report_stale_scopes() -> None:
+    """Test that debug reports flag the scopes of threads that no longer exist."""
+
+    class MySingleton(metaclass=singletons.ThreadSingleton):
+        """Singleton with an instance left behind by a thread."""
+
+    instance = MySingleton()
+    thread = threading.Thread(target=lambda: None)
+    thread.start()
+    thread.join(JOIN_TIMEOUT)
+    MySingleton._ScopedSingleton__instances[thread.ident] = instance
+    report = singletons.memory_report(debug=True)
+    class_report = report["ThreadSingleton"]["classes"][f"{__name__}.{MySingleton.__qualname__}"]
+    assert class_report["stale_scopes"] == [thread.ident]
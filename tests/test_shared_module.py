@@ -1,5 +1,8 @@
+import asyncio
+import concurrent.futures
 import logging
 import queue
+import sys
 import threading
 from typing import Generator
 from unittest.mock import Mock
@@ -41,6 +44,54 @@ def test_mocking_global():
     assert isinstance(a, Mock)
 
 
+@pytest.mark.usefixtures("_mock_shared")
+def test_mocking_executor():
+    """Test mocking an executor factory, whose mock is shared by the workers of an executor."""
+    assert isinstance(shared.executor_object, singletons.ExecutorFactory)
+    scope = singletons.ExecutorScope()
+    with concurrent.futures.ThreadPoolExecutor(THREADS, initializer=scope.enter) as executor:
+        futures = [executor.submit(shared.executor_object) for _ in range(THREADS)]
+    a = futures[0].result()
+    assert all(future.result() is a for future in futures)
+    assert isinstance(a, Mock)
+    assert shared.executor_object() is not a
+
+
+@pytest.mark.usefixtures("_mock_shared")
+def test_mocking_sharded():
+    """Test mocking a sharded factory, whose mocks are still merged by aggregate."""
+    assert isinstance(shared.sharded_object, singletons.ShardedFactory)
+    a = shared.sharded_object()
+    assert shared.sharded_object() is a
+    assert isinstance(a, Mock)
+    assert shared.sharded_object.aggregate() == [a]
+
+
+@pytest.mark.usefixtures("_mock_shared")
+def test_mocking_pooled():
+    """Test mocking a pooled factory, still used as a context manager."""
+    assert isinstance(shared.pooled_object, singletons.PooledFactory)
+    with shared.pooled_object() as a:
+        with shared.pooled_object() as b:
+            assert a is not b
+    with shared.pooled_object() as c:
+        assert c in (a, b)
+    assert isinstance(a, Mock)
+
+
+@pytest.mark.usefixtures("_mock_shared")
+def test_mocking_async():
+    """Test mocking an async factory, whose mock is awaited."""
+    assert isinstance(shared.async_object, singletons.AsyncGlobalFactory)
+
+    async def main() -> tuple:
+        return await shared.async_object(), await shared.async_object()
+
+    a, b = asyncio.run(main())
+    assert a is b
+    assert isinstance(a, Mock)
+
+
 @pytest.mark.usefixtures("_mock_shared")
 def test_mocking_simple():
     """Test mocking a simple object."""
@@ -127,3 +178,81 @@ def test_reassign_no_mock():
     a = object()
     shared.new_object = a
     assert shared.new_object is a
+
+
+@pytest.mark.usefixtures("_mock_shared")
+def test_mocking_keyed_global():
+    """Test mocking a global factory called with arguments."""
+    a = shared.global_object("east")
+    assert a is shared.global_object("east")
+    assert a is not shared.global_object("west")
+    assert isinstance(a, Mock)
+
+
+def test_cache_invalidation():
+    """Test that cached mocks are dropped when set, and when switching to/from mock mode."""
+    actual = shared.simple_obj
+    try:
+        shared.setup_mock()
+        mocked = shared.simple_obj
+        assert isinstance(mocked, Mock)
+        assert shared.simple_obj is mocked
+        replacement = Mock()
+        shared._mock["simple_obj"] = replacement
+        assert shared.simple_obj is mocked
+        shared.invalidate_cache()
+        assert shared.simple_obj is replacement
+        shared.simple_obj = mocked
+        assert shared.simple_obj is mocked
+        shared.setup_mock()
+        assert shared.simple_obj is not mocked
+    finally:
+        shared.teardown_mock()
+    assert shared.simple_obj is actual
+
+
+def test_global_rebound_by_module():
+    """Test that globals rebound by the original module are seen through the shared module."""
+    assert shared.rebound_object is None
+    try:
+        shared.rebind_object("connected")
+        assert shared.rebound_object == "connected"
+    finally:
+        shared.rebind_object(None)
+    assert shared.rebound_object is None
+
+
+@pytest.mark.parametrize(
+    ("metaclass", "factory"),
+    [
+        (singletons.Singleton, singletons.GlobalFactory),
+        (singletons.ProcessSingleton, singletons.ProcessFactory),
+        (singletons.GreenthreadSingleton, singletons.GreenthreadFactory),
+        (singletons.GeventSingleton, singletons.GeventFactory),
+        (singletons.ShardedSingleton, singletons.ShardedFactory),
+        (singletons.ExecutorSingleton, singletons.ExecutorFactory),
+        (type("BoundedThreadSingleton", (singletons.ThreadSingleton,), {}), singletons.ThreadFactory),
+        (type, None),
+    ],
+)
+def test_select_factory(metaclass, factory):
+    """Test that the factory of the closest metaclass is selected."""
+    assert shared._select_factory(metaclass) is factory
+
+
+def test_lazy_attributes():
+    """Test that lazy attributes are resolved on first access, and stored in place."""
+    assert "lazy_dependency" not in sys.modules
+    try:
+        shared.setup_mock()
+        assert isinstance(shared.lazy_dependency, Mock)
+    finally:
+        shared.teardown_mock()
+    assert "lazy_dependency" not in sys.modules
+
+    dependency = shared.lazy_dependency
+    assert dependency is sys.modules["lazy_dependency"].Dependency
+    assert shared.globals["lazy_dependency"] is dependency
+    lazy_object = shared.globals["lazy_object"]
+    assert shared.lazy_object is lazy_object.resolve()
+    assert repr(lazy_object) == f"Lazy({object!r})"
@@ -1,7 +1,14 @@
+import asyncio
+import concurrent.futures
+import gc
 import multiprocessing
+import os
 import queue
 import threading
+import time
+import tracemalloc
 import uuid
+import weakref
 from typing import Type
 
 import pytest
@@ -9,6 +16,7 @@ import singletons
 from singletons.exceptions import NoGreenthreadEnvironmentWarning
 
 JOIN_TIMEOUT = 2
+DISCARD_CYCLES = 2000
 
 
 def test_singleton() -> None:
@@ -75,6 +83,7 @@ def test_process_singleton(prefix: str, queue_cls: Type, process: Type, repetiti
         seen_uuids.add(a)
 
 
+@pytest.mark.usefixtures("_redetect_greenthread_environment")
 def test_greenthread_singleton_no_greenthreads():
     """Test Greenthread Singleton when there are no greenthread libraries enabled."""
 
@@ -85,3 +94,539 @@ def test_greenthread_singleton_no_greenthreads():
         a = MySingleton()
         b = MySingleton()
         assert a is b
+
+
+def test_process_singleton_constructs_classes_concurrently() -> None:
+    """Test that a slow constructor doesn't block other ProcessSingleton classes."""
+    a_started = threading.Event()
+    b_created = threading.Event()
+
+    class SlowSingleton(metaclass=singletons.ProcessSingleton):
+        def __init__(self) -> None:
+            a_started.set()
+            self.saw_other = b_created.wait(JOIN_TIMEOUT)
+
+    class OtherSingleton(metaclass=singletons.ProcessSingleton):
+        def __init__(self) -> None:
+            b_created.set()
+
+    t = threading.Thread(target=SlowSingleton)
+    t.start()
+    assert a_started.wait(JOIN_TIMEOUT)
+    OtherSingleton()
+    t.join(JOIN_TIMEOUT)
+    assert SlowSingleton().saw_other
+
+
+def test_process_singleton_constructs_once() -> None:
+    """Test that concurrent first callers share a single construction."""
+    threads = 8
+    barrier = threading.Barrier(threads)
+    constructed = []
+
+    class MySingleton(metaclass=singletons.ProcessSingleton):
+        def __init__(self) -> None:
+            constructed.append(self)
+
+    def inner_func(q: queue.Queue) -> None:
+        barrier.wait(JOIN_TIMEOUT)
+        q.put(MySingleton())
+
+    test_q: queue.Queue = queue.Queue()
+    for _ in range(threads):
+        threading.Thread(target=inner_func, args=(test_q,)).start()
+
+    results = {id(test_q.get(timeout=JOIN_TIMEOUT)) for _ in range(threads)}
+    assert len(constructed) == 1
+    assert results == {id(constructed[0])}
+
+
+def test_context_singleton() -> None:
+    """Test that ContextSingleton creates one instance per asyncio task and releases it."""
+
+    class MySingleton(metaclass=singletons.ContextSingleton):
+        def __init__(self) -> None:
+            self.uuid = uuid.uuid4()
+
+    async def inner_func() -> tuple:
+        a = MySingleton()
+        await asyncio.sleep(0)  # force the tasks to interleave
+        b = MySingleton()
+        return a.uuid, b.uuid, weakref.ref(a)
+
+    async def main() -> list:
+        return await asyncio.gather(*(inner_func() for _ in range(8)))
+
+    results = asyncio.run(main())
+    gc.collect()
+    assert all(a == b for a, b, _ in results)
+    assert len({a for a, _, _ in results}) == 8
+    assert all(ref() is None for _, _, ref in results)
+
+
+def test_keyed_context_singleton_private_to_task() -> None:
+    """Test that keys first constructed in a task are private to it, and released along with it."""
+
+    class Client(metaclass=singletons.ContextSingleton, keyed=True):
+        def __init__(self, region: str) -> None:
+            self.region = region
+
+    async def inner_func() -> tuple:
+        task_only = Client("task-only")
+        await asyncio.sleep(0)  # force the tasks to interleave
+        assert Client("task-only") is task_only
+        return Client("shared"), weakref.ref(task_only)
+
+    async def main() -> tuple:
+        shared = Client("shared")
+        results = await asyncio.gather(*(inner_func() for _ in range(8)))
+        return shared, Client("task-only"), results
+
+    shared, parent_only, results = asyncio.run(main())
+    gc.collect()
+    assert all(task_shared is shared for task_shared, _ in results)
+    assert all(ref() is None for _, ref in results)
+    assert parent_only.region == "task-only"
+
+
+@pytest.mark.parametrize(
+    "metaclass", [singletons.Singleton, singletons.ProcessSingleton, singletons.ThreadSingleton],
+)
+@pytest.mark.parametrize("keyed", [False, True])
+def test_discarded_classes_are_collected(metaclass: Type, keyed: bool) -> None:
+    """Test that discarded classes are collected with their instances, keeping memory flat."""
+
+    def create_and_discard() -> weakref.ref:
+        cls = metaclass("Discarded", (), {}, keyed=keyed)
+        cls()
+        return weakref.ref(cls)
+
+    ref = create_and_discard()
+    gc.collect()
+    assert ref() is None
+
+    # warm up the caches and containers that grow to a steady size
+    for _ in range(DISCARD_CYCLES):  # noqa: WPS440
+        create_and_discard()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        for _ in range(DISCARD_CYCLES):
+            create_and_discard()
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    # a leaked class alone holds more than a kilobyte, the rest is the occasional resize of a
+    # container (e.g. the subclasses of object)
+    assert held < DISCARD_CYCLES * 64
+
+
+def test_sharded_singleton() -> None:
+    """Test that threads are spread over the replicas, which are merged by aggregate."""
+
+    def total(counters: list) -> int:
+        return sum(counter.count for counter in counters)
+
+    class Counter(metaclass=singletons.ShardedSingleton, shards=4, aggregate=total):
+        def __init__(self) -> None:
+            self.lock = threading.Lock()
+            self.count = 0
+
+        def increment(self) -> None:
+            with self.lock:
+                self.count += 1
+
+    # keep every thread alive, so that they don't reuse the ident of a finished one
+    barrier = threading.Barrier(16)
+
+    def inner_func() -> Counter:
+        barrier.wait(JOIN_TIMEOUT)
+        counter = Counter()
+        for _ in range(10):
+            assert Counter() is counter
+            counter.increment()
+        return counter
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+        futures = [executor.submit(inner_func) for _ in range(16)]
+    used = {id(future.result()) for future in futures}
+    # thread idents are aligned, but hashed over the shards
+    assert 1 < len(used) <= 4
+    assert Counter.aggregate() == 160
+    assert len(singletons.get_instances(Counter)) == len(used)
+    # replicas are shared with other threads, so they are only dropped with every scope
+    assert singletons.reset_instances(Counter, current_scope=True) == []
+    assert len(singletons.reset_instances(Counter)) == len(used)
+    assert Counter.aggregate() == 0
+
+
+def test_keyed_sharded_singleton() -> None:
+    """Test that keyed replicas are aggregated per key, as a list by default."""
+
+    class Client(metaclass=singletons.ShardedSingleton, shards=2, keyed=True):
+        def __init__(self, region: str) -> None:
+            self.region = region
+
+    east = Client("east")
+    Client("west")
+    assert Client.aggregate("east") == [east]
+    assert Client.aggregate("north") == []
+    with pytest.raises(ValueError, match="at least 1"):
+        singletons.ShardedSingleton("Empty", (), {}, shards=0)
+    with pytest.raises(TypeError, match="maxsize"):
+        singletons.ShardedSingleton("Bounded", (), {}, maxsize=1)
+
+
+class MyForkSingleton(metaclass=singletons.ProcessSingleton):
+    """Class used to test ProcessSingleton across forks."""
+
+    def __init__(self) -> None:
+        self.uuid = uuid.uuid4()
+
+
+class MyReinitSingleton(metaclass=singletons.ProcessSingleton):
+    """Class used to test the ``after_fork`` hook."""
+
+    def __init__(self) -> None:
+        self.uuid = uuid.uuid4()
+        self.reinitialised = False
+
+    def after_fork(self) -> None:
+        self.reinitialised = True
+
+
+def fork_inner_func(q: multiprocessing.Queue):
+    """Helper function to test ProcessSingleton across forks."""
+    reinit = MyReinitSingleton()
+    q.put((MyForkSingleton().uuid, reinit.uuid, reinit.reinitialised))
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="requires os.register_at_fork")
+def test_process_singleton_after_fork() -> None:
+    """Test that a forked child drops inherited instances unless they define ``after_fork``."""
+    parent = MyForkSingleton()
+    parent_reinit = MyReinitSingleton()
+
+    context = multiprocessing.get_context("fork")
+    test_q = context.Queue()
+    p = context.Process(target=fork_inner_func, args=(test_q,))
+    p.start()
+    child_uuid, child_reinit_uuid, reinitialised = test_q.get(timeout=JOIN_TIMEOUT)
+    p.join(JOIN_TIMEOUT)
+
+    assert child_uuid != parent.uuid
+    assert child_reinit_uuid == parent_reinit.uuid
+    assert reinitialised
+    assert not parent_reinit.reinitialised
+
+
+class MySlowShardedSingleton(metaclass=singletons.ShardedSingleton, shards=1):
+    """Class used to test ShardedSingleton across forks."""
+
+    constructing = threading.Event()
+    release = threading.Event()
+
+    def __init__(self) -> None:
+        self.constructing.set()
+        self.release.wait(JOIN_TIMEOUT)
+
+
+def sharded_fork_inner_func(q: multiprocessing.Queue):
+    """Helper function to test ShardedSingleton across forks."""
+    locks = (
+        MySlowShardedSingleton._ScopedSingleton__locks,
+        MySlowShardedSingleton._ShardedSingleton__replica_locks,
+    )
+    q.put([len(lock_store) for lock_store in locks])
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="requires os.register_at_fork")
+def test_sharded_singleton_after_fork() -> None:
+    """Test that a forked child drops the locks held by other threads of the parent."""
+    t = threading.Thread(target=MySlowShardedSingleton)
+    t.start()
+    assert MySlowShardedSingleton.constructing.wait(JOIN_TIMEOUT)
+
+    context = multiprocessing.get_context("fork")
+    test_q = context.Queue()
+    p = context.Process(target=sharded_fork_inner_func, args=(test_q,))
+    p.start()
+    MySlowShardedSingleton.release.set()
+    assert test_q.get(timeout=JOIN_TIMEOUT) == [0, 0]
+    p.join(JOIN_TIMEOUT)
+    t.join(JOIN_TIMEOUT)
+
+
+def test_thread_singleton_released_on_thread_exit() -> None:
+    """Test that ThreadSingleton instances are released when their thread exits."""
+
+    class MySingleton(metaclass=singletons.ThreadSingleton):
+        """Dummy Thread Singleton class."""
+
+    refs = []
+    threads = [
+        threading.Thread(target=lambda: refs.append(weakref.ref(MySingleton()))) for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(JOIN_TIMEOUT)
+
+    assert len(refs) == 8
+    assert all(ref() is None for ref in refs)
+    assert not MySingleton._ScopedSingleton__instances
+
+
+def test_thread_singleton_on_scope_exit() -> None:
+    """Test that the instances of a thread are passed to on_scope_exit when it exits."""
+    closed: queue.Queue = queue.Queue()
+
+    class Pool(metaclass=singletons.ThreadSingleton, on_scope_exit=closed.put):
+        pass
+
+    class Client(metaclass=singletons.ThreadSingleton, on_scope_exit=closed.put, keyed=True):
+        def __init__(self, region: str) -> None:
+            self.pool = Pool()
+
+    created: list = []
+    t = threading.Thread(target=lambda: created.extend([Client("east"), Client("west")]))
+    t.start()
+    t.join(JOIN_TIMEOUT)
+
+    east, west = created
+    # constructed with the pool, so closed before it
+    assert [closed.get_nowait() for _ in range(3)] == [east, west, east.pool]
+    assert not Client._ScopedSingleton__multitons
+    assert not Client._ScopedSingleton__locks
+    assert Client("east") is not east
+
+
+@pytest.mark.parametrize(
+    ("metaclass", "option"),
+    [
+        (singletons.Singleton, "on_scope_exit"),
+        (singletons.ProcessSingleton, "on_scope_exit"),
+        (singletons.ContextSingleton, "on_scope_exit"),
+        (singletons.ContextSingleton, "maxsize"),
+        (singletons.ContextSingleton, "ttl"),
+        (singletons.ContextSingleton, "on_evict"),
+        (singletons.ThreadSingleton, "shards"),
+        (singletons.Singleton, "aggregate"),
+    ],
+)
+def test_unsupported_class_options(metaclass: Type, option: str) -> None:
+    """Test that the options of other metaclasses are rejected rather than ignored."""
+    with pytest.raises(TypeError, match=option):
+        metaclass("Client", (), {}, **{option: print})
+
+
+def test_executor_singleton() -> None:
+    """Test that the workers of an executor share an instance, released with the executor."""
+    closed: list = []
+    initialized: queue.Queue = queue.Queue()
+
+    class MySingleton(metaclass=singletons.ExecutorSingleton, on_scope_exit=closed.append):
+        pass
+
+    scope = singletons.ExecutorScope(initialized.put, ("worker",))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4, initializer=scope.enter) as executor:
+        barrier = threading.Barrier(4)
+
+        def inner_func() -> int:
+            barrier.wait(JOIN_TIMEOUT)  # force every worker to start
+            return id(MySingleton())
+
+        ids = set(executor.map(lambda _: inner_func(), range(4)))
+    assert [initialized.get_nowait() for _ in range(4)] == ["worker"] * 4
+    assert len(ids) == 1
+    assert id(MySingleton()) not in ids
+    assert not closed
+
+    del scope, executor  # noqa: WPS420
+    gc.collect()
+    assert [id(instance) for instance in closed] == list(ids)
+
+
+class _SlowDict(dict):
+    """Dict whose lookups let other threads run, to widen the windows of races."""
+
+    def get(self, key, default=None):
+        found = super().get(key, default)
+        time.sleep(0.001)
+        return found
+
+
+def test_executor_scope_shared_by_classes(monkeypatch) -> None:
+    """Test that every class holding an executor scope is evicted, when first used concurrently."""
+    monkeypatch.setattr(singletons.singleton, "_scope_classes", _SlowDict())
+    closed: list = []
+    classes = [
+        singletons.ExecutorSingleton(f"MySingleton{index}", (), {}, on_scope_exit=closed.append)
+        for index in range(8)
+    ]
+    scope = singletons.ExecutorScope()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8, initializer=scope.enter) as executor:
+        barrier = threading.Barrier(8)
+
+        def inner_func(offset: int) -> None:
+            barrier.wait(JOIN_TIMEOUT)  # force every worker to start
+            for cls in classes[offset:] + classes[:offset]:
+                cls()
+
+        list(executor.map(inner_func, range(8)))
+    del scope, executor  # noqa: WPS420
+    gc.collect()
+    assert len(closed) == len(classes)
+
+
+def test_thread_scope_tracked_once_per_thread() -> None:
+    """Test that a thread's scope is tracked once for every class, and forgotten on exit."""
+
+    classes = [singletons.ThreadSingleton(f"MySingleton{index}", (), {}) for index in range(3)]
+    tracked: queue.Queue = queue.Queue()
+
+    def inner_func() -> None:
+        for cls in classes:
+            cls()
+        owner_id = id(singletons.singleton._thread_scope.owner)
+        tracked.put(singletons.singleton._scope_classes[owner_id])
+
+    t = threading.Thread(target=inner_func)
+    t.start()
+    t.join(JOIN_TIMEOUT)
+    ident, refs = tracked.get(timeout=JOIN_TIMEOUT)
+    assert ident == t.ident
+    assert [ref() for ref in refs] == classes
+    assert all(not cls._ScopedSingleton__instances for cls in classes)
+
+
+@pytest.mark.parametrize(
+    "metaclass",
+    [
+        singletons.Singleton,
+        singletons.ProcessSingleton,
+        singletons.ThreadSingleton,
+        singletons.ContextSingleton,
+    ],
+)
+def test_keyed_singleton(metaclass: Type) -> None:
+    """Test that keyed singletons create one instance per argument combination."""
+
+    class Client(metaclass=metaclass, keyed=True):
+        def __init__(self, region: str, timeout: int = 1, retries: int = 0) -> None:
+            self.region = region
+
+    class SubClient(Client):
+        """Subclass, inheriting the keyed mode."""
+
+    east = Client("east")
+    assert Client("east") is east
+    assert Client("west") is not east
+    assert Client("west").region == "west"
+    assert Client("east", timeout=2, retries=1) is Client("east", retries=1, timeout=2)
+    assert Client("east", timeout=2) is not east
+    assert SubClient("east") is not east
+    assert SubClient("east") is SubClient("east")
+
+
+@pytest.mark.parametrize("metaclass", [singletons.Singleton, singletons.ThreadSingleton])
+def test_bounded_keyed_singleton_lru(metaclass: Type) -> None:
+    """Test that bounded keyed singletons evict the least recently used instance."""
+    evicted = []
+
+    class Client(metaclass=metaclass, maxsize=2, on_evict=evicted.append):
+        def __init__(self, region: str) -> None:
+            self.region = region
+
+    east, west = Client("east"), Client("west")
+    assert Client("east") is east  # west is now the least recently used
+    north = Client("north")
+    assert [client.region for client in evicted] == ["west"]
+    assert Client("east") is east
+    assert Client("north") is north
+    assert Client("west") is not west
+    assert [client.region for client in evicted] == ["west", "east"]
+
+
+def test_bounded_keyed_singleton_ttl() -> None:
+    """Test that bounded keyed singletons evict expired instances."""
+    evicted = []
+
+    class Client(metaclass=singletons.Singleton, ttl=0.05, on_evict=evicted.append):
+        def __init__(self, region: str) -> None:
+            self.region = region
+
+    east = Client("east")
+    assert Client("east") is east
+    time.sleep(0.1)
+    west = Client("west")  # expired instances are purged when another one is stored
+    assert evicted == [east]
+    assert Client("west") is west
+    time.sleep(0.1)
+    assert Client("west") is not west
+    assert evicted == [east, west]
+
+
+def test_bounded_singleton_requires_keyed() -> None:
+    """Test that bounds can't be combined with ``keyed=False``."""
+    with pytest.raises(TypeError):
+
+        class Client(metaclass=singletons.Singleton, keyed=False, maxsize=2):
+            """Contradictory options."""
+
+
+def test_keyed_singleton_constructs_once_per_key() -> None:
+    """Test that concurrent first callers of a key share a single construction, per thread."""
+    threads = 8
+    barrier = threading.Barrier(threads)
+    constructed = []
+
+    class Client(metaclass=singletons.Singleton, keyed=True):
+        def __init__(self, region: str) -> None:
+            constructed.append(region)
+
+    def inner_func(q: queue.Queue) -> None:
+        barrier.wait(JOIN_TIMEOUT)
+        q.put((Client("east"), Client("west")))
+
+    test_q: queue.Queue = queue.Queue()
+    for _ in range(threads):
+        threading.Thread(target=inner_func, args=(test_q,)).start()
+
+    results = {test_q.get(timeout=JOIN_TIMEOUT) for _ in range(threads)}
+    assert sorted(constructed) == ["east", "west"]
+    assert len(results) == 1
+
+
+def test_keyed_singleton_failed_construction() -> None:
+    """Test that a failed construction drops the lock of its key, and that waiters retry it once."""
+    started, failing = threading.Event(), threading.Event()
+    attempts = []
+
+    class Client(metaclass=singletons.Singleton, keyed=True):
+        def __init__(self, region: str) -> None:
+            attempts.append(region)
+            if region == "west":
+                raise ValueError(region)
+            if attempts == ["west", "east"]:
+                started.set()
+                failing.wait(JOIN_TIMEOUT)
+                raise ValueError(region)
+
+    with pytest.raises(ValueError):
+        Client("west")
+    assert not Client._Singleton__multiton.locks
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+        first = executor.submit(Client, "east")
+        started.wait(JOIN_TIMEOUT)
+        waiters = [executor.submit(Client, "east") for _ in range(4)]
+        time.sleep(0.05)
+        failing.set()
+    with pytest.raises(ValueError):
+        first.result()
+    assert len({id(waiter.result()) for waiter in waiters}) == 1
+    assert attempts == ["west", "east", "east"]
+    assert not Client._Singleton__multiton.locks
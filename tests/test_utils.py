@@ -1,10 +1,47 @@
+import warnings
+
 import pytest
 import singletons.utils
 from singletons.exceptions import NoGreenthreadEnvironmentWarning
 
 
+@pytest.mark.usefixtures("_redetect_greenthread_environment")
 def test_greenthread_ident_default():
     """Test greenthread_ident() when there is no greenthread environment."""
     assert singletons.utils.detect_greenthread_environment() == "default"
     with pytest.warns(NoGreenthreadEnvironmentWarning):
         assert singletons.utils.greenthread_ident() is not None
+
+
+@pytest.mark.usefixtures("_redetect_greenthread_environment")
+def test_greenthread_ident_default_warns_once():
+    """Test that the missing greenthread environment is only warned about once per detection."""
+    with pytest.warns(NoGreenthreadEnvironmentWarning):
+        singletons.utils.greenthread_ident()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert singletons.utils.greenthread_ident() == 0
+        assert singletons.utils.greenthread_current() is None
+
+
+def test_redetect_greenthread_environment():
+    """Test forcing the greenthread environment."""
+    try:
+        assert singletons.utils.redetect_greenthread_environment("gevent") == "gevent"
+        assert singletons.utils.detect_greenthread_environment() == "gevent"
+    finally:
+        singletons.utils.redetect_greenthread_environment()
+    assert singletons.utils.detect_greenthread_environment() == "default"
+
+
+def test_live_greenlet_idents():
+    """Test finding the greenlets that still exist."""
+    import greenlet
+
+    current = greenlet.getcurrent()
+    finished = greenlet.greenlet(lambda: None)
+    finished.switch()
+    assert finished.dead
+    idents = singletons.utils.live_greenlet_idents()
+    assert id(current) in idents
+    assert id(finished) not in idents